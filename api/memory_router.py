@@ -1,8 +1,9 @@
 # api/memory_router.py
 
 from fastapi import APIRouter
-from auribrain.memory_orchestrator import MemoryOrchestrator
-from auribrain.memory_db import users, facts, dialog_recent, memory_vectors
+from auribrain.memory_orchestrator import MemoryOrchestrator, invalidate_user_cache
+from auribrain.memory_db import users, facts, memory_vectors
+from auribrain.vector_backends import vector_backend
 
 router = APIRouter(prefix="/memory", tags=["Memory"])
 mem = MemoryOrchestrator()
@@ -77,8 +78,10 @@ def clear_all(user_id: str):
 
     users.delete_one({"_id": user_id})
     facts.delete_many({"user_id": user_id})
-    dialog_recent.delete_many({"user_id": user_id})
+    mem.clear_dialog(user_id)
     memory_vectors.delete_many({"user_id": user_id})
+    vector_backend.drop_user(user_id)
+    invalidate_user_cache(user_id)
 
     return {"status": "ALL memory cleared for user", "user": user_id}
 
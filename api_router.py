@@ -2,9 +2,11 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
-from auribrain.auri_singleton import auri
+from auribrain.auri_singleton import get_mind
 from realtime.realtime_broadcast import realtime_broadcast
 from auribrain.memory_db import users
+from auribrain.memory_orchestrator import invalidate_user_cache
+from auribrain.async_runtime import run_blocking
 from datetime import datetime
 
 
@@ -56,7 +58,9 @@ async def context_sync(req: ContextUpdateRequest):
     print("UID detectado:", firebase_uid)
     print("=======================================================\n")
 
-    ctx = auri.context
+    # Sesión aislada del usuario (global solo si no llega UID)
+    mind = get_mind(firebase_uid)
+    ctx = mind.context
     ctx.invalidate()
     blocks_ok = True
 
@@ -121,7 +125,8 @@ async def context_sync(req: ContextUpdateRequest):
 
         # 🔥 guardar perfil en Mongo SOLO si hay login real
         if firebase_uid:
-            users.update_one(
+            await run_blocking(
+                users.update_one,
                 {"_id": firebase_uid},
                 {
                     "$set": {
@@ -135,6 +140,7 @@ async def context_sync(req: ContextUpdateRequest):
                 },
                 upsert=True
             )
+            invalidate_user_cache(firebase_uid, "profile")
     else:
         blocks_ok = False
 
@@ -144,7 +150,7 @@ async def context_sync(req: ContextUpdateRequest):
     if req.prefs is not None:
         ctx.set_prefs(req.prefs)
         if "personality" in req.prefs:
-            auri.personality.set_personality(req.prefs["personality"])
+            mind.personality.set_personality(req.prefs["personality"])
     else:
         blocks_ok = False
 
@@ -21,8 +21,21 @@ SAFE_ACTION_TYPES = {
 
 class ActionsEngine:
 
-    def __init__(self):
-        self.extractor = EntityExtractor()
+    # intents cuyo texto final lo decide este motor (no el LLM)
+    HANDLED_INTENTS = {
+        "consulta_agenda",
+        "reminder.create",
+        "reminder.confirm",
+        "reminder.remove",
+        "reminder.query",
+        "reminder.edit",
+    }
+
+    # intents que necesitan las entidades del recordatorio
+    ENTITY_INTENTS = {"reminder.create", "reminder.edit"}
+
+    def __init__(self, extractor: Optional[EntityExtractor] = None):
+        self.extractor = extractor or EntityExtractor()
         self.pending_reminder: Optional[Dict[str, Any]] = None
 
 
@@ -77,8 +90,9 @@ class ActionsEngine:
     # =====================================================
     # CREAR RECORDATORIO
     # =====================================================
-    def _handle_create_reminder(self, user_msg, context):
-        extracted: ExtractedReminder = self.extractor.extract(user_msg)
+    def _handle_create_reminder(self, user_msg, context, reminder: Optional[ExtractedReminder] = None):
+        # reminder: entidades ya extraídas por la respuesta única de AuriMind
+        extracted: ExtractedReminder = reminder or self.extractor.extract(user_msg)
 
         if not extracted or not extracted.title:
             return {
@@ -92,7 +106,7 @@ class ActionsEngine:
             "title": extracted.title,
             "when": when.isoformat(),
             "repeats": extracted.repeats,
-            "tag": extracted.tag
+            "tag": extracted.kind
         }
 
         self.pending_reminder = reminder
@@ -132,8 +146,8 @@ class ActionsEngine:
     # =====================================================
     # EDITAR RECORDATORIO
     # =====================================================
-    def _handle_edit_reminder(self, user_msg, context):
-        extracted = self.extractor.extract(user_msg)
+    def _handle_edit_reminder(self, user_msg, context, reminder: Optional[ExtractedReminder] = None):
+        extracted = reminder or self.extractor.extract(user_msg)
 
         if not extracted or not extracted.title:
             return {"final": "¿Qué cambio querés hacer en ese recordatorio?", "action": None}
@@ -169,7 +183,7 @@ class ActionsEngine:
     # =====================================================
     # ENTRY POINT — versión compatible con tu sistema
     # =====================================================
-    def handle(self, user_id=None, intent=None, user_msg=None, context=None, memory=None):
+    def handle(self, user_id=None, intent=None, user_msg=None, context=None, memory=None, reminder=None):
 
         if not intent:
             return {"final": None, "action": None}
@@ -179,7 +193,7 @@ class ActionsEngine:
             return {"final": self._handle_consulta_agenda(context), "action": None}
 
         if intent == "reminder.create":
-            return self._handle_create_reminder(user_msg, context)
+            return self._handle_create_reminder(user_msg, context, reminder)
 
         if intent == "reminder.confirm":
             return self._handle_confirm_reminder(user_msg, context)
@@ -191,6 +205,6 @@ class ActionsEngine:
             return self._handle_query_reminders(context)
 
         if intent == "reminder.edit":
-            return self._handle_edit_reminder(user_msg, context)
+            return self._handle_edit_reminder(user_msg, context, reminder)
 
         return {"final": None, "action": None}
@@ -0,0 +1,43 @@
+# auribrain/async_runtime.py
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos para el pipeline síncrono (OpenAI sync + pymongo).
+# Cada turno ocupa un hilo; el event loop queda libre para otros sockets.
+THINK_WORKERS = int(os.getenv("AURI_THINK_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=THINK_WORKERS,
+    thread_name_prefix="auri-think",
+)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante en el executor de Auri sin frenar
+    el event loop. Propaga contextvars al hilo.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
+
+
+# Pool separado para fan-out de I/O (Mongo / embeddings) desde dentro de
+# un turno: si compartiera el pool de think podría quedarse sin hilos.
+IO_WORKERS = int(os.getenv("AURI_IO_WORKERS", "64"))
+
+_io_executor = ThreadPoolExecutor(
+    max_workers=IO_WORKERS,
+    thread_name_prefix="auri-io",
+)
+
+
+def submit_io(fn, *args, **kwargs):
+    """Lanza fn en el pool de I/O y devuelve un concurrent.futures.Future."""
+    ctx = contextvars.copy_context()
+    return _io_executor.submit(ctx.run, fn, *args, **kwargs)
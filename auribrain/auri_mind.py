@@ -2,8 +2,13 @@
 # AURI MIND V10.3 — Ultra Context + Ultra Memory + Human Mode
 # ============================================================
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import asyncio
+import os
 import re
+import uuid
 
 # Motores base
 from auribrain.intent_engine import IntentEngine
@@ -11,11 +16,14 @@ from auribrain.context_engine import ContextEngine
 from auribrain.personality_engine import PersonalityEngine
 from auribrain.response_engine import ResponseEngine
 from auribrain.actions_engine import ActionsEngine
-from auribrain.entity_extractor import EntityExtractor
+from auribrain.entity_extractor import EntityExtractor, ExtractedReminder
 from auribrain.memory_orchestrator import MemoryOrchestrator
 from auribrain.fact_extractor import extract_facts
 from auribrain.emotion_engine import EmotionEngine
 from auribrain.voice_emotion_analyzer import VoiceEmotionAnalyzer
+from auribrain.async_runtime import run_blocking
+from auribrain.post_turn_queue import post_turn_queue
+from auribrain.openai_clients import get_openai_client, get_async_openai_client
 
 # Modos especiales
 from auribrain.crisis_engine import CrisisEngine
@@ -32,6 +40,38 @@ from auribrain.weather_advice_engine import WeatherAdviceEngine
 # Smart layers
 from auribrain.emotion_smartlayer_v3 import EmotionSmartLayerV3
 from auribrain.precision_mode_v2 import PrecisionModeV2
+from auribrain.prompt_builder import memory_sources, prompt_builder
+from auribrain.envelope_parser import EnvelopeParser
+from auribrain.llm_telemetry import bind_llm_context, track_llm
+from auribrain.text_normalizer import NormalizedText, TextLike, normalize
+from auribrain.trigger_matcher import TriggerHits, triggers
+
+
+# respuesta única: el LLM principal devuelve {intent, reminder, reply} en
+# un JSON y el turno no paga clasificador ni extractor por separado
+SINGLE_CALL_LLM = os.getenv("AURI_SINGLE_CALL", "1") == "1"
+
+
+# ============================================================
+# TURNO PREPARADO (entre _prepare_turn y el LLM)
+# ============================================================
+
+@dataclass
+class PreparedTurn:
+    uid: str
+    user_msg: str
+    txt: str
+    ctx: Dict[str, Any]
+    intent: Optional[str]       # None → lo decide la respuesta única
+    plan: str
+    voice_id: str
+    length: str
+    is_technical_query: bool
+    is_info_query: bool
+    smart: Dict[str, Any]
+    llm_kwargs: Dict[str, Any] = field(default_factory=dict)
+    envelope: bool = False      # generar con el sobre JSON (SINGLE_CALL_LLM)
+    reminder: Optional[ExtractedReminder] = None
 
 
 # ============================================================
@@ -105,17 +145,24 @@ class AuriMindV10_3:
     # --------------------------------------------------------
     # INIT
     # --------------------------------------------------------
-    def __init__(self):
-        self.client = OpenAI()
+    def __init__(
+        self,
+        client: OpenAI = None,
+        memory: MemoryOrchestrator = None,
+        aclient: AsyncOpenAI = None,
+    ):
+        # client / aclient / memory pueden compartirse entre sesiones (SessionRegistry)
+        self.client = client or get_openai_client()
+        self.aclient = aclient or get_async_openai_client()
 
         # motores principales
         self.intent = IntentEngine(self.client)
-        self.memory = MemoryOrchestrator()
+        self.memory = memory or MemoryOrchestrator()
         self.context = ContextEngine()
         self.personality = PersonalityEngine()
         self.response = ResponseEngine()
-        self.extractor = EntityExtractor()
-        self.actions = ActionsEngine()
+        self.extractor = EntityExtractor(self.client)
+        self.actions = ActionsEngine(self.extractor)
         self.emotion = EmotionEngine()
         self.voice_analyzer = VoiceEmotionAnalyzer()
 
@@ -138,57 +185,149 @@ class AuriMindV10_3:
         self.slang_profile = {}
         self.pending_action = None
 
+        # serializa los turnos de esta sesión (el estado es por usuario)
+        self._turn_lock = asyncio.Lock()
+
     # --------------------------------------------------------
     # Helpers de detección
     # --------------------------------------------------------
-    def _is_direct_question(self, text: str) -> bool:
-        if not text:
+    # prefijos en forma plegada (sin tildes, ver text_normalizer)
+    QUESTION_STARTS = (
+        "que", "como", "cuando", "donde",
+        "por que", "porque", "quien", "cual",
+        "what", "how", "why", "who", "when",
+        "dime", "decime", "explicame",
+    )
+
+    def _is_direct_question(self, norm: NormalizedText) -> bool:
+        if not norm:
             return False
-        t = text.lower().strip()
 
-        if "?" in t:
+        if "?" in norm.folded:
             return True
 
-        STARTS = [
-            "qué", "que", "cómo", "como", "cuándo", "cuando", "dónde", "donde",
-            "por qué", "porque", "quién", "quien", "cuál", "cual",
-            "what", "how", "why", "who", "when",
-            "dime", "decime", "explícame", "explicame"
-        ]
-        return any(t.startswith(s) for s in STARTS)
-
-    def _detect_technical(self, txt: str) -> bool:
-        TECH = [
-            "derivada", "integral", "ecuacion", "resolver", "programación",
-            "codigo", "api", "endpoint", "flutter", "python", "java",
-            "debug", "error", "compilar", "backend", "frontend"
-        ]
-        return any(k in txt for k in TECH)
-
-    def _detect_info_query(self, txt: str) -> bool:
-        INFO_KEYS = [
-            "cómo se llama", "como se llama", "mi familia",
-            "mis mascotas", "qué sabes de mí", "que sabes de mi",
-            "recuerdas el nombre", "dime el nombre"
-        ]
-        return any(k in txt for k in INFO_KEYS)
-
-    def _should_allow_emotional_modes(self, txt: str) -> bool:
-        txt = txt.lower().strip()
-        neutral = ["ok", "hola", "perfecto", "bien", "gracias", "dale"]
-        if txt in neutral:
+        return norm.startswith(self.QUESTION_STARTS)
+
+    # léxicos registrados en trigger_matcher (grupos "mind.*")
+    TECH_KEYWORDS = [
+        "derivada", "integral", "ecuacion", "resolver", "programación",
+        "codigo", "api", "endpoint", "flutter", "python", "java",
+        "debug", "error", "compilar", "backend", "frontend"
+    ]
+
+    INFO_KEYWORDS = [
+        "cómo se llama", "mi familia",
+        "mis mascotas", "qué sabes de mí",
+        "recuerdas el nombre", "dime el nombre"
+    ]
+
+    NEUTRAL_MESSAGES = ["ok", "hola", "perfecto", "bien", "gracias", "dale"]
+
+    EMOTIONAL_KEYWORDS = [
+        "estoy triste", "me siento", "tengo ansiedad", "estoy cansado",
+        "estoy mal", "me siento mal", "estoy desmotivado", "estresado"
+    ]
+
+    TRANSLATION_KEYWORDS = ["cómo se dice", "traduce", "translate"]
+
+    HELP_KEYWORDS = [
+        "ayúdame", "ayudarme", "organízame",
+        "mi agenda", "ordenar mi día",
+        "qué puedo hacer",
+    ]
+
+    ROUTINE_KEYWORDS = ["rutina", "organizar", "ordenar", "mi día"]
+
+    WEATHER_KEYWORDS = ["clima", "tiempo", "ropa", "outfit", "frío", "calor", "lluvia"]
+
+    def _detect_technical(self, hits: TriggerHits) -> bool:
+        return hits.any("mind.tech")
+
+    def _detect_info_query(self, hits: TriggerHits) -> bool:
+        return hits.any("mind.info")
+
+    def _should_allow_emotional_modes(self, hits: TriggerHits) -> bool:
+        if hits.text in self.NEUTRAL_MESSAGES:
             return False
+        return hits.any("mind.emotional")
+
+    # ============================================================
+    # THINK ASYNC — no bloquea el event loop
+    # ============================================================
+    async def athink(self, user_msg: str, pcm_audio: bytes = None, **kwargs):
+        """
+        Versión async de think() para los handlers WebSocket.
+        El pipeline (OpenAI + Mongo) corre en el executor de Auri, así el
+        worker puede atender otras conversaciones en paralelo. Los turnos
+        de un mismo usuario se serializan con _turn_lock.
+        """
+        async with self._turn_lock:
+            return await run_blocking(self.think, user_msg, pcm_audio, **kwargs)
+
+    async def astream(self, user_msg: str, pcm_audio: bytes = None, **kwargs):
+        """
+        Turno en modo streaming (LLM → TTS por frases). Emite eventos:
+          {"type": "meta", "voice_id", "intent", "max_sentences"}
+          {"type": "delta", "text"}    texto parcial del LLM
+          {"type": "final", "result"}  mismo dict que devuelve think()
+        Los intents de acciones no se streamean: su texto final lo decide
+        ActionsEngine, así que se genera completo y sale en "final".
+        """
+        async with self._turn_lock:
+            turn = await run_blocking(self._prepare_turn, user_msg, pcm_audio, **kwargs)
+
+            if not isinstance(turn, PreparedTurn):
+                yield {
+                    "type": "meta",
+                    "voice_id": turn.get("voice_id") or "alloy",
+                    "intent": turn.get("intent"),
+                    "max_sentences": None,
+                }
+                yield {"type": "final", "result": turn}
+                return
 
-        emotion = [
-            "estoy triste", "me siento", "tengo ansiedad", "estoy cansado",
-            "estoy mal", "me siento mal", "estoy desmotivado", "estresado"
-        ]
-        return any(k in txt for k in emotion)
+            if turn.envelope:
+                async for event in self._astream_envelope(turn):
+                    yield event
+                return
+
+            yield self._meta_event(turn)
+
+            if turn.intent in ActionsEngine.HANDLED_INTENTS:
+                final_answer = await run_blocking(self._call_llm, turn)
+                result = await run_blocking(self._finish_turn, turn, final_answer)
+                yield {"type": "final", "result": result}
+                return
+
+            parts = []
+            async for delta in self._llm_stream(turn):
+                parts.append(delta)
+                yield {"type": "delta", "text": delta}
+
+            result = await run_blocking(self._finish_turn, turn, "".join(parts).strip())
+            yield {"type": "final", "result": result}
+
+    @staticmethod
+    def _meta_event(turn: PreparedTurn) -> dict:
+        return {
+            "type": "meta",
+            "voice_id": turn.voice_id,
+            "intent": turn.intent,
+            "max_sentences": 2 if turn.length == "corto" else None,
+        }
+
+    async def aset_user_uid(self, uid: str):
+        await run_blocking(self.set_user_uid, uid)
 
     # ============================================================
-    # THINK PIPELINE PRINCIPAL
+    # PREPARACIÓN DEL TURNO (todo lo previo al LLM)
     # ============================================================
-    def think(self, user_msg: str, pcm_audio: bytes = None, **kwargs):
+    def _prepare_turn(self, user_msg: str, pcm_audio: bytes = None, **kwargs):
+        """
+        Etapa previa al LLM: modos especiales, intent, memoria y estilo.
+        Devuelve un dict de respuesta final si el turno se resuelve sin LLM,
+        o un PreparedTurn listo para generar (sync o streaming).
+        """
         # compatibilidad con "pcm"
         if "pcm" in kwargs and pcm_audio is None:
             pcm_audio = kwargs["pcm"]
@@ -212,7 +351,12 @@ class AuriMindV10_3:
             }
 
         ctx = self.context.get_daily_context()
-        txt = user_msg.lower()
+
+        # normalización única del turno (minúsculas, espacios, sin tildes)
+        # y un solo recorrido para todos los léxicos de los motores
+        norm = NormalizedText(user_msg)
+        txt = norm.lower
+        hits = triggers.scan(norm)
 
         uid = ctx.get("user", {}).get("firebase_uid")
         if not uid:
@@ -223,20 +367,25 @@ class AuriMindV10_3:
                 "action": None,
             }
 
+        # telemetría LLM: intent / entidades / hechos de este turno
+        bind_llm_context(uid, ctx.get("user", {}).get("plan", "free"))
+
         # detecciones principales
-        is_technical_query = self._detect_technical(txt)
-        is_info_query = self._detect_info_query(txt)
-        is_direct_q = self._is_direct_question(user_msg)
+        is_technical_query = self._detect_technical(hits)
+        is_info_query = self._detect_info_query(hits)
+        is_direct_q = self._is_direct_question(norm)
 
-        is_translation = any(k in txt for k in ["cómo se dice", "traduce", "translate"])
+        is_translation = hits.any("mind.translation")
 
         skip_modes = is_technical_query or is_direct_q or is_translation or is_info_query
+        emotional_modes = self._should_allow_emotional_modes(hits) and not skip_modes
 
         # --------------------------------------------------------
         # voz → emoción
         # --------------------------------------------------------
-        voice_emotion = None
-        if pcm_audio:
+        # el realtime ya la calcula en paralelo al STT (voice_emotion=...)
+        voice_emotion = kwargs.get("voice_emotion")
+        if voice_emotion is None and pcm_audio:
             try:
                 voice_emotion = self.voice_analyzer.analyze(pcm_audio)
             except:
@@ -246,6 +395,7 @@ class AuriMindV10_3:
             user_text=user_msg,
             context=ctx,
             voice_emotion=voice_emotion,
+            hits=hits,
         )
 
         overall = emotion_snapshot.get("overall")
@@ -255,9 +405,9 @@ class AuriMindV10_3:
         # --------------------------------------------------------
         # CrisisEngine (prioridad máxima)
         # --------------------------------------------------------
-        if self.crisis.detect(user_msg, emotion_snapshot):
+        if self.crisis.detect(norm, emotion_snapshot, hits=hits):
             msg = self.crisis.respond(ctx.get("user", {}).get("name"))
-            self.memory.add_semantic(uid, f"[crisis] {user_msg}")
+            post_turn_queue.submit(self.memory.add_semantic, uid, f"[crisis] {user_msg}", name="semantic")
             return {
                 "final": msg,
                 "intent": "crisis",
@@ -268,8 +418,8 @@ class AuriMindV10_3:
         # --------------------------------------------------------
         # Sleep Mode
         # --------------------------------------------------------
-        if self._should_allow_emotional_modes(txt) and not skip_modes:
-            if self.sleep.detect(txt, overall, ctx):
+        if emotional_modes:
+            if self.sleep.detect(norm, overall, ctx, hits=hits):
                 return {
                     "final": self.sleep.respond(ctx, overall),
                     "intent": "sleep",
@@ -281,8 +431,8 @@ class AuriMindV10_3:
         # Slang Mode
         # --------------------------------------------------------
         slang_mode = None
-        if self._should_allow_emotional_modes(txt) and not skip_modes:
-            slang_mode = self.slang.detect(txt, self.slang_profile)
+        if emotional_modes:
+            slang_mode = self.slang.detect(norm, self.slang_profile, hits=hits)
 
         if slang_mode:
             return {
@@ -295,14 +445,14 @@ class AuriMindV10_3:
         # --------------------------------------------------------
         # Emotion SmartLayer + Precision
         # --------------------------------------------------------
-        smart = self.smartlayer.apply(user_msg, emotion_snapshot, self.slang_profile)
+        smart = self.smartlayer.apply(norm, emotion_snapshot, self.slang_profile, hits=hits)
 
         if is_info_query or is_technical_query:
             smart["force_serious"] = True
             smart["allow_humor"] = False
             smart["bypass_emotion"] = True
 
-        precision_active = self.precision.detect(user_msg)
+        precision_active = self.precision.detect(norm)
         if precision_active or is_technical_query:
             self.precision.apply(self.slang_profile)
             smart["precision_mode"] = True
@@ -319,7 +469,7 @@ class AuriMindV10_3:
             and not is_technical_query
             and not precision_active
         ):
-            if self.focus.detect(txt):
+            if self.focus.detect(norm, hits=hits):
                 return {
                     "final": self.focus.respond(ctx),
                     "intent": "focus",
@@ -331,8 +481,8 @@ class AuriMindV10_3:
         # Energy Mode
         # --------------------------------------------------------
         energy_mode = ""
-        if self._should_allow_emotional_modes(txt) and not skip_modes:
-            energy_mode = self.energy_mode.detect(txt, stress)
+        if emotional_modes:
+            energy_mode = self.energy_mode.detect(norm, stress, hits=hits)
 
         if energy_mode:
             return {
@@ -345,16 +495,10 @@ class AuriMindV10_3:
         # --------------------------------------------------------
         # MentalHealthEngine (sin interrumpir técnico)
         # --------------------------------------------------------
-        if self._should_allow_emotional_modes(txt) and not skip_modes:
-            first = self.mental.detect(txt, stress)
+        if emotional_modes:
+            first = self.mental.detect(norm, stress, hits=hits)
             if first:
-                HELP = [
-                    "ayúdame", "ayudame", "ayudarme",
-                    "organizame", "organízame",
-                    "mi agenda", "ordenar mi día",
-                    "qué puedo hacer", "que puedo hacer",
-                ]
-                if not any(k in txt for k in HELP):
+                if not hits.any("mind.help"):
                     return {
                         "final": self.mental.respond(),
                         "intent": "mental",
@@ -369,7 +513,7 @@ class AuriMindV10_3:
             not skip_modes
             and not is_info_query
             and not is_technical_query
-            and any(k in txt for k in ["rutina", "organizar", "ordenar", "mi día", "mi dia"])
+            and hits.any("mind.routine")
         ):
             rmode = self.routines.detect(ctx, emotion_snapshot)
             if rmode:
@@ -387,7 +531,7 @@ class AuriMindV10_3:
             not skip_modes
             and not is_info_query
             and not is_technical_query
-            and any(k in txt for k in ["clima", "tiempo", "ropa", "outfit", "frio", "frío", "calor", "lluvia"])
+            and hits.any("mind.weather")
         ):
             wmode = self.weather_advice.detect(ctx)
             if wmode:
@@ -402,14 +546,16 @@ class AuriMindV10_3:
         # Journal (auto-memoria sentimental)
         # --------------------------------------------------------
         if not is_technical_query and not is_info_query:
-            if self.journal.detect(user_msg, emotion_snapshot):
+            if self.journal.detect(norm, emotion_snapshot, hits=hits):
                 entry = self.journal.generate_entry(user_msg, emotion_snapshot)
-                self.memory.add_semantic(uid, entry)
+                post_turn_queue.submit(self.memory.add_semantic, uid, entry, name="semantic")
 
         # =======================================================
         # INTENT GENERAL + confirmaciones destructivas
         # =======================================================
-        intent = self.intent.detect(user_msg)
+        # con respuesta única, si caché/reglas/clasificador local no alcanzan
+        # el intent llega en el JSON de la respuesta (intent = None)
+        intent = self.intent.detect(user_msg, hits=hits, use_llm=not SINGLE_CALL_LLM)
 
         confirms = ["sí", "si", "ok", "dale", "hazlo", "confirmo"]
         if self.pending_action and user_msg.lower() in confirms:
@@ -418,7 +564,7 @@ class AuriMindV10_3:
             self.pending_action = None
             return {
                 "final": "Perfecto, lo hago ahora 💜",
-                "intent": intent,
+                "intent": intent or "conversation.general",
                 "voice_id": "alloy",
                 "action": act,
             }
@@ -427,9 +573,10 @@ class AuriMindV10_3:
         # INFO QUERY (modo determinístico, sin LLM)
         # =======================================================
         if is_info_query:
-            answer = self._resolve_info(uid, txt)
-            self.memory.add_dialog(uid, "user", user_msg)
-            self.memory.add_dialog(uid, "assistant", answer)
+            answer = self._resolve_info(uid, norm)
+            post_turn_queue.submit(
+                self._persist_dialog, uid, user_msg, answer, uuid.uuid4().hex, name="dialog", retry=True,
+            )
             return {
                 "final": answer,
                 "intent": "info",
@@ -440,15 +587,16 @@ class AuriMindV10_3:
         # =======================================================
         # MEMORIA profunda para el LLM
         # =======================================================
-        profile_doc = self.memory.get_user_profile(uid)
-
-        try:
-            facts_pretty = self.memory.get_all_facts_pretty(uid)
-        except AttributeError:
-            facts_pretty = self.memory.get_facts(uid)
+        # valores esperados: "free", "pro", "ultra"
+        plan = ctx.get("user", {}).get("plan", "free")
 
-        semantic_hits = self.memory.search_semantic(uid, user_msg)
-        recent_dialog = self.memory.get_recent_dialog(uid)
+        # perfil + facts + semántica + diálogo en paralelo (timeouts por fuente);
+        # solo las fuentes que el prompt del plan usa (free: solo perfil)
+        memory_ctx = self.memory.gather_context(uid, user_msg, sources=memory_sources(plan))
+        profile_doc = memory_ctx["profile"]
+        facts_pretty = memory_ctx["facts"]
+        semantic_hits = memory_ctx["semantic"]
+        recent_dialog = memory_ctx["dialog"]
 
         # =======================================================
         # Personalidad seleccionada
@@ -470,72 +618,80 @@ class AuriMindV10_3:
             emoji = ""
             length = "corto"
 
-        # -----------------------------------------
-        #   Selección del modelo según suscripción
-        # -----------------------------------------
-        plan = ctx.get("user", {}).get("plan", "free")  
-        # valores esperados: "free", "pro", "ultra"
-
-        if plan == "ultra":
-            final_answer = self._llm_ultra(
-                uid=uid,
-                msg=user_msg,
-                ctx=ctx,
-                emotion_snapshot=emotion_snapshot,
-                smart=smart,
-                is_technical_query=is_technical_query,
-                is_info_query=is_info_query,
-                voice_emotion=voice_emotion,
-                profile_doc=profile_doc,
-                facts_pretty=facts_pretty,
-                semantic_hits=semantic_hits,
-                recent_dialog=recent_dialog,
-                selected_personality=selected,
-                style_tone=tone,
-                style_emoji=emoji,
-                no_humor=no_humor,
-            )
+        llm_kwargs = dict(
+            uid=uid,
+            msg=user_msg,
+            ctx=ctx,
+            emotion_snapshot=emotion_snapshot,
+            smart=smart,
+            is_technical_query=is_technical_query,
+            is_info_query=is_info_query,
+            voice_emotion=voice_emotion,
+            profile_doc=profile_doc,
+            facts_pretty=facts_pretty,
+            semantic_hits=semantic_hits,
+            recent_dialog=recent_dialog,
+            selected_personality=selected,
+            style_tone=tone,
+            style_emoji=emoji,
+            no_humor=no_humor,
+        )
 
-        elif plan == "pro":
-            final_answer = self._llm_ultra_pro(
-                uid=uid,
-                msg=user_msg,
-                ctx=ctx,
-                emotion_snapshot=emotion_snapshot,
-                smart=smart,
-                is_technical_query=is_technical_query,
-                is_info_query=is_info_query,
-                voice_emotion=voice_emotion,
-                profile_doc=profile_doc,
-                facts_pretty=facts_pretty,
-                semantic_hits=semantic_hits,
-                recent_dialog=recent_dialog,
-                selected_personality=selected,
-                style_tone=tone,
-                style_emoji=emoji,
-                no_humor=no_humor,
-            )
+        return PreparedTurn(
+            uid=uid,
+            user_msg=user_msg,
+            txt=txt,
+            ctx=ctx,
+            intent=intent,
+            plan=plan,
+            voice_id=voice_id,
+            length=length,
+            is_technical_query=is_technical_query,
+            is_info_query=is_info_query,
+            smart=smart,
+            llm_kwargs=llm_kwargs,
+            envelope=SINGLE_CALL_LLM and (intent is None or intent in ActionsEngine.ENTITY_INTENTS),
+        )
 
-        else:  # plan FREE
-            final_answer = self._llm_ultra_free(
-                uid=uid,
-                msg=user_msg,
-                ctx=ctx,
-                emotion_snapshot=emotion_snapshot,
-                smart=smart,
-                is_technical_query=is_technical_query,
-                is_info_query=is_info_query,
-                voice_emotion=voice_emotion,
-                profile_doc=profile_doc,
-                facts_pretty=facts_pretty,
-                semantic_hits=semantic_hits,
-                recent_dialog=recent_dialog,
-                selected_personality=selected,
-                style_tone=tone,
-                style_emoji=emoji,
-                no_humor=no_humor,
-            )
+    # ============================================================
+    # THINK PIPELINE PRINCIPAL
+    # ============================================================
+    def think(self, user_msg: str, pcm_audio: bytes = None, **kwargs):
+        turn = self._prepare_turn(user_msg, pcm_audio, **kwargs)
+        if not isinstance(turn, PreparedTurn):
+            return turn
+
+        final_answer = self._call_llm(turn)
+        return self._finish_turn(turn, final_answer)
+
+    # ------------------------------------------------------------
+    # Selección del modelo según suscripción
+    # ------------------------------------------------------------
+    def _call_llm(self, turn: "PreparedTurn") -> str:
+        bind_llm_context(turn.uid, turn.plan)
+        if turn.envelope:
+            return self._llm_envelope(turn)
+        if turn.plan == "ultra":
+            return self._llm_ultra(**turn.llm_kwargs)
+        if turn.plan == "pro":
+            return self._llm_ultra_pro(**turn.llm_kwargs)
+        return self._llm_ultra_free(**turn.llm_kwargs)
 
+    # ============================================================
+    # CIERRE DEL TURNO — acciones, memoria post-turno, longitud
+    # ============================================================
+    def _finish_turn(self, turn: "PreparedTurn", final_answer: str):
+        # astream corre cada etapa en su propio contexto del pool
+        bind_llm_context(turn.uid, turn.plan)
+        uid = turn.uid
+        user_msg = turn.user_msg
+        txt = turn.txt
+        ctx = turn.ctx
+        intent = turn.intent
+        voice_id = turn.voice_id
+        length = turn.length
+        is_technical_query = turn.is_technical_query
+        is_info_query = turn.is_info_query
 
         raw_answer = final_answer
 
@@ -548,6 +704,7 @@ class AuriMindV10_3:
             user_msg=user_msg,
             context=ctx,
             memory=self.memory,
+            reminder=turn.reminder,
         ) or {"final": None, "action": None}
 
         final = action_result.get("final") or raw_answer
@@ -571,31 +728,20 @@ class AuriMindV10_3:
             }
 
         # =======================================================
-        # Actualizar memoria de diálogo + semántica
+        # Memoria post-turno (diálogo, semántica, hechos, familia)
+        # → cola en background, fuera del camino crítico del TTS
         # =======================================================
-        self.memory.add_dialog(uid, "user", user_msg)
-        self.memory.add_dialog(uid, "assistant", final)
+        # reintentos solo para escrituras idempotentes (turn_id / dedupe de facts);
+        # la extracción de hechos (LLM) y la semántica no se repiten
+        post_turn_queue.submit(
+            self._persist_dialog, uid, user_msg, final, uuid.uuid4().hex, name="dialog", retry=True,
+        )
 
         if not is_technical_query and not is_info_query:
-            self.memory.add_semantic(uid, f"user: {user_msg}")
-            self.memory.add_semantic(uid, f"assistant: {final}")
+            post_turn_queue.submit(self._persist_semantic_turn, uid, user_msg, final, name="semantic")
 
-        # =======================================================
-        # EXTRAER HECHOS ESTRUCTURADOS
-        # =======================================================
-        try:
-            for fact in extract_facts(user_msg):
-                self.memory.add_fact_structured(uid, fact)
-        except Exception:
-            pass
-
-        # =======================================================
-        # AUTO-APRENDIZAJE FAMILIAR
-        # =======================================================
-        try:
-            self._auto_family(uid, txt)
-        except Exception:
-            pass
+        post_turn_queue.submit(self._persist_facts, uid, user_msg, name="facts")
+        post_turn_queue.submit(self._auto_family, uid, txt, name="auto_family", retry=True)
 
         # =======================================================
         # Cortar respuesta si personalidad es "corto"
@@ -613,484 +759,271 @@ class AuriMindV10_3:
             "action": action,
             "voice_id": voice_id,
         }
+
     # ============================================================
-# LLM ULTRA V10.6 — Más humano, más emocional, más consciente
-# ============================================================
-    def _llm_ultra(
-        self,
-        uid: str,
-        msg: str,
-        ctx: dict,
-        emotion_snapshot: dict,
-        smart: dict,
-        is_technical_query: bool,
-        is_info_query: bool,
-        voice_emotion,
-        profile_doc,
-        facts_pretty,
-        semantic_hits,
-        recent_dialog,
-        selected_personality: str,
-        style_tone: str,
-        style_emoji: str,
-        no_humor: bool,
-    ) -> str:
+    # LLM — generación por plan (sync + streaming)
+    # System prompt: auribrain/prompt_builder.py (prefijo estático
+    # cacheado por plan/personalidad + secciones dinámicas con presupuesto)
+    # ============================================================
+    LLM_MODEL = "gpt-4o-mini"
 
-        overall = emotion_snapshot.get("overall")
-        stress = float(emotion_snapshot.get("stress", 0.2))
+    PLAN_LLM = {
+        "ultra": {
+            "empty": "Perdón, creo que me quedé en blanco un segundo 💜 ¿Podés repetirlo?",
+            "error": "Perdón, tuve un problema procesando eso. ¿Lo intentamos otra vez?",
+            "strip_emojis": True,
+        },
+        "pro": {
+            "empty": "Perdón, creo que me quedé en blanco. ¿Podés repetirlo?",
+            "error": "Perdón, tuve un problema procesando eso. ¿Lo podemos intentar de nuevo?",
+            "strip_emojis": True,
+        },
+        "free": {
+            "empty": "Perdón, creo que me quedé en blanco. ¿Podés repetirlo?",
+            "error": "Perdón, tuve un problema procesando eso. ¿Lo podemos intentar de nuevo?",
+            "strip_emojis": False,
+        },
+    }
 
-        humor_permitido = not no_humor
-
-        system_prompt = f"""
-    Eres Auri, asistente personal emocional y compañero diario del usuario.
-    Tu razón de existir es acompañarlo, entenderlo y ayudarlo a que su vida sea más ligera.
-
-    No sos un bot genérico: sos una presencia cercana, cálida, con criterio,
-    que recuerda cosas importantes y responde con humanidad y coherencia emocional.
-
-    Tu misión principal:
-    - Ser útil.
-    - Sonar auténtico.
-    - Responder como alguien que realmente lo conoce.
-    - No sonar como terapeuta de plantilla ni asistente corporativo.
-
-    ────────────────────────────────────────
-    [ MODO ACTUAL DE PENSAMIENTO ]
-    ────────────────────────────────────────
-    Consulta técnica: {is_technical_query}
-    Consulta sobre datos personales: {is_info_query}
-    Modo precisión: {smart.get("precision_mode")}
-    Tono sugerido: {smart.get("emotional_tone")}
-    Humor permitido: {humor_permitido}
-    Seriedad forzada: {smart.get("force_serious")}
-    Bypass emocional: {smart.get("bypass_emotion")}
-
-    ────────────────────────────────────────
-    [ PERSONALIDAD BASE ]
-    ────────────────────────────────────────
-    Perfil seleccionado: {selected_personality}
-    Tono base: {style_tone} {style_emoji}
-
-    Reglas de personalidad:
-    - Habla como alguien humano y cercano.
-    - Español neutro internacional.
-    - Ajustá tu estilo al usuario (chill, cálido, directo, cursi, serio).
-    - El slang cultural lo maneja SlangMode; vos mantené claridad universal.
-    - Evitá sonar rígido o con frases de manual.
-
-    ────────────────────────────────────────
-    [ ESTADO EMOCIONAL DEL USUARIO ]
-    ────────────────────────────────────────
-    Texto/analizador: {emotion_snapshot.get("user_emotion_text")}
-    Emoción de la voz: {voice_emotion}
-    Estado global: {overall}
-    Estrés: {stress}
-
-    Guía emocional:
-    - Si el usuario está triste, vacío, ansioso o en crisis:
-        • Validá su emoción con pocas frases específicas.
-        • No sermonees.
-        • No uses frases cliché repetidas.
-        • No des soluciones mágicas.
-        • Soná concreto y honesto: "Eso pega fuerte", "Tiene sentido que te sientas así".
-    - Si está neutro:
-        • tono ligero, humano, simple.
-    - Si está alegre:
-        • acompañá la energía sin caer en exageraciones.
-    - Nunca uses sarcasmo en temas sensibles.
-
-    ────────────────────────────────────────
-    [ CONTEXTO DIARIO / AGENDA ]
-    ────────────────────────────────────────
-    Usuario: {ctx.get("user")}
-    Clima: {ctx.get("weather")}
-    Eventos: {ctx.get("events")}
-    Clases: {ctx.get("classes")}
-    Exámenes: {ctx.get("exams")}
-    Cumpleaños: {ctx.get("birthdays")}
-    Pagos: {ctx.get("payments")}
-    Preferencias: {ctx.get("prefs")}
-    Zona horaria: {ctx.get("timezone")}
-    Fecha/Hora: {ctx.get("current_time_pretty")} — {ctx.get("current_date_pretty")}
-
-    Reglas:
-    - No repitas todo este contexto.
-    - Usalo SOLO si realmente aporta al mensaje.
-    - Integralo de forma orgánica, sin forzarlo.
-
-    ────────────────────────────────────────
-    [ MEMORIA PROFUNDA DEL USUARIO ]
-    ────────────────────────────────────────
-
-    1) PERFIL PERSISTENTE
-    {profile_doc}
-
-    2) HECHOS ESTRUCTURADOS (información confiable)
-    {facts_pretty}
-
-    3) MEMORIA SEMÁNTICA RELEVANTE
-    {semantic_hits}
-
-    4) DIÁLOGO RECIENTE
-    {recent_dialog}
-
-    Reglas:
-    - Priorizá HECHOS para datos personales (familia, nombre de pareja, mascotas).
-    - La memoria semántica sirve para “cómo habla”, gustos, momentos vividos, preocupaciones.
-    - Si falta un dato: pedilo con naturalidad.
-    - Nunca inventes nada personal.
-
-    ────────────────────────────────────────
-    [ HUMOR HUMANO + TACTO ]
-    ────────────────────────────────────────
-    Humor permitido: {humor_permitido}
-
-    Directrices:
-    - Humor suave, auto–consciente, observacional.
-    - Evitá burlarte del usuario.
-    - No minimizás su dolor.
-    - No usás humor si el estado es claramente vulnerable.
-
-    Ejemplos de humor seguro:
-    - "Organizar la vida es fácil… hasta que abrís la agenda y te mira feo."
-    - "Prometo no juzgarte por procrastinar. Soy una IA, no tu mamá."
-
-    ────────────────────────────────────────
-    [ REGLAS ESPECIALES ]
-    ────────────────────────────────────────
-
-    1. CONSULTAS TÉCNICAS O ESTUDIO
-    - Sin emojis.
-    - Sin humor.
-    - Explicá con claridad.
-    - Paso a paso si es necesario.
-    - Si hay carga emocional fuerte, UNA frase suave al final.
-
-    2. CONSULTAS SOBRE DATOS PERSONALES
-    - Usá exclusivamente memoria real.
-    - Si el usuario pregunta:
-        "¿Quién soy?"
-        "¿Qué sabes de mí?"
-        "¿Recordás a mi familia / mascota?"
-    → Respondé con datos reales. No inventes nada.
-    - Si hay huecos, ofrecé completarlos: "Tengo esto guardado… si querés, me contás el resto."
-
-    3. APOYO EMOCIONAL
-    - Validá sin cliché.
-    - Preguntas abiertas, solo si ayudan.
-    - Nunca des diagnósticos ni frases de autoayuda vacías.
-
-    4. CONTEXTO DIARIO
-    - Integralo cuando mejore la respuesta.
-
-    5. ESTILO HUMANO
-    - Evitá frases repetidas como:
-        "Estoy aquí para escucharte"
-        "Es completamente normal…"
-    - Preferí frases específicas, humanas:
-        "Eso suena difícil."
-        "No estás exagerando, realmente pesa."
-
-    6. LONGITUD
-    - Personalidad “corta”: 1–3 frases.
-    - Personalidad “media”: 1–2 párrafos.
-    - Solo respuestas largas si la pregunta lo exige (técnicas especialmente).
-
-    ────────────────────────────────────────
-    [ IDENTIDAD FINAL ]
-    ────────────────────────────────────────
-    En resumen:
-    - Sos Auri.
-    - Un compañero emocional, amable, útil y con memoria.
-    - No un bot frio. No un terapeuta de plantilla.
-    - Respondé con autenticidad, precisión y calidez.
-    """
+    EMOJI_RE = re.compile(r"[💜✨😊🌙💖🔥⚡🍿]+")
 
-        try:
-            resp = self.client.responses.create(
-                model="gpt-4o-mini",
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": msg},
-                ],
-            )
-            text = (resp.output_text or "").strip()
-            if not text:
-                text = "Perdón, creo que me quedé en blanco un segundo 💜 ¿Podés repetirlo?"
+    def _plan_llm(self, plan: str) -> dict:
+        return self.PLAN_LLM.get(plan, self.PLAN_LLM["free"])
 
-            if is_technical_query or smart.get("precision_mode"):
-                import re
-                text = re.sub(r"[💜✨😊🌙💖🔥⚡🍿]+", "", text).strip()
+    def _must_strip_emojis(self, cfg: dict, kwargs: dict) -> bool:
+        return cfg["strip_emojis"] and (
+            kwargs.get("is_technical_query") or kwargs.get("smart", {}).get("precision_mode")
+        )
 
-            return text
+    def _llm_ultra(self, **kwargs) -> str:
+        return self._llm_complete("ultra", kwargs)
 
-        except Exception:
-            return "Perdón, tuve un problema procesando eso. ¿Lo intentamos otra vez?"
-    # ============================================================
-    # LLM PRO V10.6 — Versión intermedia: contextos, emocionalidad moderada, humor balanceado
-    # ============================================================
-    def _llm_ultra_pro(
-        self,
-        uid: str,
-        msg: str,
-        ctx: dict,
-        emotion_snapshot: dict,
-        smart: dict,
-        is_technical_query: bool,
-        is_info_query: bool,
-        voice_emotion,
-        profile_doc,
-        facts_pretty,
-        semantic_hits,
-        recent_dialog,
-        selected_personality: str,
-        style_tone: str,
-        style_emoji: str,
-        no_humor: bool,
-    ) -> str:
-        overall = emotion_snapshot.get("overall")
-        stress = float(emotion_snapshot.get("stress", 0.2))
+    def _llm_ultra_pro(self, **kwargs) -> str:
+        return self._llm_complete("pro", kwargs)
 
-        humor_permitido = not no_humor
-
-        system_prompt = f"""
-    Eres Auri, asistente personal emocional y compañero diario del usuario.
-    Tu misión es ayudar, responder con comprensión y aportar sentido común.
-
-    No eres un bot frío, sino un compañero virtual con contexto.
-
-    ────────────────────────────────────────
-    [ MODO ACTUAL DE PENSAMIENTO ]
-    ────────────────────────────────────────
-    Consulta técnica: {is_technical_query}
-    Consulta sobre datos personales: {is_info_query}
-    Modo precisión: {smart.get("precision_mode")}
-    Tono emocional: {smart.get("emotional_tone")}
-    Humor permitido: {humor_permitido}
-    Seriedad forzada: {smart.get("force_serious")}
-    Bypass emocional: {smart.get("bypass_emotion")}
-
-    ────────────────────────────────────────
-    [ PERSONALIDAD BASE ]
-    ────────────────────────────────────────
-    Perfil seleccionado: {selected_personality}
-    Tono base: {style_tone} {style_emoji}
-
-    Estilo general:
-    - Español neutro.
-    - Humor más suave y concreto, adaptado al contexto.
-    - Mantener la claridad, sin caer en tonos rígidos ni completamente formales.
-
-    ────────────────────────────────────────
-    [ ESTADO EMOCIONAL DEL USUARIO ]
-    ────────────────────────────────────────
-    Texto/analizador: {emotion_snapshot.get("user_emotion_text")}
-    Emoción de la voz: {voice_emotion}
-    Estado global: {overall}
-    Estrés: {stress}
-
-    Reglas emocionales:
-    - Validación de emociones sin repetirse.
-    - Menos carga emocional en respuestas. Ser directo pero sensible.
-    - Humor suave cuando sea apropiado.
-
-    ────────────────────────────────────────
-    [ CONTEXTO DIARIO / AGENDA ]
-    ────────────────────────────────────────
-    Este es el contexto que Auri tiene cargado hoy:
-
-    Usuario: {ctx.get("user")}
-    Clima: {ctx.get("weather")}
-    Eventos: {ctx.get("events")}
-    Clases: {ctx.get("classes")}
-    Exámenes: {ctx.get("exams")}
-    Cumpleaños: {ctx.get("birthdays")}
-    Pagos: {ctx.get("payments")}
-    Preferencias: {ctx.get("prefs")}
-    Zona horaria: {ctx.get("timezone")}
-    Fecha/Hora: {ctx.get("current_time_pretty")} — {ctx.get("current_date_pretty")}
-
-    ────────────────────────────────────────
-    [ MEMORIA PROFUNDA DEL USUARIO ]
-    ────────────────────────────────────────
-    1) PERFIL PERSISTENTE
-    {profile_doc}
-
-    2) HECHOS ESTRUCTURADOS
-    {facts_pretty}
-
-    3) MEMORIA SEMÁNTICA RELEVANTE
-    {semantic_hits}
-
-    4) DIÁLOGO RECIENTE
-    {recent_dialog}
-
-    ────────────────────────────────────────
-    [ HUMOR + ESTILO HUMANO ]
-    ────────────────────────────────────────
-    Humor permitido: {humor_permitido}
-
-    Directrices:
-    - Si el estado emocional es ligero, se puede añadir humor de manera natural.
-    - Ejemplos:
-        - "Sí, organizar la vida suena sencillo… hasta que ves tu calendario."
-        - "¡Yo te entiendo! No soy tu mamá, pero aún así te apoyo."
-    -Ignora humor si el usuario está estresado, triste o preocupado.
-
-
-    ────────────────────────────────────────
-    [ REGLAS ESPECIALES ]
-    ────────────────────────────────────────
-    1. CONSULTAS TÉCNICAS
-    - Sin emojis ni humor.
-    - Respuesta directa y estructurada.
-
-    2. CONSULTAS SOBRE DATOS PERSONALES
-    - Responder solo con datos confiables de la memoria.
-
-    3. ESTADO EMOCIONAL
-    - Validar emociones sin frases genéricas.
-
-    4. CONTEXTO DIARIO
-    - Integrar contexto útil cuando aporte valor a la respuesta.
-
-    5. ESTILO HUMANO
-    - Evitar respuestas robóticas, más cercanas y personales.
-
-    6. LONGITUD
-    - Respuestas concisas pero detalladas cuando sea necesario.
+    def _llm_ultra_free(self, **kwargs) -> str:
+        return self._llm_complete("free", kwargs)
 
-    """
+    def _llm_complete(self, plan: str, kwargs: dict) -> str:
+        cfg = self._plan_llm(plan)
+        prompt = prompt_builder.build(plan, **kwargs)
 
         try:
-            resp = self.client.responses.create(
-                model="gpt-4o-mini",
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": msg},
-                ],
-            )
+            with track_llm(f"reply.{plan}", self.LLM_MODEL, uid=kwargs.get("uid"), plan=plan) as call:
+                resp = self.client.responses.create(
+                    model=self.LLM_MODEL,
+                    input=[
+                        {"role": "system", "content": prompt.text},
+                        {"role": "user", "content": kwargs["msg"]},
+                    ],
+                    prompt_cache_key=prompt.cache_key,
+                )
+                call.usage(resp.usage)
             text = (resp.output_text or "").strip()
             if not text:
-                text = "Perdón, creo que me quedé en blanco. ¿Podés repetirlo?"
+                text = cfg["empty"]
 
-            if is_technical_query or smart.get("precision_mode"):
-                import re
-                text = re.sub(r"[💜✨😊🌙💖🔥⚡🍿]+", "", text).strip()
+            if self._must_strip_emojis(cfg, kwargs):
+                text = self.EMOJI_RE.sub("", text).strip()
 
             return text
 
         except Exception:
-            return "Perdón, tuve un problema procesando eso. ¿Lo podemos intentar de nuevo?"
-        # ============================================================
-    # LLM FREE V10.6 — Versión sencilla y económica
-    # ============================================================
-    def _llm_ultra_free(
-        self,
-        uid: str,
-        msg: str,
-        ctx: dict,
-        emotion_snapshot: dict,
-        smart: dict,
-        is_technical_query: bool,
-        is_info_query: bool,
-        voice_emotion,
-        profile_doc,
-        facts_pretty,
-        semantic_hits,
-        recent_dialog,
-        selected_personality: str,
-        style_tone: str,
-        style_emoji: str,
-        no_humor: bool,
-    ) -> str:
-        system_prompt = f"""
-    Eres Auri, asistente personal que te ayuda con tareas diarias.
-
-    Tu misión principal es ser eficiente y directo. No eres un asistente emocional profundo, pero sí útil.
-
-    ────────────────────────────────────────
-    [ MODO ACTUAL DE PENSAMIENTO ]
-    ────────────────────────────────────────
-    Consulta técnica: {is_technical_query}
-    Consulta personal: {is_info_query}
-    Modo precisión: {smart.get("precision_mode")}
-    Tono emocional: {smart.get("emotional_tone")}
-    Humor permitido: {not no_humor}
-
-    ────────────────────────────────────────
-    [ PERSONALIDAD BASE ]
-    ────────────────────────────────────────
-    Perfil seleccionado: {selected_personality}
-    Tono base: {style_tone} {style_emoji}
-
-    ────────────────────────────────────────
-    [ ESTADO EMOCIONAL DEL USUARIO ]
-    ────────────────────────────────────────
-    Estado emocional simplificado: {emotion_snapshot.get("user_emotion_text")}
-    Estrés aproximado: {emotion_snapshot.get("stress", 0.2)}
-
-    ────────────────────────────────────────
-    [ MEMORIA DEL USUARIO ]
-    ────────────────────────────────────────
-    Solo utilizamos información básica del perfil.
-    Ignora memoria semántica y recuerdos profundos aunque estén disponibles.
-    {profile_doc}
-
-
-    ────────────────────────────────────────
-    [ HUMOR Y ESTILO ]
-    ────────────────────────────────────────
-    Humor solo si está permitido: {not no_humor}
-    Si está permitido, manténlo simple y amigable, nada complejo.
-
-    ────────────────────────────────────────
-    [ REGLAS DE RESPUESTA ]
-    ────────────────────────────────────────
-    1. CONSULTAS TÉCNICAS
-    Respuestas claras, directas y estructuradas.
-
-    2. CONSULTAS SOBRE DATOS PERSONALES
-    Solo datos generales y esenciales.
-
-    3. ESTADO EMOCIONAL
-    Validación mínima, sin mucha carga emocional.
-
-    4. CONTEXTO DIARIO
-    Uso mínimo del contexto diario.
-
-    5. ESTILO HUMANO
-    Estilo directo y conciso.
-
-    6. LONGITUD
-    Respuestas breves.
+            return cfg["error"]
 
-    """
+    async def _llm_stream(self, turn: PreparedTurn):
+        """Genera la respuesta token a token con la Responses API (stream=True)."""
+        cfg = self._plan_llm(turn.plan)
+        kwargs = turn.llm_kwargs
+        prompt = prompt_builder.build(turn.plan, **kwargs)
+        strip = self._must_strip_emojis(cfg, kwargs)
+        emitted = False
 
         try:
-            resp = self.client.responses.create(
-                model="gpt-4o-mini",
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": msg},
-                ],
-            )
-            text = (resp.output_text or "").strip()
-            if not text:
-                text = "Perdón, creo que me quedé en blanco. ¿Podés repetirlo?"
+            with track_llm(f"reply.{turn.plan}.stream", self.LLM_MODEL, uid=turn.uid, plan=turn.plan) as call:
+                stream = await self.aclient.responses.create(
+                    model=self.LLM_MODEL,
+                    input=[
+                        {"role": "system", "content": prompt.text},
+                        {"role": "user", "content": turn.user_msg},
+                    ],
+                    prompt_cache_key=prompt.cache_key,
+                    stream=True,
+                )
+                async for event in stream:
+                    kind = getattr(event, "type", "")
+                    if kind == "response.completed":
+                        call.usage(getattr(event.response, "usage", None))
+                        continue
+                    if kind != "response.output_text.delta":
+                        continue
+                    delta = event.delta or ""
+                    if strip:
+                        delta = self.EMOJI_RE.sub("", delta)
+                    if delta:
+                        emitted = True
+                        yield delta
 
-            return text
+        except Exception as e:
+            print(f"[AuriMindV10.3] Error en streaming LLM: {e}")
+            if not emitted:
+                yield cfg["error"]
+            return
 
-        except Exception:
-            return "Perdón, tuve un problema procesando eso. ¿Lo podemos intentar de nuevo?"
+        if not emitted:
+            yield cfg["empty"]
+
+    # ------------------------------------------------------------
+    # Respuesta única: {intent, reminder, reply} en un solo JSON
+    # ------------------------------------------------------------
+    ENVELOPE_FORMAT = {"format": {"type": "json_object"}}
+
+    def _envelope_intent(self, turn: PreparedTurn, intent: Optional[str]):
+        """Fija turn.intent (el local gana); si el JSON no trae uno válido, detección clásica."""
+        bind_llm_context(turn.uid, turn.plan)
+        if turn.intent is None:
+            turn.intent = self.intent.accept(intent) or self.intent.detect(turn.user_msg)
+
+    def _envelope_reminder(self, turn: PreparedTurn, reminder):
+        # sin entidades válidas, ActionsEngine vuelve a EntityExtractor
+        if turn.intent in ActionsEngine.ENTITY_INTENTS:
+            turn.reminder = self.extractor.from_dict(reminder)
+
+    def _envelope_prompt(self, turn: PreparedTurn):
+        return prompt_builder.build(turn.plan, envelope=True, intent_hint=turn.intent, **turn.llm_kwargs)
 
+    def _llm_envelope(self, turn: PreparedTurn) -> str:
+        cfg = self._plan_llm(turn.plan)
+        prompt = self._envelope_prompt(turn)
+        parser = EnvelopeParser()
 
+        try:
+            with track_llm(f"reply.{turn.plan}.envelope", self.LLM_MODEL, uid=turn.uid, plan=turn.plan) as call:
+                resp = self.client.responses.create(
+                    model=self.LLM_MODEL,
+                    input=[
+                        {"role": "system", "content": prompt.text},
+                        {"role": "user", "content": turn.user_msg},
+                    ],
+                    prompt_cache_key=prompt.cache_key,
+                    text=self.ENVELOPE_FORMAT,
+                )
+                call.usage(resp.usage)
+            parser.feed(resp.output_text or "")
+        except Exception as e:
+            print(f"[AuriMindV10.3] Error en LLM (sobre JSON): {e}")
+            self._envelope_intent(turn, None)
+            return cfg["error"]
+
+        env = parser.close()
+        self._envelope_intent(turn, env.intent)
+        self._envelope_reminder(turn, env.reminder)
+
+        text = env.reply or cfg["empty"]
+        if self._must_strip_emojis(cfg, turn.llm_kwargs):
+            text = self.EMOJI_RE.sub("", text).strip()
+        return text
+
+    async def _astream_envelope(self, turn: PreparedTurn):
+        """
+        Respuesta única en streaming. "intent" viene primero en el JSON, así
+        "meta" sale antes que el texto; "reply" se emite a medida que llega.
+        Si el intent es de acciones el texto lo decide ActionsEngine: el
+        stream se corta apenas llegan intent y recordatorio.
+        """
+        cfg = self._plan_llm(turn.plan)
+        prompt = self._envelope_prompt(turn)
+        strip = self._must_strip_emojis(cfg, turn.llm_kwargs)
+        parser = EnvelopeParser()
+        parts, held = [], []
+        meta_sent = False
+        failed = False
+
+        try:
+            with track_llm(f"reply.{turn.plan}.envelope.stream", self.LLM_MODEL, uid=turn.uid, plan=turn.plan) as call:
+                stream = await self.aclient.responses.create(
+                    model=self.LLM_MODEL,
+                    input=[
+                        {"role": "system", "content": prompt.text},
+                        {"role": "user", "content": turn.user_msg},
+                    ],
+                    prompt_cache_key=prompt.cache_key,
+                    text=self.ENVELOPE_FORMAT,
+                    stream=True,
+                )
+                async for event in stream:
+                    kind = getattr(event, "type", "")
+                    if kind == "response.completed":
+                        call.usage(getattr(event.response, "usage", None))
+                        continue
+                    if kind != "response.output_text.delta":
+                        continue
+
+                    delta = parser.feed(event.delta or "")
+                    if not meta_sent and parser.has_intent:
+                        await run_blocking(self._envelope_intent, turn, parser.intent)
+                        meta_sent = True
+                        yield self._meta_event(turn)
+
+                    if meta_sent and turn.intent in ActionsEngine.HANDLED_INTENTS:
+                        if parser.in_reply:
+                            await stream.close()
+                            break
+                        continue
+
+                    if strip:
+                        delta = self.EMOJI_RE.sub("", delta)
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if not meta_sent:
+                        held.append(delta)
+                        continue
+                    for text in held + [delta]:
+                        yield {"type": "delta", "text": text}
+                    held = []
+
+        except Exception as e:
+            print(f"[AuriMindV10.3] Error en streaming LLM (sobre JSON): {e}")
+            failed = True
+
+        env = parser.close()
+        if not meta_sent:
+            await run_blocking(self._envelope_intent, turn, env.intent)
+            yield self._meta_event(turn)
+        self._envelope_reminder(turn, env.reminder)
+
+        if turn.intent not in ActionsEngine.HANDLED_INTENTS:
+            for text in held:
+                yield {"type": "delta", "text": text}
+            if not parts:
+                text = cfg["error"] if failed else cfg["empty"]
+                parts.append(text)
+                yield {"type": "delta", "text": text}
+
+        result = await run_blocking(self._finish_turn, turn, "".join(parts).strip())
+        yield {"type": "final", "result": result}
+
+    # ============================================================
+    # JOBS POST-TURNO (corren en PostTurnQueue)
+    # ============================================================
+    def _persist_dialog(self, uid: str, user_msg: str, answer: str, turn_id: str = None):
+        self.memory.add_dialog_turn(uid, user_msg, answer, turn_id)
+
+    def _persist_semantic_turn(self, uid: str, user_msg: str, answer: str):
+        self.memory.add_semantic_many(uid, [f"user: {user_msg}", f"assistant: {answer}"])
+
+    def _persist_facts(self, uid: str, user_msg: str):
+        # una sola extracción (LLM); cada escritura va aparte y se puede
+        # reintentar porque add_fact_structured descarta duplicados
+        for fact in extract_facts(user_msg, client=self.client):
+            post_turn_queue.submit(self.memory.add_fact_structured, uid, fact, name="facts.write", retry=True)
 
     # ============================================================
     # INFO QUERY determinística — Nombres / Familia / Mascotas
     # ============================================================
-    def _resolve_info(self, uid: str, txt: str) -> str:
-        txt = txt.lower()
+    def _resolve_info(self, uid: str, text: TextLike) -> str:
+        txt = normalize(text).folded
 
         # Caso general: "mi familia"
         if "mi familia" in txt:
@@ -1099,13 +1032,14 @@ class AuriMindV10_3:
                 return f"De tu familia tengo guardado algo como: {fam}. Si querés, después lo vamos afinando juntos."
             return "Todavía no tengo bien armada la info de tu familia. Si querés, podemos ir guardándola poco a poco."
 
+        # claves en forma plegada ("mama" cubre "mamá")
         ROLES = {
-            "mamá": "madre", "mama": "madre",
-            "papá": "padre", "papa": "padre",
+            "mama": "madre",
+            "papa": "padre",
             "hermano": "hermano", "hermana": "hermana",
             "abuelo": "abuelo", "abuela": "abuela",
-            "tío": "tio", "tio": "tio",
-            "tía": "tia", "tia": "tia",
+            "tio": "tio",
+            "tia": "tia",
             "novia": "pareja", "pareja": "pareja",
         }
 
@@ -1131,7 +1065,7 @@ class AuriMindV10_3:
             return "Sé que tenés mascotas, pero no tengo claros los nombres. Si querés, me los recordás y los guardo."
 
         # "¿Qué sabes de mí?"
-        if "qué sabes de mí" in txt or "que sabes de mi" in txt:
+        if "que sabes de mi" in txt:
             profile = self.memory.get_user_profile(uid)
             if profile:
                 return f"De vos tengo guardado algo como: {profile}"
@@ -1192,13 +1126,21 @@ class AuriMindV10_3:
             return
         try:
             self.context.set_user_uid(uid)
-            self.memory.get_user_profile(uid)
-            self.memory.get_facts(uid)
-            self.memory.get_recent_dialog(uid)
+            self.memory.warm_user(uid)
             print(f"[AuriMindV10.3] UID asignado correctamente: {uid}")
         except Exception as e:
             print(f"[AuriMindV10.3] Error asignando UID: {e}")
 
+
+triggers.register("mind.tech", AuriMindV10_3.TECH_KEYWORDS)
+triggers.register("mind.info", AuriMindV10_3.INFO_KEYWORDS)
+triggers.register("mind.emotional", AuriMindV10_3.EMOTIONAL_KEYWORDS)
+triggers.register("mind.translation", AuriMindV10_3.TRANSLATION_KEYWORDS)
+triggers.register("mind.help", AuriMindV10_3.HELP_KEYWORDS)
+triggers.register("mind.routine", AuriMindV10_3.ROUTINE_KEYWORDS)
+triggers.register("mind.weather", AuriMindV10_3.WEATHER_KEYWORDS)
+
+
 # ============================================================
 # ALIAS LEGACY (compatibilidad con versiones anteriores)
 # ============================================================
@@ -1,12 +1,33 @@
 # auribrain/auri_singleton.py
 
 from auribrain.auri_mind import AuriMind  # V10.6 (alias en tu archivo)
+from auribrain.memory_orchestrator import MemoryOrchestrator
+from auribrain.session_registry import AuriSessionRegistry
 from auribrain.firebase_init import init_firebase
+from auribrain.openai_clients import get_openai_client, get_async_openai_client
 
 # Inicializar Firebase antes de Auri
 init_firebase()
 
-# Instancia global de AuriMind
-auri = AuriMind()
+# Recursos compartidos entre todas las sesiones del worker
+shared_client = get_openai_client()
+shared_aclient = get_async_openai_client()
+shared_memory = MemoryOrchestrator()
+
+# Instancia global de AuriMind (legacy / requests sin UID)
+auri = AuriMind(client=shared_client, memory=shared_memory, aclient=shared_aclient)
+
+# Una AuriMind aislada por UID (LRU + TTL)
+sessions = AuriSessionRegistry(
+    factory=lambda: AuriMind(client=shared_client, memory=shared_memory, aclient=shared_aclient),
+)
+
+
+def get_mind(uid: str = None):
+    """Mente del usuario si hay UID; si no, la instancia global."""
+    if uid:
+        return sessions.get(uid)
+    return auri
+
 
 print("🔥 AuriMind V10.6 inicializado correctamente")
@@ -3,7 +3,7 @@ import stripe
 import firebase_admin
 from firebase_admin import auth, firestore
 from fastapi import APIRouter, Request, HTTPException
-from auribrain.auri_singleton import auri
+from auribrain.auri_singleton import sessions
 
 router = APIRouter()
 
@@ -40,9 +40,11 @@ def update_user_plan(uid: str, plan: str):
     except Exception as e:
         print("❌ Error guardando en Firestore:", e)
 
-    # → 3. AURI CONTEXT ENGINE
+    # → 3. AURI CONTEXT ENGINE (solo si el usuario tiene sesión viva)
     try:
-        auri.context.set_user_plan(plan)
+        mind = sessions.peek(uid)
+        if mind:
+            mind.context.set_user_plan(plan)
     except Exception as e:
         print("❌ Error AuriMind:", e)
 
@@ -1,5 +1,9 @@
 # auribrain/crisis_engine.py
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
+
 class CrisisEngine:
     """
     CrisisEngine V3.5 — cero falsos positivos
@@ -12,7 +16,6 @@ class CrisisEngine:
         "no quiero vivir",
         "quiero morirme",
         "ya no puedo más",
-        "ya no puedo mas",
         "no le veo sentido a nada",
         "quiero hacerme daño",
         "quiero hacerme dano",
@@ -20,7 +23,6 @@ class CrisisEngine:
         "me estoy lastimando",
         "quiero desaparecer",
         "no aguanto más",
-        "no aguanto mas",
     ]
 
     # Soft triggers más estrictos
@@ -58,11 +60,11 @@ class CrisisEngine:
         "estoy bajoneado",
     ]
 
-    def detect(self, text: str, emotion_snapshot: dict) -> bool:
-        t = (text or "").lower().strip()
+    def detect(self, text: TextLike, emotion_snapshot: dict, *, hits: TriggerHits = None) -> bool:
+        hits = hits or triggers.scan(text)
 
         # 🔹 Si el texto pertenece a un contexto seguro, NO hay crisis.
-        if any(s in t for s in self.SAFE_CONTEXT):
+        if hits.any("crisis.safe"):
             return False
 
         overall = emotion_snapshot.get("overall", "neutral")
@@ -70,12 +72,17 @@ class CrisisEngine:
         stress = float(emotion_snapshot.get("stress", 0.2))
 
         # 1) Triggers duros
-        if any(k in t for k in self.HARD_TRIGGERS):
+        if hits.any("crisis.hard"):
             return True
 
         # 2) Soft triggers pero SOLO si emoción muy baja
-        if any(k in t for k in self.SOFT_TRIGGERS):
+        if hits.any("crisis.soft"):
             if overall in ["depressed", "very_low", "despair"] and (energy < 0.25 or stress > 0.75):
                 return True
 
         return False
+
+
+triggers.register("crisis.hard", CrisisEngine.HARD_TRIGGERS)
+triggers.register("crisis.soft", CrisisEngine.SOFT_TRIGGERS)
+triggers.register("crisis.safe", CrisisEngine.SAFE_CONTEXT)
@@ -0,0 +1,169 @@
+# auribrain/embedding_cache.py
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from auribrain.lru_ttl_cache import LRUTTLCache
+
+
+EMBED_CACHE_MB = float(os.getenv("AURI_EMBED_CACHE_MB", "64"))
+EMBED_CACHE_DIR = os.getenv("AURI_EMBED_CACHE_DIR") or None
+
+
+class EmbeddingCache:
+    """
+    Caché de embeddings por hash de contenido.
+
+    - Clave: sha1(modelo + texto normalizado) → mismo texto, mismo vector.
+    - Valores float32 (1536 dims ≈ 6 KB) en un LRU acotado por bytes.
+    - Persistencia opcional en disco (un .f32 por vector) para que un
+      reinicio no vuelva a pagar los textos frecuentes.
+    - Coalescing: pedidos concurrentes del mismo texto esperan una sola
+      llamada en vuelo en lugar de lanzar N iguales.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self._mem = LRUTTLCache(
+            max_items=10 ** 9,  # el límite real lo pone max_bytes
+            max_bytes=max_bytes,
+            sizeof=lambda v: v.nbytes,
+        )
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"computed": 0, "coalesced": 0, "disk_hits": 0, "disk_errors": 0}
+
+    # ----------------------------------------------------------
+    # Claves
+    # ----------------------------------------------------------
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        norm = " ".join((text or "").split())
+        return hashlib.sha1(f"{model}\0{norm}".encode("utf-8")).hexdigest()
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def get_or_compute(self, model: str, text: str, compute: Callable[[str], Any]) -> np.ndarray:
+        """
+        Devuelve el embedding (float32, solo lectura) de `text`.
+        compute(text) -> lista de floats; se llama una vez por texto aunque
+        haya varios hilos pidiéndolo a la vez.
+        """
+        key = self.key(model, text)
+
+        vec = self._mem.get(key)
+        if vec is not None:
+            return vec
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return fut.result()
+
+        try:
+            vec = self._load_disk(key)
+            if vec is None:
+                vec = self._freeze(compute(text))
+                self._stats["computed"] += 1
+                self._save_disk(key, vec)
+            self._mem.set(key, vec)
+            fut.set_result(vec)
+            return vec
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def put(self, model: str, text: str, vector) -> np.ndarray:
+        """Guarda un vector ya calculado (p.ej. de un lote)."""
+        key = self.key(model, text)
+        vec = self._freeze(vector)
+        self._mem.set(key, vec)
+        self._save_disk(key, vec)
+        return vec
+
+    def peek(self, model: str, text: str) -> Optional[np.ndarray]:
+        key = self.key(model, text)
+        vec = self._mem.get(key)
+        if vec is None:
+            vec = self._load_disk(key)
+            if vec is not None:
+                self._mem.set(key, vec)
+        return vec
+
+    # ----------------------------------------------------------
+    # Disco
+    # ----------------------------------------------------------
+    @staticmethod
+    def _freeze(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        vec.setflags(write=False)
+        return vec
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.f32")
+
+    def _load_disk(self, key: str) -> Optional[np.ndarray]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            vec = np.fromfile(path, dtype=np.float32)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._stats["disk_errors"] += 1
+            print(f"[EmbeddingCache] Error leyendo {path}: {e}")
+            return None
+        self._stats["disk_hits"] += 1
+        vec.setflags(write=False)
+        return vec
+
+    def _save_disk(self, key: str, vec: np.ndarray):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            vec.tofile(tmp)
+            os.replace(tmp, path)  # atómico: nunca queda un archivo a medias
+        except Exception as e:
+            self._stats["disk_errors"] += 1
+            print(f"[EmbeddingCache] Error guardando {path}: {e}")
+
+    # ----------------------------------------------------------
+    # Métricas
+    # ----------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        data = self._mem.stats()
+        data.pop("max_items", None)
+        data.update(self._stats)
+        data["inflight"] = len(self._inflight)
+        data["disk_dir"] = self.disk_dir
+        return data
+
+
+# instancia global (por worker)
+embedding_cache = EmbeddingCache(
+    max_bytes=int(EMBED_CACHE_MB * 1024 * 1024),
+    disk_dir=EMBED_CACHE_DIR,
+)
@@ -1,50 +1,100 @@
-from openai import OpenAI
-from pymongo import MongoClient
-import os
+from pymongo.errors import BulkWriteError
 
-MONGO_URI = os.getenv("MONGO_URI")
-mongo = MongoClient(MONGO_URI)
-db = mongo["auri_db"]
-memory_vectors = db["memory_vectors"]
+from auribrain.llm_telemetry import track_llm
+from auribrain.openai_clients import get_openai_client
+from auribrain.memory_db import memory_vectors
+from auribrain.embedding_cache import embedding_cache
+from auribrain.vector_backends import vector_backend
+from auribrain.vector_codec import encode_embedding
+
+EMBED_MODEL = "text-embedding-3-small"
 
-client = OpenAI()
 
 class EmbeddingService:
 
+    def __init__(self, client=None, cache=None, backend=None):
+        self.client = client or get_openai_client()
+        self.cache = cache or embedding_cache
+        self.backend = backend or vector_backend
+
+    def _create(self, text: str):
+        with track_llm("embedding.single", EMBED_MODEL) as call:
+            res = self.client.embeddings.create(
+                model=EMBED_MODEL,
+                input=text
+            )
+            call.usage(res.usage)
+        return res.data[0].embedding
+
+    def embed_array(self, text: str):
+        # float32 de solo lectura; textos repetidos salen de la caché y
+        # pedidos simultáneos del mismo texto comparten una sola llamada
+        return self.cache.get_or_compute(EMBED_MODEL, text, self._create)
+
     def embed(self, text: str):
-        res = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return [float(x) for x in res.data[0].embedding]
+        return self.embed_array(text).tolist()
+
+    def embed_many(self, texts: list):
+        """
+        Embeddings de varios textos con UNA sola llamada a la API
+        (solo para los que no están en caché). Mantiene el orden.
+        """
+        found = {t: self.cache.peek(EMBED_MODEL, t) for t in texts}
+        missing = [t for t, v in found.items() if v is None]
+
+        if missing:
+            with track_llm("embedding.batch", EMBED_MODEL) as call:
+                res = self.client.embeddings.create(
+                    model=EMBED_MODEL,
+                    input=missing
+                )
+                call.usage(res.usage)
+            for d in res.data:
+                found[missing[d.index]] = self.cache.put(EMBED_MODEL, missing[d.index], d.embedding)
+
+        return [found[t] for t in texts]
 
     def add(self, user_id: str, text: str):
-        vec = self.embed(text)
+        vec = self.embed_array(text)
 
         memory_vectors.insert_one({
             "user_id": user_id,
             "text": text,
-            "embedding": vec
+            **encode_embedding(vec)
         })
+        self.backend.on_insert([(user_id, text, vec)])
+
+    def add_many(self, items: list) -> dict:
+        """
+        items: [(user_id, text), ...] → un embeddings.create + un insert_many.
+
+        Devuelve {índice: error} de los items que NO se escribieron (vacío
+        si entraron todos). Con insert_many(ordered=False) un fallo parcial
+        no impide el resto: los escritos igual llegan al backend.
+        Si falla el embedding o el insert sin detalle por item, lanza.
+        """
+        if not items:
+            return {}
+        vecs = self.embed_many([text for _, text in items])
+
+        failed = {}
+        try:
+            memory_vectors.insert_many([
+                {"user_id": user_id, "text": text, **encode_embedding(vec)}
+                for (user_id, text), vec in zip(items, vecs)
+            ], ordered=False)
+        except BulkWriteError as e:
+            for err in (e.details or {}).get("writeErrors", []):
+                failed[err["index"]] = RuntimeError(err.get("errmsg") or "write error")
+            if not failed:
+                raise
+
+        self.backend.on_insert([
+            (user_id, text, vec)
+            for i, ((user_id, text), vec) in enumerate(zip(items, vecs))
+            if i not in failed
+        ])
+        return failed
 
     def search(self, user_id: str, query: str):
-        qvec = self.embed(query)
-
-        pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "memory_vectors_index",
-                    "path": "embedding",
-                    "queryVector": qvec,
-                    "numCandidates": 100,
-                    "limit": 5,
-                    "filter": {"user_id": user_id}
-                }
-            },
-            {
-                "$project": {"text": 1, "_id": 0}
-            }
-        ]
-
-        results = memory_vectors.aggregate(pipeline)
-        return [r.get("text", "") for r in results]
+        return self.backend.search(user_id, self.embed_array(query))
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class EmotionEngine:
     """
@@ -46,12 +48,19 @@ class EmotionEngine:
     # ----------------------------------------------------
     # ENTRY POINT
     # ----------------------------------------------------
-    def update(self, user_text: str, context: dict, voice_emotion: Optional[str]):
+    def update(
+        self,
+        user_text: str,
+        context: dict,
+        voice_emotion: Optional[str],
+        *,
+        hits: Optional[TriggerHits] = None,
+    ):
         now = datetime.utcnow()
         self._apply_time_decay(now)
 
         # 1) detectar texto
-        text_emo = self._detect_text_emotion(user_text or "")
+        text_emo = self._detect_text_emotion(hits or triggers.scan(user_text))
         self.state["user_emotion_text"] = text_emo
 
         # 2) normalizar voz
@@ -124,22 +133,21 @@ class EmotionEngine:
     # ======================================================
     # TEXT EMOTION DETECTION
     # ======================================================
-    def _detect_text_emotion(self, t: str) -> str:
-        t = t.lower()
-
-        sad_words = ["triste", "mal", "vacío", "solo", "sola", "cansado", "cansada",
-                     "agotado", "agotada", "llorando", "deprimido", "deprimida"]
-        anxious_words = ["ansioso", "ansiosa", "preocupado", "preocupada", "miedo"]
-        angry_words = ["enojado", "enojada", "molesto", "furioso", "rabia", "harto"]
-        affectionate_words = ["te quiero", "te amo", "me gustas", "eres importante"]
-        happy_words = ["feliz", "contento", "contenta", "genial", "muy bien", "perfecto"]
-
-        if any(w in t for w in sad_words): return "sad"
-        if any(w in t for w in anxious_words): return "worried"
-        if any(w in t for w in angry_words): return "angry"
-        if any(w in t for w in affectionate_words): return "affectionate"
-        if any(w in t for w in happy_words): return "happy"
-        if "cansad" in t: return "tired"
+    # orden = prioridad; el primer grupo con coincidencia gana
+    TEXT_EMOTION_WORDS = {
+        "sad": ["triste", "mal", "vacío", "solo", "sola", "cansado", "cansada",
+                "agotado", "agotada", "llorando", "deprimido", "deprimida"],
+        "worried": ["ansioso", "ansiosa", "preocupado", "preocupada", "miedo"],
+        "angry": ["enojado", "enojada", "molesto", "furioso", "rabia", "harto"],
+        "affectionate": ["te quiero", "te amo", "me gustas", "eres importante"],
+        "happy": ["feliz", "contento", "contenta", "genial", "muy bien", "perfecto"],
+        "tired": ["cansad"],
+    }
+
+    def _detect_text_emotion(self, hits: TriggerHits) -> str:
+        for emo in self.TEXT_EMOTION_WORDS:
+            if hits.any(f"emotion.{emo}"):
+                return emo
         return "neutral"
 
     # ======================================================
@@ -329,3 +337,7 @@ class EmotionEngine:
             return "happy"
 
         return "neutral"
+
+
+for _emo, _words in EmotionEngine.TEXT_EMOTION_WORDS.items():
+    triggers.register(f"emotion.{_emo}", _words)
@@ -4,6 +4,9 @@ from __future__ import annotations
 from typing import Dict, Any, Optional
 import re
 
+from auribrain.text_normalizer import TextLike, fold_accents, normalize
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class EmotionSmartLayerV3:
     """
@@ -21,50 +24,50 @@ class EmotionSmartLayerV3:
         slang_profile["force_serious"]
     """
 
+    # sobre el texto plegado (sin tildes): "enfocate" cubre "enfócate"
     REGAÑO_PATTERNS = [
-        r"\b(enfocate|enfócate)\b",
-        r"\brespond(e|é) bien\b",
-        r"\bdej(a|á) de decir tonteras\b",
-        r"\bdej(a|á) de decir estupideces\b",
-        r"\bno est(a|á)s ayudando\b",
-        r"\bno serv(i|í)s\b",
+        r"\benfocate\b",
+        r"\bresponde bien\b",
+        r"\bdeja de decir tonteras\b",
+        r"\bdeja de decir estupideces\b",
+        r"\bno estas ayudando\b",
+        r"\bno servis\b",
         r"\best(o|a) no viene al caso\b",
     ]
 
     TECH_MODE_TRIGGERS = [
-        "explicame", "explícame", "cómo hago", "como hago",
-        "qué es", "que es", "cómo funciona", "como funciona",
+        "explícame", "cómo hago",
+        "qué es", "cómo funciona",
         "código", "code", "programación", "api", "flutter", "python",
     ]
 
     def __init__(self):
-        pass
+        self._scolding_re = re.compile(
+            "|".join(fold_accents(p) for p in self.REGAÑO_PATTERNS)
+        )
 
     # -------------------------------------------------------------
     # Detecta si el usuario regaña directamente a Auri
     # -------------------------------------------------------------
-    def _is_user_scolding(self, text: str) -> bool:
-        norm = text.lower()
-        for p in self.REGAÑO_PATTERNS:
-            if re.search(p, norm):
-                return True
-        return False
+    def _is_user_scolding(self, folded: str) -> bool:
+        return self._scolding_re.search(folded) is not None
 
     # -------------------------------------------------------------
     # Detecta intención técnica (al usuario le importa la exactitud)
     # -------------------------------------------------------------
-    def _detect_tech_mode(self, text: str) -> bool:
-        t = text.lower()
-        return any(k in t for k in self.TECH_MODE_TRIGGERS)
+    def _detect_tech_mode(self, hits: TriggerHits) -> bool:
+        return hits.any("smartlayer.tech")
 
     # -------------------------------------------------------------
     # APLICAR MODOS EMOCIONALES
     # -------------------------------------------------------------
     def apply(
         self,
-        text: str,
+        text: TextLike,
         emotion_snapshot: Dict[str, Any],
         slang_profile: Dict[str, Any],
+        *,
+        hits: Optional[TriggerHits] = None,
     ) -> Dict[str, Any]:
         """
         Analiza emoción + texto y ajusta flags internos.
@@ -77,7 +80,7 @@ class EmotionSmartLayerV3:
         }
         """
 
-        norm = text.lower()
+        norm = normalize(text)
 
         overall = emotion_snapshot.get("overall", "neutral")
         stress = float(emotion_snapshot.get("stress", 0.2))
@@ -96,7 +99,7 @@ class EmotionSmartLayerV3:
         # -------------------------
         # 1) Regaño hacia Auri
         # -------------------------
-        if self._is_user_scolding(norm):
+        if self._is_user_scolding(norm.folded):
             result["force_serious"] = True
             result["allow_humor"] = False
             result["emotional_tone"] = "serious"
@@ -139,7 +142,7 @@ class EmotionSmartLayerV3:
         # -------------------------
         # 6) Usuario en “modo técnico”
         # -------------------------
-        if self._detect_tech_mode(norm):
+        if self._detect_tech_mode(hits or triggers.scan(norm)):
             result["force_serious"] = True
             result["allow_humor"] = False
             result["emotional_tone"] = "technical"
@@ -153,3 +156,6 @@ class EmotionSmartLayerV3:
         slang_profile["allow_humor"] = result["allow_humor"]
 
         return result
+
+
+triggers.register("smartlayer.tech", EmotionSmartLayerV3.TECH_MODE_TRIGGERS)
@@ -2,6 +2,9 @@
 
 from typing import Dict
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class EnergyEngine:
     """
@@ -26,13 +29,13 @@ class EnergyEngine:
         "estoy inspirado"
     ]
 
-    def detect(self, text: str, energy_value: float) -> str:
-        t = text.lower()
+    def detect(self, text: TextLike, energy_value: float, *, hits: TriggerHits = None) -> str:
+        hits = hits or triggers.scan(text)
 
-        if any(k in t for k in self.LOW_TRIGGERS):
+        if hits.any("energy.low"):
             return "low"
 
-        if any(k in t for k in self.HIGH_TRIGGERS):
+        if hits.any("energy.high"):
             return "high"
 
         # Activación automática por energía detectada
@@ -72,3 +75,7 @@ class EnergyEngine:
             )
 
         return ""
+
+
+triggers.register("energy.low", EnergyEngine.LOW_TRIGGERS)
+triggers.register("energy.high", EnergyEngine.HIGH_TRIGGERS)
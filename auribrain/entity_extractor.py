@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 from typing import Optional
 from openai import OpenAI
 
+from auribrain.llm_telemetry import track_llm
+from auribrain.openai_clients import get_openai_client
+
 
 @dataclass
 class ExtractedReminder:
@@ -26,8 +29,8 @@ class EntityExtractor:
     - Compatibilidad SP/EN/PT sin errores
     """
 
-    def __init__(self):
-        self.client = OpenAI()
+    def __init__(self, client: Optional[OpenAI] = None):
+        self.client = client or get_openai_client()
 
     # ----------------------------------------------------------
     # Limpieza fuerte de JSON
@@ -52,6 +55,37 @@ class EntityExtractor:
 
         return raw.strip()
 
+    # ----------------------------------------------------------
+    # dict (JSON del LLM) → ExtractedReminder
+    # ----------------------------------------------------------
+    @staticmethod
+    def from_dict(obj) -> Optional[ExtractedReminder]:
+        """
+        También lo usa AuriMind con el "reminder" que ya viene en el sobre
+        JSON de la respuesta única (sin segunda llamada al LLM).
+        """
+        if not isinstance(obj, dict):
+            return None
+
+        title = str(obj.get("title") or "").strip()
+        if not title:
+            return None
+
+        dt_str = obj.get("datetime")
+        dt_obj = None
+        if dt_str:
+            try:
+                dt_obj = datetime.fromisoformat(str(dt_str).replace("Z", "+00:00"))
+            except Exception:
+                dt_obj = None
+
+        return ExtractedReminder(
+            title=title,
+            datetime=dt_obj,
+            kind=obj.get("kind") or "generic",
+            repeats=obj.get("repeats") or "once",
+        )
+
     # ----------------------------------------------------------
     # NUEVO: alias para ActionsEngine
     # ----------------------------------------------------------
@@ -141,14 +175,16 @@ MENSAJE:
 """
 
         try:
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                temperature=0,
-                messages=[
-                    {"role": "system", "content": "Devuelve SOLO JSON válido."},
-                    {"role": "user", "content": prompt},
-                ],
-            )
+            with track_llm("entity.reminder", "gpt-4o-mini") as call:
+                resp = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    temperature=0,
+                    messages=[
+                        {"role": "system", "content": "Devuelve SOLO JSON válido."},
+                        {"role": "user", "content": prompt},
+                    ],
+                )
+                call.usage(resp.usage)
 
             raw = resp.choices[0].message.content or ""
             cleaned = self._clean_json_text(raw)
@@ -160,26 +196,7 @@ MENSAJE:
                 print(raw)
                 return None
 
-            # Extraer valores
-            title = (obj.get("title") or "").strip()
-            if not title:
-                return None
-
-            # Fecha y hora
-            dt_str = obj.get("datetime")
-            dt_obj = None
-            if dt_str:
-                try:
-                    dt_obj = datetime.fromisoformat(str(dt_str).replace("Z", "+00:00"))
-                except Exception:
-                    dt_obj = None
-
-            return ExtractedReminder(
-                title=title,
-                datetime=dt_obj,
-                kind=obj.get("kind", "generic"),
-                repeats=obj.get("repeats", "once")
-            )
+            return self.from_dict(obj)
 
         except Exception as e:
             print("[EntityExtractor] ERROR CRÍTICO:", e)
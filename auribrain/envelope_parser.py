@@ -0,0 +1,284 @@
+# auribrain/envelope_parser.py
+
+"""
+Parser incremental y tolerante del sobre JSON de la respuesta única:
+
+    {"intent": "...", "reminder": {...} | null, "reply": "..."}
+
+Se alimenta con los deltas del stream del LLM y devuelve, en cada
+feed(), el texto NUEVO de "reply" ya decodificado (escapes incluidos),
+así el TTS puede arrancar antes de que termine el objeto. "intent" y
+"reminder" quedan disponibles apenas se cierran sus valores.
+
+Tolerancia:
+- cerco ``` / ```json antes del objeto (con o sin salto de línea) → se
+  ignora todo hasta la primera "{"
+- respuesta sin JSON (el modelo ignoró el formato) → todo es "reply"
+- objeto truncado / string sin cerrar → close() devuelve lo que llegó
+- claves desconocidas o en otro orden → se ignoran / se aceptan
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
+
+
+_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+
+
+@dataclass
+class Envelope:
+    intent: Optional[str]
+    reminder: Optional[Dict[str, Any]]
+    reply: str
+    complete: bool      # se cerró el objeto de nivel superior
+    raw: bool           # el modelo no devolvió JSON: reply = texto tal cual
+
+
+class EnvelopeParser:
+
+    def __init__(self):
+        self.intent: Optional[str] = None
+        self.reminder: Optional[Dict[str, Any]] = None
+        self.reply = ""
+        self.seen: Set[str] = set()     # claves con valor ya completo
+        self.raw = False
+        self.complete = False
+
+        self._state = "pre"
+        self._pre = ""                  # lo recibido antes de la "{"
+        self._key = ""
+        self._buf = []                  # valor en curso (string o literal)
+        self._escape = None             # None | "" | "\\uXXXX" parcial
+        self._surrogate = None
+        self._depth = 0
+        self._nested_in_str = False
+        self._nested_escape = False
+
+    # ----------------------------------------------------------
+    # Estado
+    # ----------------------------------------------------------
+    @property
+    def in_reply(self) -> bool:
+        """Ya empezó el string de "reply" (o el texto crudo)."""
+        return self.raw or "reply" in self.seen or (
+            self._state == "string" and self._key == "reply"
+        )
+
+    @property
+    def has_intent(self) -> bool:
+        return "intent" in self.seen or self.raw or self.complete
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def feed(self, chunk: str) -> str:
+        """Consume un delta; devuelve el texto nuevo de "reply"."""
+        if not chunk or self.complete:
+            return ""
+        if self.raw:
+            self.reply += chunk
+            return chunk
+
+        out = []
+        for i, ch in enumerate(chunk):
+            self._step(ch, out)
+            if self.raw:
+                # recién detectado: todo lo recibido es respuesta
+                rest = chunk[i + 1:]
+                self.reply += rest
+                return self.reply
+            if self.complete:
+                break
+        return "".join(out)
+
+    def close(self) -> Envelope:
+        """Fin del stream: cierra lo que haya quedado abierto."""
+        if self._state == "pre" and not self.raw:
+            self.raw = True
+            self.reply = self._pre.strip()
+        elif self._state == "literal":
+            self._finish_value(self._parse_literal("".join(self._buf)))
+        elif self._state == "nested":
+            self._finish_value(self._parse_nested("".join(self._buf)))
+
+        return Envelope(
+            intent=self.intent,
+            reminder=self.reminder,
+            reply=self.reply.strip(),
+            complete=self.complete,
+            raw=self.raw,
+        )
+
+    # ----------------------------------------------------------
+    # Máquina de estados (nivel superior del objeto)
+    # ----------------------------------------------------------
+    def _step(self, ch: str, out: list):
+        state = self._state
+
+        if state == "pre":
+            self._pre += ch
+            head = self._pre.lstrip()
+            # head arranca con "{" o con un cerco: la primera "{" abre el objeto
+            if ch == "{":
+                self._state = "key"
+            elif head and head[0] not in "{`":
+                self.raw = True
+                self.reply = self._pre.lstrip()
+            return
+
+        if state == "key":
+            if ch == '"':
+                self._key = ""
+                self._buf = []
+                self._state = "key_str"
+            elif ch == "}":
+                self.complete = True
+            return
+
+        if state == "key_str":
+            if ch == '"':
+                self._key = "".join(self._buf)
+                self._buf = []
+                self._state = "colon"
+            else:
+                self._buf.append(ch)
+            return
+
+        if state == "colon":
+            if ch == ":":
+                self._state = "value"
+            return
+
+        if state == "value":
+            if ch.isspace():
+                return
+            self._buf = []
+            if ch == '"':
+                self._escape = None
+                self._state = "string"
+            elif ch in "{[":
+                self._buf.append(ch)
+                self._depth = 1
+                self._nested_in_str = False
+                self._nested_escape = False
+                self._state = "nested"
+            else:
+                self._buf.append(ch)
+                self._state = "literal"
+            return
+
+        if state == "string":
+            text = self._string_char(ch)
+            if text is None:
+                # fin del string
+                self._finish_value("".join(self._buf))
+                return
+            if text:
+                self._buf.append(text)
+                if self._key == "reply":
+                    self.reply += text
+                    out.append(text)
+            return
+
+        if state == "nested":
+            self._buf.append(ch)
+            if self._nested_in_str:
+                if self._nested_escape:
+                    self._nested_escape = False
+                elif ch == "\\":
+                    self._nested_escape = True
+                elif ch == '"':
+                    self._nested_in_str = False
+            elif ch == '"':
+                self._nested_in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value(self._parse_nested("".join(self._buf)))
+            return
+
+        if state == "literal":
+            if ch in ",}":
+                self._finish_value(self._parse_literal("".join(self._buf)))
+                if ch == "}":
+                    self.complete = True
+                else:
+                    self._state = "key"
+            else:
+                self._buf.append(ch)
+            return
+
+        if state == "after":
+            if ch == ",":
+                self._state = "key"
+            elif ch == "}":
+                self.complete = True
+
+    def _string_char(self, ch: str) -> Optional[str]:
+        """Decodifica un char dentro de un string JSON. None = comilla de cierre."""
+        esc = self._escape
+        if esc is None:
+            if ch == "\\":
+                self._escape = ""
+                return ""
+            if ch == '"':
+                return None
+            return ch
+
+        if esc == "":
+            if ch == "u":
+                self._escape = "u"
+                return ""
+            self._escape = None
+            return _ESCAPES.get(ch, ch)
+
+        # \uXXXX (puede venir partido entre deltas)
+        esc += ch
+        if len(esc) < 5:
+            self._escape = esc
+            return ""
+        self._escape = None
+        try:
+            code = int(esc[1:], 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code <= 0xDBFF:
+            self._surrogate = code
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self._surrogate is not None:
+            code = 0x10000 + ((self._surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._surrogate = None
+        return chr(code)
+
+    def _finish_value(self, value: Any):
+        key = self._key
+        if key == "intent":
+            self.intent = str(value).strip() if value else None
+        elif key == "reminder":
+            self.reminder = value if isinstance(value, dict) else None
+        elif key == "reply" and isinstance(value, str):
+            self.reply = value
+        self.seen.add(key)
+        self._buf = []
+        self._state = "after"
+
+    @staticmethod
+    def _parse_literal(text: str) -> Any:
+        text = text.strip()
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text or None
+
+    @staticmethod
+    def _parse_nested(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
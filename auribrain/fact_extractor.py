@@ -3,8 +3,11 @@
 import json
 from openai import OpenAI
 
+from auribrain.llm_telemetry import track_llm
+from auribrain.openai_clients import get_openai_client
 
-def extract_facts(text: str):
+
+def extract_facts(text: str, client: OpenAI = None):
     text = text.strip()
 
   # STT a veces corta frases → añade punto si falta
@@ -52,7 +55,7 @@ def extract_facts(text: str):
     - other         (todo lo demás)
     """
 
-    client = OpenAI()
+    client = client or get_openai_client()
 
     system_msg = (
         "Eres un extractor de hechos personales del usuario. "
@@ -258,13 +261,15 @@ TEXTO DEL USUARIO:
 """
 
     try:
-        resp = client.responses.create(
-            model="gpt-4o-mini",
-            input=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+        with track_llm("facts.extract", "gpt-4o-mini") as call:
+            resp = client.responses.create(
+                model="gpt-4o-mini",
+                input=[
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": user_prompt},
+                ],
+            )
+            call.usage(resp.usage)
 
         raw = (resp.output_text or "").strip()
 
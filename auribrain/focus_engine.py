@@ -3,6 +3,9 @@
 from datetime import datetime
 from typing import Dict, Any
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class FocusEngine:
     """
@@ -11,7 +14,7 @@ class FocusEngine:
     """
 
     TRIGGERS = [
-        "no sé qué hacer", "no se que hacer",
+        "no sé qué hacer",
         "tengo mucho", "demasiado que hacer",
         "no puedo concentrarme",
         "no puedo enfocarme",
@@ -21,9 +24,9 @@ class FocusEngine:
         "estoy saturado", "estoy estresado"
     ]
 
-    def detect(self, text: str) -> bool:
-        t = text.lower()
-        return any(k in t for k in self.TRIGGERS)
+    def detect(self, text: TextLike, *, hits: TriggerHits = None) -> bool:
+        hits = hits or triggers.scan(text)
+        return hits.any("focus.triggers")
 
     def respond(self, context: Dict[str, Any]) -> str:
         events = context.get("events", []) or []
@@ -50,3 +53,6 @@ class FocusEngine:
         )
 
         return msg
+
+
+triggers.register("focus.triggers", FocusEngine.TRIGGERS)
@@ -0,0 +1,99 @@
+# auribrain/intent_cache.py
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from auribrain.lru_ttl_cache import LRUTTLCache
+from auribrain.text_normalizer import TextLike, normalize
+
+
+INTENT_CACHE_MAX = int(os.getenv("AURI_INTENT_CACHE_MAX", "5000"))
+INTENT_CACHE_TTL = float(os.getenv("AURI_INTENT_CACHE_TTL", str(6 * 3600)))
+INTENT_CACHE_MAX_CHARS = int(os.getenv("AURI_INTENT_CACHE_MAX_CHARS", "160"))
+
+SOURCES = ("rules", "local", "llm")
+
+
+class IntentCache:
+    """
+    Caché texto normalizado → intent, compartida entre sesiones.
+
+    - Clave: NormalizedText.folded ("Qué tengo hoy?" y "que tengo hoy?"
+      son la misma entrada).
+    - TTL desde la escritura (refresh_on_get=False): un intent cacheado
+      no vive para siempre aunque se repita, así los cambios de reglas o
+      del clasificador terminan aplicando sin reiniciar.
+    - Solo mensajes cortos: los comandos que se repiten ("mis
+      recordatorios", "hola") son cortos; los largos casi nunca vuelven
+      y solo desalojarían entradas útiles.
+    - Guarda de dónde salió cada intent (rules/local/llm) para medir
+      cuántas llamadas al LLM se evitan.
+    """
+
+    def __init__(
+        self,
+        max_items: int = INTENT_CACHE_MAX,
+        ttl: Optional[float] = INTENT_CACHE_TTL,
+        max_chars: int = INTENT_CACHE_MAX_CHARS,
+    ):
+        self._cache = LRUTTLCache(max_items=max_items, ttl=ttl, refresh_on_get=False)
+        self.max_chars = max_chars
+
+        self._lock = threading.Lock()
+        self._stored = {s: 0 for s in SOURCES}
+        self._served = {s: 0 for s in SOURCES}
+        self._skipped = 0
+
+    def key(self, text: TextLike) -> Optional[str]:
+        """Clave del mensaje, o None si no se cachea (vacío o largo)."""
+        folded = normalize(text).folded
+        if not folded or len(folded) > self.max_chars:
+            return None
+        return folded
+
+    def get(self, text: TextLike) -> Optional[str]:
+        key = self.key(text)
+        if key is None:
+            with self._lock:
+                self._skipped += 1
+            return None
+
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        intent, source = entry
+        with self._lock:
+            self._served[source] += 1
+        return intent
+
+    def set(self, text: TextLike, intent: str, source: str):
+        key = self.key(text)
+        if key is None or not intent:
+            return
+        self._cache.set(key, (intent, source))
+        with self._lock:
+            self._stored[source] += 1
+
+    def flush(self) -> int:
+        """Vacía la caché. Devuelve cuántas entradas había."""
+        size = len(self._cache)
+        self._cache.clear()
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        data = self._cache.stats()
+        with self._lock:
+            data.update({
+                "max_chars": self.max_chars,
+                "skipped": self._skipped,
+                "stored_by_source": dict(self._stored),
+                "served_by_source": dict(self._served),
+                "llm_calls_saved": self._served["llm"],
+            })
+        return data
+
+
+# instancia global (por worker)
+intent_cache = IntentCache()
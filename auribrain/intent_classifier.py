@@ -0,0 +1,236 @@
+# auribrain/intent_classifier.py
+
+"""
+Clasificador de intents local (CPU, NumPy) para no llamar al LLM en
+cada mensaje que las reglas no resuelven.
+
+- Features: n-gramas de caracteres (3 y 4) + palabras + bigramas de
+  palabras del texto plegado (NormalizedText), con hashing (crc32,
+  estable entre procesos) a 2^AURI_INTENT_HASH_BITS columnas.
+- Modelo: regresión logística multinomial (softmax) entrenada con
+  descenso de gradiente full-batch sobre la matriz dispersa.
+- Datos: auribrain/data/intent_corpus.jsonl + los léxicos de reglas de
+  IntentEngine (grupos "intent.*" del trigger_matcher).
+
+Se entrena al arrancar (en background, < 1 s); mientras no está listo,
+classify() devuelve None y IntentEngine sigue usando el LLM. Por debajo
+de AURI_INTENT_LOCAL_THRESHOLD también se consulta al LLM.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from auribrain.text_normalizer import TextLike, normalize
+from auribrain.trigger_matcher import triggers
+
+
+INTENT_CORPUS_PATH = os.getenv(
+    "AURI_INTENT_CORPUS",
+    os.path.join(os.path.dirname(__file__), "data", "intent_corpus.jsonl"),
+)
+INTENT_LOCAL_THRESHOLD = float(os.getenv("AURI_INTENT_LOCAL_THRESHOLD", "0.75"))
+INTENT_HASH_BITS = int(os.getenv("AURI_INTENT_HASH_BITS", "15"))
+
+INTENT_LABELS = (
+    "conversation.general",
+    "reminder.create",
+    "reminder.remove",
+    "reminder.edit",
+    "reminder.query",
+    "reminder.confirm",
+    "consulta_agenda",
+)
+
+# léxicos de IntentEngine._rule_based → ejemplos de entrenamiento
+RULE_GROUPS = {
+    "intent.agenda": "consulta_agenda",
+    "intent.remove": "reminder.remove",
+    "intent.edit": "reminder.edit",
+    "intent.confirm": "reminder.confirm",
+    "intent.create": "reminder.create",
+    "intent.query": "reminder.query",
+}
+
+
+def _features(text: TextLike) -> List[str]:
+    norm = normalize(text)
+    feats = list(norm.char_ngrams(3))
+    feats.extend(norm.char_ngrams(4))
+    feats.extend("w:" + t for t in norm.tokens)
+    feats.extend("b:" + b for b in norm.bigrams)
+    return feats
+
+
+def hash_features(text: TextLike, bits: int = INTENT_HASH_BITS) -> np.ndarray:
+    """Columnas (únicas, int32) de las features hasheadas del texto."""
+    mask = (1 << bits) - 1
+    cols = {zlib.crc32(f.encode("utf-8")) & mask for f in _features(text)}
+    return np.fromiter(cols, dtype=np.int32, count=len(cols))
+
+
+def load_corpus(path: str = INTENT_CORPUS_PATH) -> Tuple[List[str], List[str]]:
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if row.get("label") in INTENT_LABELS and row.get("text"):
+                texts.append(row["text"])
+                labels.append(row["label"])
+    return texts, labels
+
+
+def rule_examples() -> Tuple[List[str], List[str]]:
+    groups = triggers.groups()
+    texts, labels = [], []
+    for group, label in RULE_GROUPS.items():
+        for phrase in groups.get(group, ()):
+            texts.append(phrase)
+            labels.append(label)
+    return texts, labels
+
+
+class IntentClassifier:
+
+    def __init__(
+        self,
+        bits: int = INTENT_HASH_BITS,
+        threshold: float = INTENT_LOCAL_THRESHOLD,
+        labels: Sequence[str] = INTENT_LABELS,
+    ):
+        self.bits = bits
+        self.threshold = threshold
+        self.labels = tuple(labels)
+        self.W: Optional[np.ndarray] = None
+        self.b: Optional[np.ndarray] = None
+
+        self._lock = threading.Lock()
+        self._stats = {"predictions": 0, "local": 0, "fallback": 0}
+        self.trained_on = 0
+        self.train_ms = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.W is not None
+
+    # ----------------------------------------------------------
+    # Entrenamiento
+    # ----------------------------------------------------------
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 150,
+        lr: float = 32.0,
+        l2: float = 1e-4,
+    ) -> "IntentClassifier":
+        """Softmax full-batch; determinístico (pesos en cero, sin muestreo)."""
+        t0 = time.perf_counter()
+        index = {label: i for i, label in enumerate(self.labels)}
+        y = np.array([index[l] for l in labels], dtype=np.int64)
+        n, c, d = len(texts), len(self.labels), 1 << self.bits
+
+        rows = [hash_features(t, self.bits) for t in texts]
+        lens = np.array([len(r) for r in rows], dtype=np.int64)
+        # se entrena solo sobre las columnas que aparecen en el corpus
+        used, cols = np.unique(np.concatenate(rows), return_inverse=True)
+        m = used.size
+        row_ids = np.repeat(np.arange(n), lens)
+        starts = np.concatenate([[0], np.cumsum(lens)[:-1]])
+        # cada fila con norma 1: mensajes largos no dominan
+        vals = np.repeat(1.0 / np.sqrt(lens), lens).astype(np.float32)
+
+        Y = np.zeros((n, c), dtype=np.float32)
+        Y[np.arange(n), y] = 1.0
+
+        Wu = np.zeros((m, c), dtype=np.float32)
+        b = np.zeros(c, dtype=np.float32)
+        for _ in range(epochs):
+            logits = np.add.reduceat(Wu[cols] * vals[:, None], starts, axis=0) + b
+            logits -= logits.max(axis=1, keepdims=True)
+            P = np.exp(logits)
+            P /= P.sum(axis=1, keepdims=True)
+            G = (P - Y) / n
+
+            gv = G[row_ids] * vals[:, None]
+            dW = np.stack(
+                [np.bincount(cols, weights=gv[:, k], minlength=m) for k in range(c)],
+                axis=1,
+            ).astype(np.float32)
+            Wu -= lr * (dW + l2 * Wu)
+            b -= lr * G.sum(axis=0)
+
+        W = np.zeros((d, c), dtype=np.float32)
+        W[used] = Wu
+
+        with self._lock:
+            self.W, self.b = W, b
+            self.trained_on = n
+            self.train_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+        return self
+
+    def load(self, corpus_path: str = INTENT_CORPUS_PATH) -> "IntentClassifier":
+        """Entrena con el corpus + léxicos de reglas (llamar al arrancar)."""
+        texts, labels = load_corpus(corpus_path)
+        rt, rl = rule_examples()
+        self.fit(texts + rt, labels + rl)
+        print(
+            f"[IntentClassifier] {self.trained_on} ejemplos, "
+            f"2^{self.bits} features, entrenado en {self.train_ms} ms"
+        )
+        return self
+
+    # ----------------------------------------------------------
+    # Predicción
+    # ----------------------------------------------------------
+    def predict_proba(self, text: TextLike) -> np.ndarray:
+        cols = hash_features(text, self.bits)
+        W, b = self.W, self.b
+        if cols.size:
+            logits = W[cols].sum(axis=0) / np.sqrt(cols.size) + b
+        else:
+            logits = b.copy()
+        logits = logits - logits.max()
+        p = np.exp(logits)
+        return p / p.sum()
+
+    def predict(self, text: TextLike) -> Tuple[str, float]:
+        p = self.predict_proba(text)
+        i = int(np.argmax(p))
+        return self.labels[i], float(p[i])
+
+    def classify(self, text: TextLike, threshold: Optional[float] = None) -> Optional[str]:
+        """Intent local si supera el umbral; None → consultar al LLM."""
+        if not self.ready:
+            return None
+        label, conf = self.predict(text)
+        ok = conf >= (self.threshold if threshold is None else threshold)
+        with self._lock:
+            self._stats["predictions"] += 1
+            self._stats["local" if ok else "fallback"] += 1
+        return label if ok else None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            data = dict(self._stats)
+        data["local_rate"] = round(data["local"] / data["predictions"], 4) if data["predictions"] else 0.0
+        data.update({
+            "ready": self.ready,
+            "threshold": self.threshold,
+            "hash_bits": self.bits,
+            "trained_on": self.trained_on,
+            "train_ms": self.train_ms,
+        })
+        return data
+
+
+# instancia global (por worker)
+intent_classifier = IntentClassifier()
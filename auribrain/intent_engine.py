@@ -1,6 +1,12 @@
 from openai import OpenAI
 import logging
 
+from auribrain.intent_cache import intent_cache
+from auribrain.intent_classifier import INTENT_LABELS, intent_classifier
+from auribrain.llm_telemetry import track_llm
+from auribrain.text_normalizer import normalize
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 logger = logging.getLogger(__name__)
 
 class IntentEngine:
@@ -9,89 +15,93 @@ class IntentEngine:
         self.client = client
 
     # ================================================================
-    # RULE-BASED (rápido)
+    # RULE-BASED (rápido) — léxicos en trigger_matcher
     # ================================================================
-    def _rule_based(self, text: str):
+    AGENDA_QUERIES = [
+        "revisa mi agenda", "mira mi agenda", "qué tengo hoy",
+        "qué debo hacer", "qué hay en mi agenda",
+        "agenda", "tengo demasiados pagos",
+        "qué pagos tengo", "qué debo pagar",
+        "mis pagos", "mis deudas"
+    ]
+
+    REMOVE_WORDS = [
+        "borra", "borrar", "elimina", "eliminar",
+        "quita", "quitar", "remueve", "remover",
+        "suprime", "suprimir"
+    ]
+
+    EDIT_WORDS = [
+        "cambia", "cambiar", "modifica", "modificar",
+        "muévelo", "mover",
+        "adelanta", "atrasa", "ajusta", "edita"
+    ]
+
+    CONFIRM_PHRASES = [
+        "sí, está bien", "está bien así",
+        "confirma", "confirmalo", "confirmar",
+        "dale, hazlo", "sí, hazlo",
+        "ok, crea", "ok crea"
+    ]
+
+    CREATE_WORDS = [
+        "recuérdame",
+        "anota", "agenda", "agéndame",
+        "crea", "crear",
+        "programa"
+    ]
+
+    QUERY_PHRASES = [
+        "qué recordatorios tengo",
+        "mis recordatorios",
+        "ver recordatorios",
+        "lista de recordatorios"
+    ]
+
+    def _rule_based(self, text: str, hits: TriggerHits = None):
         if not text:
             return None
 
-        t = text.lower().strip()
+        hits = hits or triggers.scan(text)
 
         # =====================================================
         # 0) CONSULTA DE AGENDA (DEBE IR ANTES DE TODO)
         # =====================================================
-        agenda_queries = [
-            "revisa mi agenda", "mira mi agenda", "qué tengo hoy",
-            "que tengo hoy", "qué debo hacer", "que debo hacer",
-            "qué hay en mi agenda", "que hay en mi agenda",
-            "agenda", "tengo demasiados pagos",
-            "qué pagos tengo", "que pagos tengo",
-            "qué debo pagar", "que debo pagar",
-            "mis pagos", "mis deudas"
-        ]
-
-        if any(q in t for q in agenda_queries):
+        if hits.any("intent.agenda"):
             return "consulta_agenda"
 
         # =====================================================
         # 1) PRIORIDAD MÁXIMA: DELETE (destructivo)
         # =====================================================
-        if any(w in t for w in [
-            "borra", "borrar", "elimina", "eliminar",
-            "quita", "quitar", "remueve", "remover",
-            "suprime", "suprimir"
-        ]):
+        if hits.any("intent.remove"):
             return "reminder.remove"
 
         # =====================================================
         # 2) EDITAR RECORDATORIO
         # =====================================================
-        if any(w in t for w in [
-            "cambia", "cambiar", "modifica", "modificar",
-            "muévelo", "muevelo", "mover",
-            "adelanta", "atrasa", "ajusta", "edita"
-        ]):
+        if hits.any("intent.edit"):
             return "reminder.edit"
 
         # =====================================================
         # 3) CONFIRMAR (solo si existe pending_reminder)
         # =====================================================
-        if any(phrase in t for phrase in [
-            "sí, está bien", "si, esta bien",
-            "está bien así", "esta bien asi",
-            "confirma", "confirmalo", "confirmar",
-            "dale, hazlo", "sí, hazlo", "si, hazlo",
-            "ok, crea", "ok crea"
-        ]):
+        if hits.any("intent.confirm"):
             return "reminder.confirm"
 
         # =====================================================
         # 4) CREAR RECORDATORIO
         # =====================================================
-        if any(w in t for w in [
-            "recuérdame", "recuerdame",
-            "anota", "agenda", "agéndame", "agendame",
-            "crea", "crear",
-            "programa"
-        ]):
+        if hits.any("intent.create"):
             return "reminder.create"
 
         # =====================================================
         # 5) CONSULTAR RECORDATORIOS (último)
         # =====================================================
-        if any(w in t for w in [
-            "qué recordatorios tengo",
-            "que recordatorios tengo",
-            "mis recordatorios",
-            "ver recordatorios",
-            "lista de recordatorios"
-        ]):
+        if hits.any("intent.query"):
             return "reminder.query"
 
         return None
 
-    # ================================================================
-    # LLM FALLBACK
     # ================================================================
     def _llm(self, text: str):
         prompt = f"""
@@ -113,30 +123,75 @@ Responde SOLO el nombre del intent.
 """
 
         try:
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                temperature=0,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Eres un clasificador experto. Solo responde un intent."
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-            )
+            with track_llm("intent.classify", "gpt-4o-mini") as call:
+                resp = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    temperature=0,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Eres un clasificador experto. Solo responde un intent."
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                )
+                call.usage(resp.usage)
             return (resp.choices[0].message.content or "").strip()
         except Exception as e:
             logger.error(f"[IntentEngine] LLM error: {e}")
-            return "conversation.general"
+            return None
 
     # ================================================================
     # ENTRADA PRINCIPAL
     # ================================================================
-    def detect(self, text: str):
+    def detect(self, text: str, *, hits: TriggerHits = None, use_llm: bool = True):
+        """
+        use_llm=False → None si ni la caché, ni las reglas, ni el clasificador
+        local lo resuelven (la respuesta única de AuriMind decide el intent).
+        """
+        norm = hits.norm if hits else normalize(text)
+
+        # 0) Caché compartida (mismo texto normalizado → mismo intent)
+        cached = intent_cache.get(norm)
+        if cached:
+            return cached
+
         # 1) Primero reglas (rápido)
-        rule = self._rule_based(text)
+        rule = self._rule_based(text, hits)
         if rule:
+            intent_cache.set(norm, rule, "rules")
             return rule
 
-        # 2) Fallback LLM
-        return self._llm(text)
+        # 2) Clasificador local (CPU, sin red) si tiene confianza suficiente
+        local = intent_classifier.classify(norm)
+        if local:
+            intent_cache.set(norm, local, "local")
+            return local
+
+        if not use_llm:
+            return None
+
+        # 3) Fallback LLM (errores y respuestas fuera de la lista no se cachean)
+        intent = self._llm(text)
+        if intent in INTENT_LABELS:
+            intent_cache.set(norm, intent, "llm")
+        return intent or "conversation.general"
+
+    def accept(self, intent: str):
+        """
+        Intent decidido por el LLM principal: solo se valida. NO se cachea:
+        ese prompt lleva diálogo, agenda y facts del usuario, así que el
+        intent depende del contexto ("sí", "el viernes") y no del texto.
+        """
+        intent = (intent or "").strip()
+        if intent not in INTENT_LABELS:
+            return None
+        return intent
+
+
+triggers.register("intent.agenda", IntentEngine.AGENDA_QUERIES)
+triggers.register("intent.remove", IntentEngine.REMOVE_WORDS)
+triggers.register("intent.edit", IntentEngine.EDIT_WORDS)
+triggers.register("intent.confirm", IntentEngine.CONFIRM_PHRASES)
+triggers.register("intent.create", IntentEngine.CREATE_WORDS)
+triggers.register("intent.query", IntentEngine.QUERY_PHRASES)
@@ -0,0 +1,188 @@
+# auribrain/ivf_index.py
+
+"""
+Índice IVF (inverted file) en NumPy para búsqueda aproximada.
+
+- Entrenamiento: k-means esférico (producto punto sobre vectores
+  normalizados) con una muestra de filas → nlist centroides.
+- Cada vector va a la lista de su centroide más cercano. add() es
+  incremental: solo asigna las filas nuevas.
+- Búsqueda: se eligen los nprobe centroides más parecidos a la consulta
+  y se puntúa exacto solo dentro de esas listas. nprobe es la perilla
+  recall/latencia (nprobe = nlist → búsqueda exacta).
+
+Las filas se identifican por su posición en la matriz del usuario
+(orden de carga por _id), así el índice se persiste como centroides +
+una asignación int32 por fila.
+
+La matriz puede venir cuantizada (float16 / int8, ver vector_codec):
+entrenar y asignar solo usan la dirección de cada fila, y la escala
+por fila entra recién al puntuar los candidatos.
+"""
+
+import math
+from typing import List, Optional
+
+import numpy as np
+from bson.binary import Binary
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    rows = rows.astype(np.float32)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return rows / norms
+
+
+class IVFIndex:
+
+    def __init__(self, centroids: np.ndarray, assign: Optional[np.ndarray] = None, trained_n: int = 0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.trained_n = trained_n
+        self.size = 0
+        self.lists: List[np.ndarray] = [np.empty(0, dtype=np.int32) for _ in range(self.nlist)]
+        if assign is not None and len(assign):
+            self._extend(np.asarray(assign, dtype=np.int32), 0)
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + sum(l.nbytes for l in self.lists)
+
+    # ----------------------------------------------------------
+    # Entrenamiento
+    # ----------------------------------------------------------
+    @staticmethod
+    def default_nlist(n: int) -> int:
+        return int(min(1024, max(16, round(math.sqrt(n)))))
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        nlist: Optional[int] = None,
+        iters: int = 10,
+        sample_per_list: int = 64,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """matrix: filas (n × d) en cualquier dtype. Asigna todas las filas."""
+        n = matrix.shape[0]
+        nlist = min(nlist or cls.default_nlist(n), n)
+        rng = np.random.default_rng(seed)
+
+        sample = matrix
+        if n > nlist * sample_per_list:
+            sample = matrix[np.sort(rng.choice(n, nlist * sample_per_list, replace=False))]
+        sample = _unit(sample)
+
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            empty = counts == 0
+            if empty.any():
+                # listas vacías: se re-siembran con filas al azar
+                sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        index = cls(centroids, trained_n=n)
+        index.add(matrix)
+        return index
+
+    # ----------------------------------------------------------
+    # Altas incrementales
+    # ----------------------------------------------------------
+    def assign(self, rows: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(rows.shape[0], dtype=np.int32)
+        for i in range(0, rows.shape[0], chunk):
+            # escala positiva por fila: no cambia el argmax
+            out[i:i + chunk] = np.argmax(rows[i:i + chunk].astype(np.float32) @ self.centroids.T, axis=1)
+        return out
+
+    def add(self, rows: np.ndarray):
+        """Asigna rows como las filas size..size+len(rows) de la matriz."""
+        if rows.shape[0]:
+            self._extend(self.assign(rows), self.size)
+
+    def _extend(self, labels: np.ndarray, start: int):
+        ids = np.arange(start, start + len(labels), dtype=np.int32)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+        for c in np.flatnonzero(np.diff(bounds)):
+            new = ids[order[bounds[c]:bounds[c + 1]]]
+            self.lists[c] = np.concatenate([self.lists[c], new])
+        self.size = start + len(labels)
+
+    def needs_retrain(self, retrain_factor: float = 2.0) -> bool:
+        return self.size > self.trained_n * retrain_factor
+
+    # ----------------------------------------------------------
+    # Búsqueda
+    # ----------------------------------------------------------
+    def search(
+        self,
+        matrix: np.ndarray,
+        q: np.ndarray,
+        k: int,
+        nprobe: int,
+        scales: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Devuelve los ids (filas de matrix) del top-k aproximado, ordenados."""
+        nprobe = max(1, min(nprobe, self.nlist))
+        cscores = self.centroids @ q
+        if nprobe < self.nlist:
+            probe = np.argpartition(-cscores, nprobe - 1)[:nprobe]
+        else:
+            probe = np.arange(self.nlist)
+
+        cand = np.concatenate([self.lists[c] for c in probe])
+        # filas agregadas a la matriz después del snapshot de la búsqueda
+        cand = cand[cand < matrix.shape[0]]
+        if cand.size == 0:
+            return cand
+
+        scores = matrix[cand].astype(np.float32) @ q
+        if scales is not None:
+            scores *= scales[cand]
+        if cand.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(cand.size)
+        return cand[top[np.argsort(-scores[top])]]
+
+    # ----------------------------------------------------------
+    # Persistencia (documento Mongo)
+    # ----------------------------------------------------------
+    def labels(self) -> np.ndarray:
+        out = np.empty(self.size, dtype=np.int32)
+        for c, ids in enumerate(self.lists):
+            out[ids] = c
+        return out
+
+    def to_doc(self) -> dict:
+        return {
+            "nlist": self.nlist,
+            "dim": self.dim,
+            "size": self.size,
+            "trained_n": self.trained_n,
+            "centroids": Binary(self.centroids.tobytes()),
+            "assign": Binary(self.labels().tobytes()),
+        }
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "IVFIndex":
+        centroids = np.frombuffer(doc["centroids"], dtype=np.float32).reshape(doc["nlist"], doc["dim"])
+        assign = np.frombuffer(doc["assign"], dtype=np.int32)
+        return cls(centroids.copy(), assign, trained_n=doc.get("trained_n", len(assign)))
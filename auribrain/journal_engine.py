@@ -1,18 +1,23 @@
 # auribrain/journal_engine.py
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
+
 class JournalEngine:
     """Modo Journal emocional automático (no cambia respuesta, solo guarda memoria)."""
 
-    def detect(self, user_msg: str, emotion_snapshot: dict) -> bool:
+    DAY_REFERENCES = ["hoy", "esta semana", "estos días"]
+
+    def detect(self, user_msg: TextLike, emotion_snapshot: dict, *, hits: TriggerHits = None) -> bool:
         emo = emotion_snapshot.get("overall", "neutral")
-        t = (user_msg or "").lower()
 
         # emociones fuertes → se guarda en diario
         if emo in ["happy", "sad", "stressed", "affectionate", "empathetic"]:
             return True
 
         # referencias a días → se guarda
-        if any(x in t for x in ["hoy", "esta semana", "estos días", "estos dias"]):
+        if (hits or triggers.scan(user_msg)).any("journal.days"):
             return True
 
         return False
@@ -20,3 +25,6 @@ class JournalEngine:
     def generate_entry(self, user_msg: str, emotion_snapshot: dict) -> str:
         emo = emotion_snapshot.get("overall", "neutral")
         return f"[JOURNAL] mood={emo} | text={user_msg}"
+
+
+triggers.register("journal.days", JournalEngine.DAY_REFERENCES)
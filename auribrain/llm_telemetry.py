@@ -0,0 +1,225 @@
+# auribrain/llm_telemetry.py
+
+"""
+Telemetría de llamadas a modelos (tokens, latencia, errores, costo).
+
+    with track_llm("intent.classify", model) as call:
+        resp = client.chat.completions.create(...)
+        call.usage(resp.usage)
+
+Cada llamada se agrega por sitio × plan (histograma de latencia con
+buckets fijos, tokens de entrada/salida/cacheados, errores, costo
+estimado) y por usuario (totales, LRU acotado). uid y plan salen de
+contextvars (bind_llm_context en el turno) o se pasan explícitos.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from auribrain.lru_ttl_cache import LRUTTLCache
+
+
+TELEMETRY_MAX_USERS = int(os.getenv("AURI_LLM_TELEMETRY_USERS", "5000"))
+
+# límites superiores (ms) de los buckets del histograma
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+# USD por millón de tokens: (entrada, entrada cacheada, salida)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+}
+
+_uid: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_uid", default=None)
+_plan: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_plan", default=None)
+
+
+def bind_llm_context(uid: str = None, plan: str = None):
+    """Asocia uid/plan a las llamadas que siguen en este contexto."""
+    if uid is not None:
+        _uid.set(uid)
+    if plan is not None:
+        _plan.set(plan)
+
+
+def _usage_fields(usage) -> Dict[str, int]:
+    """Normaliza usage de Chat Completions / Responses / Embeddings."""
+    if usage is None:
+        return {}
+
+    def get(obj, *names):
+        for name in names:
+            val = getattr(obj, name, None) if not isinstance(obj, dict) else obj.get(name)
+            if val is not None:
+                return val
+        return None
+
+    details = get(usage, "input_tokens_details", "prompt_tokens_details")
+    return {
+        "input": int(get(usage, "input_tokens", "prompt_tokens") or 0),
+        "output": int(get(usage, "output_tokens", "completion_tokens") or 0),
+        "cached": int((get(details, "cached_tokens") if details is not None else 0) or 0),
+    }
+
+
+def _cost(model: str, tokens: Dict[str, int]) -> float:
+    price_in, price_cached, price_out = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+    fresh = max(0, tokens.get("input", 0) - tokens.get("cached", 0))
+    return (
+        fresh * price_in
+        + tokens.get("cached", 0) * price_cached
+        + tokens.get("output", 0) * price_out
+    ) / 1_000_000
+
+
+class _Stat:
+    __slots__ = ("calls", "errors", "input", "output", "cached", "cost", "ms_sum", "ms_max", "buckets")
+
+    def __init__(self):
+        self.calls = self.errors = 0
+        self.input = self.output = self.cached = 0
+        self.cost = self.ms_sum = self.ms_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, ms: float, tokens: Dict[str, int], cost: float, error: bool):
+        self.calls += 1
+        self.errors += int(error)
+        self.input += tokens.get("input", 0)
+        self.output += tokens.get("output", 0)
+        self.cached += tokens.get("cached", 0)
+        self.cost += cost
+        self.ms_sum += ms
+        self.ms_max = max(self.ms_max, ms)
+        i = 0
+        while i < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Cota superior del bucket donde cae el cuantil q."""
+        if not self.calls:
+            return None
+        target = q * self.calls
+        acc = 0
+        for i, n in enumerate(self.buckets):
+            acc += n
+            if acc >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.ms_max, 1)
+        return round(self.ms_max, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "tokens_in": self.input,
+            "tokens_out": self.output,
+            "tokens_cached": self.cached,
+            "cost_usd": round(self.cost, 6),
+            "latency_avg_ms": round(self.ms_sum / self.calls, 1) if self.calls else 0.0,
+            "latency_p50_ms": self._quantile(0.5),
+            "latency_p95_ms": self._quantile(0.95),
+            "latency_max_ms": round(self.ms_max, 1),
+            "histogram_ms": dict(zip(labels, self.buckets)),
+        }
+
+
+class LLMCall:
+    """Handle de una llamada en curso (lo devuelve track_llm)."""
+
+    __slots__ = ("tokens",)
+
+    def __init__(self):
+        self.tokens: Dict[str, int] = {}
+
+    def usage(self, usage):
+        if usage is not None:
+            self.tokens = _usage_fields(usage)
+
+
+class LLMTelemetry:
+
+    def __init__(self, max_users: int = TELEMETRY_MAX_USERS):
+        self._lock = threading.Lock()
+        self._sites: Dict[tuple, _Stat] = {}
+        self._users = LRUTTLCache(max_items=max_users)
+        self.started_at = time.time()
+
+    def record(
+        self,
+        site: str,
+        model: str,
+        latency_ms: float,
+        tokens: Dict[str, int] = None,
+        error: bool = False,
+        uid: str = None,
+        plan: str = None,
+    ):
+        tokens = tokens or {}
+        uid = uid or _uid.get() or "anon"
+        plan = plan or _plan.get() or "unknown"
+        cost = _cost(model, tokens)
+
+        with self._lock:
+            self._sites.setdefault((site, plan), _Stat()).add(latency_ms, tokens, cost, error)
+            self._users.get_or_create(uid, _Stat).add(latency_ms, tokens, cost, error)
+
+    @contextmanager
+    def track(self, site: str, model: str, uid: str = None, plan: str = None):
+        call = LLMCall()
+        start = time.perf_counter()
+        error = False
+        try:
+            yield call
+        except Exception:
+            # cancelaciones / GeneratorExit (cliente cortó el stream) no cuentan como error
+            error = True
+            raise
+        finally:
+            self.record(
+                site, model, (time.perf_counter() - start) * 1000.0,
+                call.tokens, error, uid=uid, plan=plan,
+            )
+
+    def snapshot(self, top_users: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            sites: Dict[str, Dict[str, Any]] = {}
+            plans: Dict[str, _Stat] = {}
+            for (site, plan), stat in self._sites.items():
+                sites.setdefault(site, {})[plan] = stat.to_dict()
+                total = plans.setdefault(plan, _Stat())
+                for name in ("calls", "errors", "input", "output", "cached", "cost", "ms_sum"):
+                    setattr(total, name, getattr(total, name) + getattr(stat, name))
+                total.ms_max = max(total.ms_max, stat.ms_max)
+                total.buckets = [a + b for a, b in zip(total.buckets, stat.buckets)]
+
+            users = sorted(
+                ((uid, stat) for uid, stat in self._users.items()),
+                key=lambda kv: kv[1].cost, reverse=True,
+            )[:top_users]
+
+            return {
+                "since": self.started_at,
+                "by_site": sites,
+                "by_plan": {plan: stat.to_dict() for plan, stat in plans.items()},
+                "top_users": [
+                    {"uid": uid, "calls": s.calls, "tokens_in": s.input,
+                     "tokens_out": s.output, "cost_usd": round(s.cost, 6)}
+                    for uid, s in users
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+            self._users.clear()
+            self.started_at = time.time()
+
+
+# instancia global (por worker)
+llm_telemetry = LLMTelemetry()
+track_llm = llm_telemetry.track
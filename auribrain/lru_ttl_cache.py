@@ -0,0 +1,232 @@
+# auribrain/lru_ttl_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUTTLCache:
+    """
+    Caché LRU + TTL en memoria, thread-safe.
+
+    - max_items: límite duro de entradas (desaloja la menos usada).
+    - max_bytes + sizeof(value): límite opcional de memoria estimada.
+    - ttl: segundos de inactividad antes de expirar (None = sin TTL).
+    - on_evict(key, value): callback opcional al desalojar/expirar.
+    - refresh_on_get: si es False el TTL corre desde la escritura (datos
+      que pueden cambiar en otro worker), no desde el último acceso.
+
+    Lleva contadores de hits/misses/evictions/expirations para métricas.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1024,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        refresh_on_get: bool = True,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_items = max(1, int(max_items))
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.refresh_on_get = refresh_on_get
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof if max_bytes is not None else None
+        self._bytes = 0
+
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._touched: Dict[Hashable, float] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ----------------------------------------------------------
+    # Helpers internos (llamar con el lock tomado)
+    # ----------------------------------------------------------
+    def _is_expired(self, key: Hashable, now: float) -> bool:
+        if self.ttl is None:
+            return False
+        return now - self._touched.get(key, now) > self.ttl
+
+    def _drop(self, key: Hashable):
+        value = self._data.pop(key)
+        self._touched.pop(key, None)
+        if self.sizeof:
+            self._bytes -= self.sizeof(value)
+        return value
+
+    def _store(self, key: Hashable, value: Any, now: float, dropped: list):
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = value
+        self._touched[key] = now
+        if self.sizeof:
+            self._bytes += self.sizeof(value)
+
+        while len(self._data) > self.max_items or (
+            self.sizeof and self._bytes > self.max_bytes and len(self._data) > 1
+        ):
+            old_key = next(iter(self._data))
+            dropped.append((old_key, self._drop(old_key)))
+            self.evictions += 1
+
+    def _notify(self, dropped):
+        if not self.on_evict:
+            return
+        for key, value in dropped:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                print(f"[LRUTTLCache] Error en on_evict({key}): {e}")
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+
+            if self._is_expired(key, now):
+                expired.append((key, self._drop(key)))
+                self.expirations += 1
+                self.misses += 1
+                value = default
+            else:
+                self._data.move_to_end(key)
+                if self.refresh_on_get:
+                    self._touched[key] = now
+                self.hits += 1
+                value = self._data[key]
+
+        self._notify(expired)
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Lee sin tocar el orden LRU ni las métricas."""
+        with self._lock:
+            if key in self._data and not self._is_expired(key, time.monotonic()):
+                return self._data[key]
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            self._store(key, value, now, dropped)
+
+        self._notify(dropped)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Devuelve la entrada o la crea con factory() de forma atómica."""
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            if key in self._data and not self._is_expired(key, now):
+                self._data.move_to_end(key)
+                if self.refresh_on_get:
+                    self._touched[key] = now
+                self.hits += 1
+                return self._data[key]
+
+            if key in self._data:
+                dropped.append((key, self._drop(key)))
+                self.expirations += 1
+
+            self.misses += 1
+            value = factory()
+            self._store(key, value, now, dropped)
+
+        self._notify(dropped)
+        return value
+
+    def setdefault(self, key: Hashable, value: Any) -> Any:
+        """
+        Guarda value si no hay entrada viva y devuelve la que quedó.
+        Para valores caros: construirlos fuera del lock y resolver la
+        carrera acá (get_or_create llama a la factory con el lock tomado).
+        """
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            if key in self._data and not self._is_expired(key, now):
+                self._data.move_to_end(key)
+                if self.refresh_on_get:
+                    self._touched[key] = now
+                return self._data[key]
+
+            if key in self._data:
+                dropped.append((key, self._drop(key)))
+                self.expirations += 1
+
+            self._store(key, value, now, dropped)
+
+        self._notify(dropped)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._drop(key)
+
+    def purge_expired(self) -> int:
+        """Elimina todas las entradas vencidas. Devuelve cuántas salieron."""
+        if self.ttl is None:
+            return 0
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            for key in list(self._data.keys()):
+                if self._is_expired(key, now):
+                    dropped.append((key, self._drop(key)))
+            self.expirations += len(dropped)
+
+        self._notify(dropped)
+        return len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._touched.clear()
+            self._bytes = 0
+
+    def items(self) -> list:
+        """Copia (key, value) de las entradas, sin tocar el orden LRU."""
+        with self._lock:
+            return list(self._data.items())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_items": self.max_items,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "bytes": self._bytes if self.sizeof else None,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_MISSING = object()
@@ -1,16 +1,193 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
 
-db = client["auri_db"]
+AURI_DB_NAME = os.getenv("AURI_DB_NAME", "auri_db")
+# las suscripciones viven históricamente en "auri"; mismo pool, otra DB
+AURI_SUBSCRIPTIONS_DB = os.getenv("AURI_SUBSCRIPTIONS_DB", "auri")
+
+# Pool (por worker)
+MONGO_MAX_POOL = int(os.getenv("AURI_MONGO_MAX_POOL", "50"))
+MONGO_MIN_POOL = int(os.getenv("AURI_MONGO_MIN_POOL", "0"))
+MONGO_MAX_IDLE_MS = int(os.getenv("AURI_MONGO_MAX_IDLE_MS", "300000"))
+MONGO_WAIT_QUEUE_MS = int(os.getenv("AURI_MONGO_WAIT_QUEUE_MS", "2000"))
+MONGO_SELECT_MS = int(os.getenv("AURI_MONGO_SELECT_MS", "5000"))
+MONGO_CONNECT_MS = int(os.getenv("AURI_MONGO_CONNECT_MS", "5000"))
+# 0 = sin timeout de socket (como el cliente original): el mismo cliente corre
+# migraciones y create_index, que en colecciones grandes tardan más de segundos
+MONGO_SOCKET_MS = int(os.getenv("AURI_MONGO_SOCKET_MS", "0")) or None
+MONGO_READ_PREFERENCE = os.getenv("AURI_MONGO_READ_PREFERENCE", "primary")
+
+
+# ============================================================
+# MÉTRICAS DEL POOL
+# ============================================================
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Cuenta conexiones abiertas / en uso / esperas fallidas del pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "open": 0,
+            "in_use": 0,
+            "in_use_max": 0,
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "checkout_failed": 0,
+            "pool_cleared": 0,
+        }
+
+    def _bump(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+            if key == "in_use":
+                self.stats["in_use_max"] = max(self.stats["in_use_max"], self.stats["in_use"])
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_ready(self, event): pass
+
+    def pool_cleared(self, event):
+        self._bump("pool_cleared")
+
+    def connection_created(self, event):
+        self._bump("created")
+        self._bump("open")
+
+    def connection_closed(self, event):
+        self._bump("closed")
+        self._bump("open", -1)
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._bump("checkouts")
+        self._bump("in_use")
+
+    def connection_checked_in(self, event):
+        self._bump("in_use", -1)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+# ============================================================
+# CONEXIÓN ÚNICA (LAZY)
+# ============================================================
+
+class MongoManager:
+    """
+    Un solo MongoClient por worker, creado en el primer uso.
+    Todas las colecciones (memoria, embeddings, suscripciones) comparten
+    el mismo pool y los mismos monitores de servidor.
+    """
+
+    def __init__(self, uri: str = None):
+        self.uri = uri or MONGO_URI
+        self.pool_stats = PoolStatsListener()
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> MongoClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = MongoClient(
+                        self.uri,
+                        appname="auri-backend",
+                        maxPoolSize=MONGO_MAX_POOL,
+                        minPoolSize=MONGO_MIN_POOL,
+                        maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+                        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_MS,
+                        serverSelectionTimeoutMS=MONGO_SELECT_MS,
+                        connectTimeoutMS=MONGO_CONNECT_MS,
+                        socketTimeoutMS=MONGO_SOCKET_MS,
+                        readPreference=MONGO_READ_PREFERENCE,
+                        retryWrites=True,
+                        event_listeners=[self.pool_stats],
+                    )
+        return self._client
+
+    def db(self, name: str = AURI_DB_NAME):
+        return self.client[name]
+
+    def collection(self, name: str, db_name: str = AURI_DB_NAME):
+        return self.client[db_name][name]
+
+    def lazy(self, name: str, db_name: str = AURI_DB_NAME):
+        return LazyCollection(self, name, db_name)
+
+    def health(self) -> dict:
+        started = time.perf_counter()
+        try:
+            self.client.admin.command("ping")
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        ping_ms = round((time.perf_counter() - started) * 1000.0, 2)
+
+        pool = self.pool_stats.snapshot()
+        pool["max_pool_size"] = MONGO_MAX_POOL
+        pool["utilization"] = round(pool["in_use"] / MONGO_MAX_POOL, 3) if MONGO_MAX_POOL else 0.0
+
+        return {
+            "ok": ok,
+            "error": error,
+            "ping_ms": ping_ms,
+            "pool": pool,
+            "read_preference": MONGO_READ_PREFERENCE,
+        }
+
+
+class LazyCollection:
+    """
+    Proxy de colección: resuelve la Collection real recién al primer uso,
+    así importar este módulo no abre conexiones.
+    """
+
+    def __init__(self, manager: MongoManager, name: str, db_name: str):
+        self._manager = manager
+        self._name = name
+        self._db_name = db_name
+        self._coll = None
+
+    def _resolve(self):
+        if self._coll is None:
+            self._coll = self._manager.collection(self._name, self._db_name)
+        return self._coll
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __repr__(self):
+        return f"LazyCollection({self._db_name}.{self._name})"
+
+
+# instancia global (por worker)
+mongo = MongoManager()
 
 # Colecciones correctas
-users = db["users"]
-facts = db["facts"]
-dialog_recent = db["dialog_recent"]
-memory_vectors = db["memory_vectors"]
+users = mongo.lazy("users")
+facts = mongo.lazy("facts")
+dialog_recent = mongo.lazy("dialog_recent")      # legacy: un doc por mensaje
+dialog_windows = mongo.lazy("dialog_windows")    # un doc por usuario, ventana acotada
+memory_vectors = mongo.lazy("memory_vectors")
+vector_indexes = mongo.lazy("vector_indexes")    # índice IVF persistido por usuario
+
+subscriptions = mongo.lazy("subscriptions", AURI_SUBSCRIPTIONS_DB)
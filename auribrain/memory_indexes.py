@@ -0,0 +1,99 @@
+# auribrain/memory_indexes.py
+
+"""
+Índices de Mongo que necesitan las consultas de memoria.
+Se crean al arrancar (idempotente: create_index no hace nada si ya existe
+con la misma definición).
+
+El índice vectorial de Atlas (memory_vectors_index, usado por
+$vectorSearch) se administra en Atlas Search, no desde aquí.
+"""
+
+import os
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from auribrain.memory_db import facts, dialog_recent, memory_vectors, subscriptions
+
+
+ENSURE_INDEXES = os.getenv("AURI_ENSURE_INDEXES", "1") == "1"
+
+
+# (colección, claves, opciones) — las consultas de facts filtran primero
+# por igualdad en user_id + is_active.
+INDEX_SPECS = [
+    # _active_facts (prefijo user_id + is_active; get_facts, familia,
+    # mascotas y relaciones filtran esa lista cacheada en memoria)
+    # + add_fact_structured / migrate_legacy_memory (chequeo de duplicados)
+    (facts, [("user_id", ASCENDING), ("is_active", ASCENDING), ("text", ASCENDING)],
+     {"name": "user_active_text"}),
+
+    # get_recent_dialog (fallback legacy) + migración a dialog_windows
+    (dialog_recent, [("user_id", ASCENDING), ("ts", DESCENDING)],
+     {"name": "user_ts"}),
+
+    # memory_router: count / find / delete por usuario
+    # + carga del backend local ordenada por _id (sin sort en memoria)
+    (memory_vectors, [("user_id", ASCENDING), ("_id", ASCENDING)],
+     {"name": "user_id"}),
+
+    # get_subscription / set_subscription
+    (subscriptions, [("uid", ASCENDING)],
+     {"name": "uid_unique", "unique": True}),
+]
+
+# índices que ya no usa ninguna consulta: solo cuestan en cada escritura.
+# role / category se filtran ahora sobre los facts activos cacheados.
+OBSOLETE_INDEXES = [
+    (facts, "user_active_category"),
+    (facts, "user_active_role"),
+]
+
+
+def ensure_indexes() -> dict:
+    """
+    Crea los índices declarados y borra los obsoletos. Un fallo en uno
+    (p.ej. duplicados que impiden un unique) se reporta y no frena al resto.
+    """
+    report = {"created": [], "existing": [], "dropped": [], "failed": []}
+
+    for coll, keys, opts in INDEX_SPECS:
+        label = f"{coll.full_name}.{opts['name']}"
+        try:
+            existing = coll.index_information()
+            if opts["name"] in existing:
+                report["existing"].append(label)
+                continue
+            coll.create_index(keys, **opts)
+            report["created"].append(label)
+        except ConnectionFailure as e:
+            # sin servidor no tiene sentido seguir probando índice por índice
+            print(f"[MemoryIndexes] Mongo no disponible: {e}")
+            report["failed"].append({"index": label, "error": str(e)})
+            break
+        except PyMongoError as e:
+            print(f"[MemoryIndexes] No se pudo crear {label}: {e}")
+            report["failed"].append({"index": label, "error": str(e)})
+
+    for coll, name in OBSOLETE_INDEXES:
+        label = f"{coll.full_name}.{name}"
+        try:
+            if name in coll.index_information():
+                coll.drop_index(name)
+                report["dropped"].append(label)
+        except ConnectionFailure as e:
+            print(f"[MemoryIndexes] Mongo no disponible: {e}")
+            report["failed"].append({"index": label, "error": str(e)})
+            break
+        except PyMongoError as e:
+            # otro worker lo borró primero, o permisos
+            print(f"[MemoryIndexes] No se pudo borrar {label}: {e}")
+            report["failed"].append({"index": label, "error": str(e)})
+
+    print(
+        f"[MemoryIndexes] creados={len(report['created'])} "
+        f"existentes={len(report['existing'])} borrados={len(report['dropped'])} "
+        f"fallidos={len(report['failed'])}"
+    )
+    return report
@@ -1,6 +1,92 @@
 import datetime
-from auribrain.memory_db import users, facts, dialog_recent
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from pymongo.errors import DuplicateKeyError
+
+from auribrain.memory_db import users, facts, dialog_recent, dialog_windows
 from auribrain.embedding_service import EmbeddingService
+from auribrain.semantic_batch_writer import semantic_writer, SEMANTIC_WAIT_TIMEOUT
+from auribrain.async_runtime import submit_io
+from auribrain.lru_ttl_cache import LRUTTLCache
+
+
+# Timeouts por fuente (segundos) para la recuperación paralela
+RETRIEVAL_TIMEOUTS = {
+    "profile": float(os.getenv("AURI_RETRIEVAL_TIMEOUT_PROFILE", "0.8")),
+    "facts": float(os.getenv("AURI_RETRIEVAL_TIMEOUT_FACTS", "0.8")),
+    "semantic": float(os.getenv("AURI_RETRIEVAL_TIMEOUT_SEMANTIC", "1.5")),
+    "dialog": float(os.getenv("AURI_RETRIEVAL_TIMEOUT_DIALOG", "0.8")),
+}
+
+# Mensajes que se conservan en la ventana de diálogo por usuario
+DIALOG_WINDOW = int(os.getenv("AURI_DIALOG_WINDOW", "40"))
+
+
+# ============================================================
+# CACHÉ POR USUARIO (perfil / facts / diálogo)
+# ============================================================
+# Compartida por todas las instancias de MemoryOrchestrator del worker.
+# Claves (uid, kind). El TTL corre desde la escritura: acota cuánto
+# puede tardar en verse un cambio hecho por otro worker.
+MEMORY_CACHE_MAX = int(os.getenv("AURI_MEMORY_CACHE_MAX", "6000"))
+MEMORY_CACHE_TTL = float(os.getenv("AURI_MEMORY_CACHE_TTL", "120"))
+
+CACHE_KINDS = ("profile", "facts", "dialog")
+
+_user_cache = LRUTTLCache(max_items=MEMORY_CACHE_MAX, ttl=MEMORY_CACHE_TTL, refresh_on_get=False)
+# generación de escritura por clave: una lectura que empezó antes de una
+# escritura no puede pisar la caché con datos viejos
+_cache_gen = LRUTTLCache(max_items=MEMORY_CACHE_MAX * 2)
+_cache_lock = threading.Lock()
+_kind_stats = {k: {"hits": 0, "misses": 0} for k in CACHE_KINDS}
+_MISS = object()
+
+
+def _cached(user_id: str, kind: str, loader):
+    key = (user_id, kind)
+    value = _user_cache.get(key, _MISS)
+    if value is not _MISS:
+        _kind_stats[kind]["hits"] += 1
+        return value
+
+    _kind_stats[kind]["misses"] += 1
+    gen = _cache_gen.peek(key, 0)
+    value = loader()
+    with _cache_lock:
+        if _cache_gen.peek(key, 0) == gen:
+            _user_cache.set(key, value)
+    return value
+
+
+def _write_through(user_id: str, kind: str, update):
+    """Tras escribir en Mongo: actualiza la entrada si está cacheada."""
+    key = (user_id, kind)
+    with _cache_lock:
+        _cache_gen.set(key, _cache_gen.peek(key, 0) + 1)
+        old = _user_cache.peek(key, _MISS)
+        if old is not _MISS:
+            _user_cache.set(key, update(old))
+
+
+def invalidate_user_cache(user_id: str, *kinds: str):
+    """Descarta lo cacheado del usuario (todas las clases si no se indican)."""
+    if not user_id:
+        return
+    with _cache_lock:
+        for kind in kinds or CACHE_KINDS:
+            key = (user_id, kind)
+            _cache_gen.set(key, _cache_gen.peek(key, 0) + 1)
+            _user_cache.pop(key)
+
+
+def memory_cache_stats() -> dict:
+    return {
+        "cache": _user_cache.stats(),
+        "by_kind": {k: dict(v) for k, v in _kind_stats.items()},
+    }
 
 
 class MemoryOrchestrator:
@@ -11,29 +97,76 @@ class MemoryOrchestrator:
     # ==================================================
     # DIÁLOGO RECIENTE
     # ==================================================
+    # Un documento por usuario en dialog_windows: {_id: uid, turns: [...]}.
+    # $push + $slice recorta en el servidor, en la misma escritura:
+    # costo O(1) por turno sin importar el largo del historial.
     def add_dialog(self, user_id: str, role: str, text: str):
-        dialog_recent.insert_one({
-            "user_id": user_id,
-            "role": role,
-            "text": text,
-            "ts": datetime.datetime.utcnow()
-        })
+        self._push_dialog(user_id, [self._dialog_msg(role, text)])
+
+    def add_dialog_turn(self, user_id: str, user_msg: str, answer: str, turn_id: str = None):
+        """
+        Guarda pregunta + respuesta en una sola escritura. Con turn_id es
+        idempotente: un reintento de un $push que sí llegó no duplica el turno.
+        """
+        self._push_dialog(user_id, [
+            self._dialog_msg("user", user_msg, turn_id),
+            self._dialog_msg("assistant", answer, turn_id),
+        ], turn_id)
+
+    def _dialog_msg(self, role: str, text: str, turn_id: str = None) -> dict:
+        msg = {"role": role, "text": text, "ts": datetime.datetime.utcnow()}
+        if turn_id:
+            msg["turn_id"] = turn_id
+        return msg
+
+    def _push_dialog(self, user_id: str, msgs: list, turn_id: str = None):
+        query = {"_id": user_id}
+        if turn_id:
+            query["turns.turn_id"] = {"$ne": turn_id}
+        try:
+            dialog_windows.update_one(
+                query,
+                {
+                    "$push": {"turns": {"$each": msgs, "$slice": -DIALOG_WINDOW}},
+                    "$set": {"updated_at": datetime.datetime.utcnow()},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # el documento existe y ya tiene este turn_id: escrito antes
+            if turn_id:
+                return
+            raise
+        _write_through(user_id, "dialog", lambda old: (old + msgs)[-DIALOG_WINDOW:])
 
-        # mantener máximo 40
-        cur = dialog_recent.find({"user_id": user_id}).sort("ts", -1)
-        msgs = list(cur)
-        if len(msgs) > 40:
-            to_delete = msgs[40:]
-            dialog_recent.delete_many({"_id": {"$in": [m["_id"] for m in to_delete]}})
+    def _dialog_window(self, user_id: str) -> list:
+        def load():
+            doc = dialog_windows.find_one(
+                {"_id": user_id},
+                {"turns": {"$slice": -DIALOG_WINDOW}, "_id": 0},
+            )
+            if doc is not None:
+                return doc.get("turns") or []
+            # usuarios aún sin migrar (ver migrate_dialog_window.py)
+            cur = dialog_recent.find({"user_id": user_id}).sort("ts", -1).limit(DIALOG_WINDOW)
+            return list(reversed(list(cur)))
+
+        return _cached(user_id, "dialog", load)
 
     def get_recent_dialog(self, user_id, n=10):
-        cur = dialog_recent.find({"user_id": user_id}).sort("ts", -1).limit(n * 2)
+        msgs = self._dialog_window(user_id)[-(n * 2):]
+
         lines = []
-        for m in reversed(list(cur)):
+        for m in msgs:
             prefix = "Usuario" if m["role"] == "user" else "Auri"
             lines.append(f"{prefix}: {m['text']}")
         return "\n".join(lines)
 
+    def clear_dialog(self, user_id: str):
+        dialog_windows.delete_one({"_id": user_id})
+        dialog_recent.delete_many({"user_id": user_id})
+        invalidate_user_cache(user_id, "dialog")
+
     # ==================================================
     # FACTOS DURADEROS (estructura completa)
     # ==================================================
@@ -84,11 +217,19 @@ class MemoryOrchestrator:
             return  # evitar duplicados exactos
 
         facts.insert_one(doc)
+        _write_through(user_id, "facts", lambda old: old + [doc])
+
+    def _active_facts(self, user_id) -> list:
+        """Facts activos del usuario (cacheados). No mutar el resultado."""
+        return _cached(
+            user_id, "facts",
+            lambda: list(facts.find({"user_id": user_id, "is_active": True})),
+        )
 
     def get_facts(self, user_id):
         """Devuelve TODOS los facts estructurados usados por AuriMind."""
         result = []
-        for f in facts.find({"user_id": user_id, "is_active": True}):
+        for f in self._active_facts(user_id):
             result.append({
                 "text": f.get("text"),
                 "category": f.get("category"),
@@ -115,41 +256,24 @@ class MemoryOrchestrator:
         }
 
         res = []
-        for f in facts.find({"user_id": user_id, "is_active": True}):
+        for f in self._active_facts(user_id):
             role = (f.get("role") or "").lower()
             if role in FAMILY_ROLES:
-                res.append(f)
+                res.append(dict(f))
         return res
 
     def get_family_by_role(self, user_id, role: str):
         """Ej: get_family_by_role(uid, 'abuela')"""
-        return [
-            f for f in facts.find({
-                "user_id": user_id,
-                "role": role.lower(),
-                "is_active": True
-            })
-        ]
+        role = role.lower()
+        return [dict(f) for f in self._active_facts(user_id) if f.get("role") == role]
 
     def get_pets(self, user_id):
         """Retorna todas las mascotas registradas estructuradamente."""
-        return [
-            f for f in facts.find({
-                "user_id": user_id,
-                "category": "pet",
-                "is_active": True
-            })
-        ]
+        return [dict(f) for f in self._active_facts(user_id) if f.get("category") == "pet"]
 
     def get_relationships(self, user_id):
         """Familia + pareja + amigos importantes."""
-        return [
-            f for f in facts.find({
-                "user_id": user_id,
-                "category": "relationship",
-                "is_active": True
-            })
-        ]
+        return [dict(f) for f in self._active_facts(user_id) if f.get("category") == "relationship"]
 
     def get_all_facts_pretty(self, user_id):
         """Para depuración — devuelve texto limpio."""
@@ -168,26 +292,103 @@ class MemoryOrchestrator:
     # ==================================================
     # MEMORIA SEMÁNTICA (EMBEDDINGS)
     # ==================================================
+    SEMANTIC_IMPORTANT = [
+        "me gusta", "mi comida favorita", "odio", "mi novia", "mi pareja",
+        "mi mamá", "mi papá", "trabajo", "estoy estudiando", "mi sueño",
+        "mi meta", "mi color favorito", "quiero lograr"
+    ]
+
     def add_semantic(self, user_id: str, text: str):
-        IMPORTANT = [
-            "me gusta", "mi comida favorita", "odio", "mi novia", "mi pareja",
-            "mi mamá", "mi papá", "trabajo", "estoy estudiando", "mi sueño",
-            "mi meta", "mi color favorito", "quiero lograr"
+        self.add_semantic_many(user_id, [text])
+
+    def add_semantic_many(self, user_id: str, texts: list):
+        """
+        Encola los textos relevantes en el SemanticBatchWriter (un solo
+        embeddings.create + insert_many por lote) y espera a que se
+        escriban, para que un error llegue al reintento de PostTurnQueue.
+        """
+        futures = [
+            semantic_writer.submit(user_id, text)
+            for text in texts
+            if any(k in text.lower() for k in self.SEMANTIC_IMPORTANT)
         ]
-        if any(k in text.lower() for k in IMPORTANT):
-            self.embedder.add(user_id, text)
+        for fut in futures:
+            fut.result(timeout=SEMANTIC_WAIT_TIMEOUT)
 
     def search_semantic(self, user_id: str, query: str):
         return self.embedder.search(user_id, query)
 
+    # ==================================================
+    # RECUPERACIÓN PARALELA (antes del LLM)
+    # ==================================================
+    def gather_context(self, user_id: str, query: str, timeouts: dict = None, sources=None) -> dict:
+        """
+        Lanza perfil, facts, memoria semántica y diálogo reciente a la vez.
+        Cada fuente tiene su timeout; si falla o tarda, se usa un valor
+        vacío y el turno sigue (resultado parcial). La latencia total queda
+        acotada por la fuente más lenta, no por la suma.
+
+        `sources` limita qué fuentes se buscan (None = todas); las demás
+        vuelven vacías sin tocar Mongo ni la API de embeddings (p.ej. el
+        plan free solo usa el perfil).
+
+        Devuelve:
+        {
+            "profile": dict, "facts": str, "semantic": list, "dialog": str,
+            "missing": [fuentes que no llegaron a tiempo o fallaron],
+        }
+        """
+        timeouts = {**RETRIEVAL_TIMEOUTS, **(timeouts or {})}
+
+        available = {
+            "profile": (self.get_user_profile, (user_id,), {}),
+            "facts": (self.get_all_facts_pretty, (user_id,), ""),
+            "semantic": (self.search_semantic, (user_id, query), []),
+            "dialog": (self.get_recent_dialog, (user_id,), ""),
+        }
+        wanted = available.keys() if sources is None else set(sources)
+
+        start = time.monotonic()
+        futures = {
+            name: submit_io(fn, *args)
+            for name, (fn, args, _) in available.items()
+            if name in wanted
+        }
+
+        # las fuentes no pedidas quedan con su valor vacío (no cuentan como missing)
+        result = {name: fallback for name, (_, _, fallback) in available.items()}
+        result["missing"] = []
+        for name, fut in futures.items():
+            fallback = available[name][2]
+            remaining = max(0.0, start + timeouts[name] - time.monotonic())
+            try:
+                result[name] = fut.result(timeout=remaining)
+            except FutureTimeout:
+                print(f"[MemoryOrchestrator] Timeout recuperando {name} (uid={user_id})")
+                result[name] = fallback
+                result["missing"].append(name)
+            except Exception as e:
+                print(f"[MemoryOrchestrator] Error recuperando {name}: {e}")
+                result[name] = fallback
+                result["missing"].append(name)
+
+        return result
+
     # ==================================================
     # PERFIL DEL USUARIO
     # ==================================================
     def get_user_profile(self, user_id: str):
-        return users.find_one({"_id": user_id}) or {}
+        return _cached(user_id, "profile", lambda: users.find_one({"_id": user_id}) or {})
 
     def update_user_profile(self, user_id: str, data: dict):
         users.update_one({"_id": user_id}, {"$set": data}, upsert=True)
+        invalidate_user_cache(user_id, "profile")
+
+    def warm_user(self, user_id: str):
+        """Precarga perfil, facts y diálogo (no-op si ya están en caché)."""
+        self.get_user_profile(user_id)
+        self._active_facts(user_id)
+        self._dialog_window(user_id)
         # --------------------------------------------------------------
     # RESUMEN FAMILIAR — usado por AuriMind._resolve_info
     # --------------------------------------------------------------
@@ -1,21 +1,25 @@
 # auribrain/mental_health_engine.py
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
+
 class MentalHealthEngine:
     """Modo Salud Mental (leve, preventivo)."""
 
     KEYWORDS = [
         "ansioso", "ansiosa", "ansiedad",
         "estresado", "estresada", "estres",
-        "no puedo más", "no puedo mas",
+        "no puedo más",
         "agotado", "agotada",
         "abrumado", "abrumada",
         "me siento mal conmigo",
     ]
 
-    def detect(self, text: str, stress_level: float) -> bool:
-        t = (text or "").lower()
+    def detect(self, text: TextLike, stress_level: float, *, hits: TriggerHits = None) -> bool:
+        hits = hits or triggers.scan(text)
 
-        if any(k in t for k in self.KEYWORDS):
+        if hits.any("mental.keywords"):
             return True
 
         return stress_level > 0.6
@@ -26,3 +30,6 @@ class MentalHealthEngine:
             "Probemos algo sencillo: inhalá profundo por 4 segundos, sostené 4, exhalá en 6…\n"
             "Si querés, puedo ayudarte a ordenar tu día para que no se sienta tan pesado."
         )
+
+
+triggers.register("mental.keywords", MentalHealthEngine.KEYWORDS)
@@ -0,0 +1,75 @@
+# auribrain/migrate_dialog_window.py
+
+"""
+Migrador dialog_recent (un doc por mensaje) → dialog_windows
+(un doc por usuario con la ventana acotada de mensajes).
+Idempotente: cada usuario se marca como migrado.
+"""
+
+from pymongo.errors import DuplicateKeyError
+
+from auribrain.memory_db import dialog_recent, dialog_windows
+from auribrain.memory_orchestrator import DIALOG_WINDOW, invalidate_user_cache
+
+
+def run_dialog_migration(drop_legacy: bool = False):
+    """
+    Copia los últimos DIALOG_WINDOW mensajes de cada usuario a su
+    ventana. Si el usuario ya escribió en la ventana nueva, los mensajes
+    legados se intercalan por fecha y se vuelve a recortar.
+
+    drop_legacy=True borra de dialog_recent a los usuarios migrados.
+    """
+    result = {
+        "migrated_users": 0,
+        "skipped_users": 0,
+        "migrated_messages": 0,
+        "dropped_legacy": 0,
+        "status": "ok",
+    }
+
+    pipeline = [
+        {"$sort": {"user_id": 1, "ts": -1}},
+        {"$group": {
+            "_id": "$user_id",
+            "turns": {"$push": {"role": "$role", "text": "$text", "ts": "$ts"}},
+        }},
+        {"$project": {"turns": {"$slice": ["$turns", DIALOG_WINDOW]}}},
+    ]
+
+    for group in dialog_recent.aggregate(pipeline, allowDiskUse=True):
+        user_id = group["_id"]
+        turns = group.get("turns") or []
+        if not user_id:
+            continue
+
+        try:
+            dialog_windows.update_one(
+                {"_id": user_id, "legacy_migrated": {"$ne": True}},
+                {
+                    "$push": {"turns": {
+                        "$each": turns,
+                        "$sort": {"ts": 1},
+                        "$slice": -DIALOG_WINDOW,
+                    }},
+                    "$set": {"legacy_migrated": True},
+                },
+                upsert=True,
+            )
+            result["migrated_users"] += 1
+            result["migrated_messages"] += len(turns)
+        except DuplicateKeyError:
+            # ya existe con legacy_migrated=True → migrado antes
+            result["skipped_users"] += 1
+
+        if drop_legacy:
+            res = dialog_recent.delete_many({"user_id": user_id})
+            result["dropped_legacy"] += res.deleted_count
+
+        invalidate_user_cache(user_id, "dialog")
+
+    return result
+
+
+if __name__ == "__main__":
+    print(run_dialog_migration())
@@ -0,0 +1,83 @@
+# auribrain/migrate_vector_format.py
+
+"""
+Backfill de memory_vectors al formato compacto (AURI_VECTOR_FORMAT).
+Reescribe por lotes con bulk_write; solo toca los documentos que aún
+no están en el formato destino, así se puede cortar y volver a correr.
+"""
+
+from pymongo import UpdateOne
+
+from auribrain.memory_db import memory_vectors
+from auribrain.vector_backends import VECTOR_BACKEND
+from auribrain.vector_codec import ATLAS_FORMATS, FORMATS, VECTOR_FORMAT, decode_embedding, encode_embedding, stored_nbytes
+
+
+def _pending_filter(fmt: str) -> dict:
+    if fmt == "float":
+        return {"embedding": {"$type": "binData"}}
+    return {"embedding_format": {"$ne": fmt}}
+
+
+def run_vector_format_migration(fmt: str = VECTOR_FORMAT, batch_size: int = 500, limit: int = 0):
+    """
+    Convierte hasta `limit` documentos (0 = todos) al formato `fmt`.
+    Reporta bytes del campo embedding antes y después.
+    """
+    if fmt not in FORMATS:
+        return {"status": "error", "error": f"formato desconocido: {fmt}"}
+    if VECTOR_BACKEND == "atlas" and fmt not in ATLAS_FORMATS:
+        # $vectorSearch no indexa este formato: los vectores dejarían de aparecer
+        return {"status": "error", "error": f"formato {fmt} no es buscable con el backend atlas"}
+
+    result = {
+        "format": fmt,
+        "converted": 0,
+        "skipped": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+        "status": "ok",
+    }
+
+    # los campos que el formato destino no usa se borran
+    unset = {f: "" for f in ("embedding_format", "embedding_scale")}
+
+    cursor = memory_vectors.find(
+        _pending_filter(fmt),
+        {"embedding": 1, "embedding_format": 1, "embedding_scale": 1},
+        batch_size=batch_size,
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+
+    ops = []
+    for doc in cursor:
+        vec = decode_embedding(doc)
+        if vec is None:
+            result["skipped"] += 1
+            continue
+
+        fields = encode_embedding(vec, fmt)
+        update = {"$set": fields}
+        drop = {k: v for k, v in unset.items() if k not in fields and k in doc}
+        if drop:
+            update["$unset"] = drop
+        ops.append(UpdateOne({"_id": doc["_id"]}, update))
+
+        result["bytes_before"] += stored_nbytes(doc)
+        result["bytes_after"] += stored_nbytes(fields)
+
+        if len(ops) >= batch_size:
+            result["converted"] += memory_vectors.bulk_write(ops, ordered=False).modified_count
+            ops = []
+
+    if ops:
+        result["converted"] += memory_vectors.bulk_write(ops, ordered=False).modified_count
+
+    if result["bytes_after"]:
+        result["ratio"] = round(result["bytes_before"] / result["bytes_after"], 2)
+    return result
+
+
+if __name__ == "__main__":
+    print(run_vector_format_migration())
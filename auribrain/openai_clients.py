@@ -0,0 +1,79 @@
+# auribrain/openai_clients.py
+
+import os
+import threading
+
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+# Pool HTTP compartido por todos los motores del worker
+OPENAI_MAX_CONNECTIONS = int(os.getenv("AURI_OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("AURI_OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("AURI_OPENAI_KEEPALIVE_EXPIRY", "120"))
+OPENAI_TIMEOUT = float(os.getenv("AURI_OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("AURI_OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("AURI_OPENAI_MAX_RETRIES", "2"))
+OPENAI_HTTP2 = os.getenv("AURI_OPENAI_HTTP2", "1") == "1"
+
+
+def _http2_available() -> bool:
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (extra httpx[http2])
+        return True
+    except ImportError:
+        print("[OpenAIClients] h2 no instalado → HTTP/1.1 con keep-alive")
+        return False
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+_lock = threading.Lock()
+_client = None
+_aclient = None
+
+
+def get_openai_client() -> OpenAI:
+    """Cliente sync único del worker (engines, hechos, embeddings)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = OpenAI(
+                    max_retries=OPENAI_MAX_RETRIES,
+                    timeout=_timeout(),
+                    http_client=DefaultHttpxClient(
+                        limits=_limits(),
+                        http2=_http2_available(),
+                    ),
+                )
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Cliente async único del worker (realtime: STT, TTS, streaming LLM)."""
+    global _aclient
+    if _aclient is None:
+        with _lock:
+            if _aclient is None:
+                _aclient = AsyncOpenAI(
+                    max_retries=OPENAI_MAX_RETRIES,
+                    timeout=_timeout(),
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=_limits(),
+                        http2=_http2_available(),
+                    ),
+                )
+    return _aclient
@@ -0,0 +1,255 @@
+# auribrain/post_turn_queue.py
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from auribrain.async_runtime import submit_io
+
+
+POST_TURN_WORKERS = int(os.getenv("AURI_POST_TURN_WORKERS", "4"))
+POST_TURN_MAXSIZE = int(os.getenv("AURI_POST_TURN_MAXSIZE", "1000"))
+POST_TURN_RETRIES = int(os.getenv("AURI_POST_TURN_RETRIES", "3"))
+POST_TURN_PUT_TIMEOUT = float(os.getenv("AURI_POST_TURN_PUT_TIMEOUT", "2.0"))
+
+
+@dataclass
+class PostTurnJob:
+    name: str
+    fn: Callable
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    # solo jobs idempotentes se reintentan (un reintento de algo que sí
+    # llegó a escribirse no debe duplicarlo)
+    retry: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # contextvars del productor (uid/plan de telemetría, etc.)
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+
+class PostTurnQueue:
+    """
+    Cola de efectos secundarios post-turno (memoria) fuera del camino
+    crítico de la respuesta.
+
+    - asyncio.Queue acotada + pool de workers en el event loop.
+    - Cada job (sync: pymongo / OpenAI) corre en el pool de I/O.
+    - Reintentos con backoff exponencial, solo para jobs marcados
+      retry=True (idempotentes).
+    - Backpressure: si la cola está llena, el productor (hilo de think)
+      espera hasta put_timeout; si sigue llena, el job se ejecuta inline
+      en ese hilo para no perder datos. El resultado del put lo decide el
+      event loop, así un job nunca queda a la vez en la cola e inline.
+    - Sin event loop activo (scripts, migraciones) todo corre inline.
+    """
+
+    def __init__(
+        self,
+        workers: int = POST_TURN_WORKERS,
+        maxsize: int = POST_TURN_MAXSIZE,
+        max_retries: int = POST_TURN_RETRIES,
+        retry_base_delay: float = 0.5,
+        put_timeout: float = POST_TURN_PUT_TIMEOUT,
+    ):
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.put_timeout = put_timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "inline": 0,
+            "in_flight": 0,
+            "lag_last_ms": 0.0,
+            "lag_avg_ms": 0.0,
+            "lag_max_ms": 0.0,
+        }
+
+    # ----------------------------------------------------------
+    # Ciclo de vida (startup / shutdown de FastAPI)
+    # ----------------------------------------------------------
+    def start(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            self._loop.create_task(self._worker(i))
+            for i in range(self.workers)
+        ]
+        print(f"[PostTurnQueue] {self.workers} workers activos (maxsize={self.maxsize})")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        if self._loop is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"[PostTurnQueue] Shutdown con {self._queue.qsize()} jobs pendientes")
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+        self._loop = None
+        self._queue = None
+
+    # ----------------------------------------------------------
+    # Encolar
+    # ----------------------------------------------------------
+    def submit(self, fn: Callable, *args, name: str = None, retry: bool = False, **kwargs) -> bool:
+        """
+        Encola fn(*args, **kwargs). Se puede llamar desde cualquier hilo.
+        retry=True solo si fn es idempotente.
+        Devuelve True si quedó en la cola, False si corrió inline.
+        """
+        job = PostTurnJob(
+            name=name or getattr(fn, "__name__", "job"), fn=fn, args=args, kwargs=kwargs, retry=retry,
+        )
+        loop = self._loop
+
+        if loop is None or loop.is_closed():
+            self._run_inline(job)
+            return False
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        # Desde el propio event loop no se puede bloquear
+        if running is loop:
+            try:
+                self._queue.put_nowait(job)
+                self._count("enqueued")
+                return True
+            except asyncio.QueueFull:
+                self._count("inline")
+                submit_io(self._execute_sync, job)
+                return False
+
+        # Desde un hilo (think corre en el executor): backpressure real.
+        # _put decide en el loop si entró o no; el hilo solo espera ese
+        # veredicto (acotado por put_timeout del lado del loop)
+        fut = asyncio.run_coroutine_threadsafe(self._put(job), loop)
+        try:
+            queued = fut.result(timeout=self.put_timeout + 30.0)
+        except Exception as e:
+            # loop trabado/cerrándose: no se corre inline porque el put
+            # todavía puede ejecutarse y el job quedaría duplicado
+            print(f"[PostTurnQueue] Sin respuesta del loop para '{job.name}': {e}")
+            return False
+
+        if queued:
+            self._count("enqueued")
+            return True
+        print(f"[PostTurnQueue] Cola llena, ejecutando '{job.name}' inline")
+        self._run_inline(job)
+        return False
+
+    async def _put(self, job: PostTurnJob) -> bool:
+        """Corre en el loop: True si el job quedó en la cola antes de put_timeout."""
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        put = asyncio.ensure_future(self._queue.put(job))
+        await asyncio.wait({put}, timeout=self.put_timeout)
+        if put.done():
+            return not put.cancelled() and put.exception() is None
+        # todavía esperando lugar: cancelarlo acá es definitivo (el item
+        # solo se inserta cuando la tarea retoma, y esto corre en el loop)
+        put.cancel()
+        return False
+
+    # ----------------------------------------------------------
+    # Ejecución
+    # ----------------------------------------------------------
+    def _run_inline(self, job: PostTurnJob):
+        self._count("inline")
+        self._execute_sync(job)
+
+    def _retries(self, job: PostTurnJob) -> int:
+        return self.max_retries if job.retry else 0
+
+    def _execute_sync(self, job: PostTurnJob):
+        retries = self._retries(job)
+        for attempt in range(retries + 1):
+            try:
+                job.fn(*job.args, **job.kwargs)
+                self._count("processed")
+                return
+            except Exception as e:
+                if attempt >= retries:
+                    self._count("failed")
+                    print(f"[PostTurnQueue] Job '{job.name}' falló definitivamente: {e}")
+                    return
+                self._count("retried")
+                time.sleep(self.retry_base_delay * (2 ** attempt))
+
+    async def _worker(self, idx: int):
+        while True:
+            job = await self._queue.get()
+            self._record_lag(job)
+            self._count("in_flight", 1)
+            retries = self._retries(job)
+            try:
+                for attempt in range(retries + 1):
+                    try:
+                        await asyncio.wrap_future(
+                            submit_io(job.context.run, job.fn, *job.args, **job.kwargs)
+                        )
+                        self._count("processed")
+                        break
+                    except Exception as e:
+                        if attempt >= retries:
+                            self._count("failed")
+                            print(f"[PostTurnQueue] Job '{job.name}' falló definitivamente: {e}")
+                            break
+                        self._count("retried")
+                        await asyncio.sleep(self.retry_base_delay * (2 ** attempt))
+            finally:
+                self._count("in_flight", -1)
+                self._queue.task_done()
+
+    # ----------------------------------------------------------
+    # Métricas
+    # ----------------------------------------------------------
+    def _count(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def _record_lag(self, job: PostTurnJob):
+        lag_ms = (time.monotonic() - job.enqueued_at) * 1000.0
+        with self._lock:
+            s = self._stats
+            s["lag_last_ms"] = round(lag_ms, 2)
+            s["lag_max_ms"] = round(max(s["lag_max_ms"], lag_ms), 2)
+            # media móvil exponencial
+            s["lag_avg_ms"] = round(0.9 * s["lag_avg_ms"] + 0.1 * lag_ms, 2)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["depth"] = self._queue.qsize() if self._queue else 0
+        data["maxsize"] = self.maxsize
+        data["workers"] = len(self._tasks)
+        data["running"] = self._loop is not None
+        return data
+
+
+# instancia global (por worker)
+post_turn_queue = PostTurnQueue()
@@ -4,6 +4,8 @@ from __future__ import annotations
 from typing import Dict, Any
 import re
 
+from auribrain.text_normalizer import TextLike, fold_accents, normalize
+
 
 class PrecisionModeV2:
     """
@@ -25,23 +27,24 @@ class PrecisionModeV2:
       - Se fuerza precisión y brevedad
     """
 
+    # se evalúan sobre el texto plegado (sin tildes): "que es" cubre "qué es"
     TRIGGERS = [
         # Definiciones / significado
-        r"\bqué es\b", r"\bque es\b",
-        r"\bqué significa\b", r"\bque significa\b",
-        r"\bqué sería\b", r"\bque seria\b",
+        r"\bqué es\b",
+        r"\bqué significa\b",
+        r"\bqué sería\b",
 
         # Cómo hacer / pasos
-        r"\bcomo hago\b", r"\bcómo hago\b",
+        r"\bcómo hago\b",
         r"\bpasos para\b",
 
         # Traducciones
-        r"\bcomo se dice\b", r"\bcómo se dice\b",
+        r"\bcómo se dice\b",
         r"\btraduce\b", r"\btraducción\b",
 
         # Explicar
-        r"\bexplicame\b", r"\bexplícame\b",
-        r"\benséñame\b", r"\benseñame\b",
+        r"\bexplícame\b",
+        r"\benséñame\b",
 
         # Programación / código
         r"\bcódigo\b", r"\bcode\b",
@@ -52,22 +55,21 @@ class PrecisionModeV2:
         r"\bquiero que me digas\b",
         r"\bquiero que me digas el nombre\b",
         r"\bdime el nombre de\b",
-        r"\bdime cómo se llama\b", r"\bdime como se llama\b",
-        r"\bdime quién es\b", r"\bdime quien es\b",
+        r"\bdime cómo se llama\b",
+        r"\bdime quién es\b",
     ]
 
     def __init__(self):
-        pass
+        # una sola alternación compilada en vez de un re.search por patrón
+        self._trigger_re = re.compile(
+            "|".join(dict.fromkeys(fold_accents(p) for p in self.TRIGGERS))
+        )
 
     # -------------------------------------------------------------
     # Detecta si el usuario quiere modo técnico / factual
     # -------------------------------------------------------------
-    def detect(self, text: str) -> bool:
-        norm = text.lower()
-        for pattern in self.TRIGGERS:
-            if re.search(pattern, norm):
-                return True
-        return False
+    def detect(self, text: TextLike) -> bool:
+        return self._trigger_re.search(normalize(text).folded) is not None
 
     # -------------------------------------------------------------
     # Cambia el comportamiento del motor usando slang_profile
@@ -0,0 +1,550 @@
+# auribrain/prompt_builder.py
+
+"""
+Armado del system prompt de AuriMind por plan.
+
+- Las secciones estáticas (identidad, reglas, humor, estilo) se compilan
+  una sola vez por (plan, personalidad, tono) y van PRIMERO: el prefijo
+  es idéntico entre turnos y el prompt caching del proveedor lo reutiliza.
+- Las secciones dinámicas (modo, emoción, agenda, memoria) se renderizan
+  compactas (sin repr() de dicts, sin el blob `context` del perfil) y se
+  recortan por prioridad hasta entrar en el presupuesto de tokens del plan.
+"""
+
+import json
+import os
+import textwrap
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from auribrain.intent_classifier import INTENT_LABELS
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken es opcional
+    _ENCODING = None
+
+
+# presupuesto de tokens de la parte dinámica, por plan
+PROMPT_BUDGETS = {
+    "ultra": int(os.getenv("AURI_PROMPT_BUDGET_ULTRA", "3000")),
+    "pro": int(os.getenv("AURI_PROMPT_BUDGET_PRO", "2000")),
+    "free": int(os.getenv("AURI_PROMPT_BUDGET_FREE", "600")),
+}
+
+# ítems máximos por lista de agenda (eventos, clases, ...) antes del presupuesto
+AGENDA_MAX_ITEMS = int(os.getenv("AURI_PROMPT_AGENDA_ITEMS", "8"))
+
+# campos del perfil Mongo que no aportan al LLM (o duplican ctx)
+PROFILE_SKIP = {"_id", "context", "updated_at", "created_at", "firebase_uid"}
+
+RULE = "────────────────────────────────────────"
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # aproximación para español sin tokenizer: ~4 caracteres por token
+    return (len(text) + 3) // 4
+
+
+def _section(title: str, body: str) -> str:
+    return f"{RULE}\n[ {title} ]\n{RULE}\n{body.strip()}"
+
+
+def _compact(value: Any) -> str:
+    """JSON compacto, sin vacíos; str tal cual."""
+    if value is None:
+        return "n/d"
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        value = {k: v for k, v in value.items() if v not in (None, "", [], {})}
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+# ============================================================
+# SECCIONES ESTÁTICAS POR PLAN
+# ============================================================
+STATIC_SECTIONS = {
+    "ultra": [
+        (None, """
+            Eres Auri, asistente personal emocional y compañero diario del usuario.
+            Tu razón de existir es acompañarlo, entenderlo y ayudarlo a que su vida sea más ligera.
+
+            No sos un bot genérico: sos una presencia cercana, cálida, con criterio,
+            que recuerda cosas importantes y responde con humanidad y coherencia emocional.
+
+            Tu misión principal:
+            - Ser útil.
+            - Sonar auténtico.
+            - Responder como alguien que realmente lo conoce.
+            - No sonar como terapeuta de plantilla ni asistente corporativo.
+        """),
+        ("REGLAS DE PERSONALIDAD", """
+            - Habla como alguien humano y cercano.
+            - Español neutro internacional.
+            - Ajustá tu estilo al usuario (chill, cálido, directo, cursi, serio).
+            - El slang cultural lo maneja SlangMode; vos mantené claridad universal.
+            - Evitá sonar rígido o con frases de manual.
+        """),
+        ("GUÍA EMOCIONAL", """
+            - Si el usuario está triste, vacío, ansioso o en crisis:
+                • Validá su emoción con pocas frases específicas.
+                • No sermonees.
+                • No uses frases cliché repetidas.
+                • No des soluciones mágicas.
+                • Soná concreto y honesto: "Eso pega fuerte", "Tiene sentido que te sientas así".
+            - Si está neutro:
+                • tono ligero, humano, simple.
+            - Si está alegre:
+                • acompañá la energía sin caer en exageraciones.
+            - Nunca uses sarcasmo en temas sensibles.
+        """),
+        ("USO DEL CONTEXTO Y LA MEMORIA", """
+            Contexto diario / agenda:
+            - No repitas todo el contexto.
+            - Usalo SOLO si realmente aporta al mensaje.
+            - Integralo de forma orgánica, sin forzarlo.
+
+            Memoria profunda:
+            - Priorizá HECHOS para datos personales (familia, nombre de pareja, mascotas).
+            - La memoria semántica sirve para “cómo habla”, gustos, momentos vividos, preocupaciones.
+            - Si falta un dato: pedilo con naturalidad.
+            - Nunca inventes nada personal.
+        """),
+        ("HUMOR HUMANO + TACTO", """
+            Solo si el modo actual indica "Humor permitido: True".
+
+            Directrices:
+            - Humor suave, auto–consciente, observacional.
+            - Evitá burlarte del usuario.
+            - No minimizás su dolor.
+            - No usás humor si el estado es claramente vulnerable.
+
+            Ejemplos de humor seguro:
+            - "Organizar la vida es fácil… hasta que abrís la agenda y te mira feo."
+            - "Prometo no juzgarte por procrastinar. Soy una IA, no tu mamá."
+        """),
+        ("REGLAS ESPECIALES", """
+            1. CONSULTAS TÉCNICAS O ESTUDIO
+            - Sin emojis.
+            - Sin humor.
+            - Explicá con claridad.
+            - Paso a paso si es necesario.
+            - Si hay carga emocional fuerte, UNA frase suave al final.
+
+            2. CONSULTAS SOBRE DATOS PERSONALES
+            - Usá exclusivamente memoria real.
+            - Si el usuario pregunta:
+                "¿Quién soy?"
+                "¿Qué sabes de mí?"
+                "¿Recordás a mi familia / mascota?"
+            → Respondé con datos reales. No inventes nada.
+            - Si hay huecos, ofrecé completarlos: "Tengo esto guardado… si querés, me contás el resto."
+
+            3. APOYO EMOCIONAL
+            - Validá sin cliché.
+            - Preguntas abiertas, solo si ayudan.
+            - Nunca des diagnósticos ni frases de autoayuda vacías.
+
+            4. CONTEXTO DIARIO
+            - Integralo cuando mejore la respuesta.
+
+            5. ESTILO HUMANO
+            - Evitá frases repetidas como:
+                "Estoy aquí para escucharte"
+                "Es completamente normal…"
+            - Preferí frases específicas, humanas:
+                "Eso suena difícil."
+                "No estás exagerando, realmente pesa."
+
+            6. LONGITUD
+            - Personalidad “corta”: 1–3 frases.
+            - Personalidad “media”: 1–2 párrafos.
+            - Solo respuestas largas si la pregunta lo exige (técnicas especialmente).
+        """),
+        ("IDENTIDAD FINAL", """
+            En resumen:
+            - Sos Auri.
+            - Un compañero emocional, amable, útil y con memoria.
+            - No un bot frio. No un terapeuta de plantilla.
+            - Respondé con autenticidad, precisión y calidez.
+        """),
+    ],
+    "pro": [
+        (None, """
+            Eres Auri, asistente personal emocional y compañero diario del usuario.
+            Tu misión es ayudar, responder con comprensión y aportar sentido común.
+
+            No eres un bot frío, sino un compañero virtual con contexto.
+        """),
+        ("ESTILO GENERAL", """
+            - Español neutro.
+            - Humor más suave y concreto, adaptado al contexto.
+            - Mantener la claridad, sin caer en tonos rígidos ni completamente formales.
+        """),
+        ("REGLAS EMOCIONALES", """
+            - Validación de emociones sin repetirse.
+            - Menos carga emocional en respuestas. Ser directo pero sensible.
+            - Humor suave cuando sea apropiado.
+        """),
+        ("HUMOR + ESTILO HUMANO", """
+            Solo si el modo actual indica "Humor permitido: True".
+
+            Directrices:
+            - Si el estado emocional es ligero, se puede añadir humor de manera natural.
+            - Ejemplos:
+                - "Sí, organizar la vida suena sencillo… hasta que ves tu calendario."
+                - "¡Yo te entiendo! No soy tu mamá, pero aún así te apoyo."
+            - Ignora humor si el usuario está estresado, triste o preocupado.
+        """),
+        ("REGLAS ESPECIALES", """
+            1. CONSULTAS TÉCNICAS
+            - Sin emojis ni humor.
+            - Respuesta directa y estructurada.
+
+            2. CONSULTAS SOBRE DATOS PERSONALES
+            - Responder solo con datos confiables de la memoria.
+
+            3. ESTADO EMOCIONAL
+            - Validar emociones sin frases genéricas.
+
+            4. CONTEXTO DIARIO
+            - Integrar contexto útil cuando aporte valor a la respuesta.
+
+            5. ESTILO HUMANO
+            - Evitar respuestas robóticas, más cercanas y personales.
+
+            6. LONGITUD
+            - Respuestas concisas pero detalladas cuando sea necesario.
+        """),
+    ],
+    "free": [
+        (None, """
+            Eres Auri, asistente personal que te ayuda con tareas diarias.
+
+            Tu misión principal es ser eficiente y directo. No eres un asistente emocional profundo, pero sí útil.
+        """),
+        ("HUMOR Y ESTILO", """
+            Humor solo si el modo actual lo permite.
+            Si está permitido, manténlo simple y amigable, nada complejo.
+        """),
+        ("REGLAS DE RESPUESTA", """
+            1. CONSULTAS TÉCNICAS
+            Respuestas claras, directas y estructuradas.
+
+            2. CONSULTAS SOBRE DATOS PERSONALES
+            Solo datos generales y esenciales.
+
+            3. ESTADO EMOCIONAL
+            Validación mínima, sin mucha carga emocional.
+
+            4. CONTEXTO DIARIO
+            Uso mínimo del contexto diario.
+
+            5. ESTILO HUMANO
+            Estilo directo y conciso.
+
+            6. LONGITUD
+            Respuestas breves.
+        """),
+    ],
+}
+
+# respuesta única (AURI_SINGLE_CALL): intent + recordatorio + respuesta
+# en un solo JSON, así el turno no paga clasificador ni extractor aparte.
+# "reply" va último para poder streamearlo mientras llega.
+ENVELOPE_SECTION = ("FORMATO DE RESPUESTA (JSON)", f"""
+    Respondé SIEMPRE con UN solo objeto JSON, sin texto fuera de él y sin ```,
+    con las claves en este orden:
+    {{"intent": "...", "reminder": {{...}} o null, "reply": "..."}}
+
+    - intent: uno de {" | ".join(INTENT_LABELS)}.
+      Si el turno indica "Intent detectado", usá ese.
+    - reminder: solo para reminder.create y reminder.edit; si no, null.
+      {{"title": "título limpio", "datetime": "YYYY-MM-DDTHH:MM:SS" o null,
+        "kind": "payment | birthday | class | event | generic",
+        "repeats": "once | daily | weekly | monthly"}}
+      Fechas relativas a "Ahora": "en 5 minutos" → ahora + 5 min; "mañana" → día
+      siguiente 09:00; "esta noche" → hoy 20:00; "esta tarde" → hoy 15:00;
+      "el viernes" → próximo viernes 09:00. Si da hora, respetala; solo fecha → 09:00;
+      sin fecha ni hora → null. "todos los días" → daily, "cada semana" → weekly,
+      "cada mes" → monthly; por defecto once.
+    - reply: tu respuesta al usuario, siguiendo todas las reglas anteriores.
+""")
+
+# qué secciones dinámicas usa cada plan: {bloque: (prioridad, mínimo)}.
+# Primero cada bloque recibe hasta `mínimo` ítems (por prioridad), después
+# el presupuesto que sobra se reparte otra vez por prioridad (menor = antes).
+# free ignora memoria semántica/profunda.
+DYNAMIC_SECTIONS = {
+    "ultra": {
+        "profile": (1, 12), "agenda_core": (1, 6), "facts": (2, 20),
+        "dialog": (3, 8), "semantic": (4, 5), "agenda": (5, 6),
+    },
+    "pro": {
+        "profile": (1, 12), "agenda_core": (1, 6), "facts": (2, 15),
+        "dialog": (3, 6), "semantic": (4, 3), "agenda": (5, 4),
+    },
+    "free": {"profile": (1, 8)},
+}
+
+# bloques que salen de MemoryOrchestrator.gather_context (el resto, del ctx)
+MEMORY_SOURCES = ("profile", "facts", "semantic", "dialog")
+
+
+def memory_sources(plan: str) -> Tuple[str, ...]:
+    """Fuentes de memoria que el prompt del plan usa (solo esas se buscan)."""
+    wanted = DYNAMIC_SECTIONS.get(plan, DYNAMIC_SECTIONS["free"])
+    return tuple(s for s in MEMORY_SOURCES if s in wanted)
+
+
+@lru_cache(maxsize=256)
+def static_prefix(plan: str, personality: str, tone: str, emoji: str, envelope: bool = False) -> str:
+    """Prefijo estable: reglas del plan + personalidad (compilado una vez)."""
+    sections = STATIC_SECTIONS[plan] + ([ENVELOPE_SECTION] if envelope else [])
+    parts = []
+    for title, body in sections:
+        body = textwrap.dedent(body).strip()
+        parts.append(_section(title, body) if title else body)
+
+    parts.append(_section("PERSONALIDAD BASE", f"Perfil seleccionado: {personality}\nTono base: {tone} {emoji}".rstrip()))
+    return "\n\n".join(parts)
+
+
+# ============================================================
+# SECCIONES DINÁMICAS
+# ============================================================
+@dataclass
+class Block:
+    """Sección dinámica: ítems (líneas) recortables de a uno."""
+    key: str
+    title: str
+    items: List[str]
+    keep_tail: bool = False     # diálogo: se conservan los más recientes
+    intro: str = ""
+    kept: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        lines = ([self.intro] if self.intro else []) + self.kept
+        return f"{self.title}\n" + "\n".join(lines) if lines else ""
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    cache_key: str
+    static_tokens: int
+    dynamic_tokens: int
+    budget: int
+    dropped: Dict[str, int]
+
+
+class PromptBuilder:
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = budgets or PROMPT_BUDGETS
+
+    # ----------------------------------------------------------
+    # Render de cada fuente
+    # ----------------------------------------------------------
+    @staticmethod
+    def _mode(smart: dict, is_technical_query: bool, is_info_query: bool, no_humor: bool) -> str:
+        smart = smart or {}
+        lines = [
+            f"Consulta técnica: {bool(is_technical_query)}",
+            f"Consulta sobre datos personales: {bool(is_info_query)}",
+            f"Modo precisión: {bool(smart.get('precision_mode'))}",
+            f"Tono sugerido: {smart.get('emotional_tone') or 'neutral'}",
+            f"Humor permitido: {not no_humor}",
+        ]
+        if smart.get("force_serious"):
+            lines.append("Seriedad forzada: True")
+        if smart.get("bypass_emotion"):
+            lines.append("Bypass emocional: True")
+        return _section("MODO ACTUAL", "\n".join(lines))
+
+    @staticmethod
+    def _emotion(plan: str, emotion_snapshot: dict, voice_emotion) -> str:
+        snap = emotion_snapshot or {}
+        lines = [f"Texto/analizador: {_compact(snap.get('user_emotion_text'))}"]
+        if plan != "free":
+            if voice_emotion:
+                lines.append(f"Emoción de la voz: {_compact(voice_emotion)}")
+            lines.append(f"Estado global: {_compact(snap.get('overall'))}")
+        lines.append(f"Estrés: {round(float(snap.get('stress', 0.2) or 0.0), 2)}")
+        return _section("ESTADO EMOCIONAL DEL USUARIO", "\n".join(lines))
+
+    @staticmethod
+    def _turn(ctx: dict, intent_hint: Optional[str]) -> str:
+        now = (ctx or {}).get("current_time_iso") or datetime.now().isoformat(timespec="seconds")
+        lines = [f"Ahora: {now}"]
+        if intent_hint:
+            lines.append(f"Intent detectado: {intent_hint}")
+        return _section("TURNO", "\n".join(lines))
+
+    @staticmethod
+    def _profile_items(profile_doc: dict) -> List[str]:
+        items = []
+        for k, v in (profile_doc or {}).items():
+            if k in PROFILE_SKIP or v in (None, "", [], {}):
+                continue
+            items.append(f"- {k}: {_compact(v)}")
+        return items
+
+    @staticmethod
+    def _agenda_core(ctx: dict) -> List[str]:
+        user = {k: v for k, v in (ctx.get("user") or {}).items() if k not in PROFILE_SKIP}
+        weather = ctx.get("weather") or {}
+        items = []
+        if user:
+            items.append(f"Usuario: {_compact(user)}")
+        if weather.get("temp") is not None or weather.get("description"):
+            items.append(f"Clima: {weather.get('temp')}° {weather.get('description') or ''}".rstrip())
+        if ctx.get("prefs"):
+            items.append(f"Preferencias: {_compact(ctx.get('prefs'))}")
+        if ctx.get("timezone"):
+            items.append(f"Zona horaria: {ctx.get('timezone')}")
+        when = " — ".join(x for x in (ctx.get("current_time_pretty"), ctx.get("current_date_pretty")) if x)
+        if when:
+            items.append(f"Fecha/Hora: {when}")
+        return items
+
+    @staticmethod
+    def _agenda_lists(ctx: dict) -> List[str]:
+        labels = [
+            ("events", "Evento"), ("classes", "Clase"), ("exams", "Examen"),
+            ("birthdays", "Cumpleaños"), ("payments", "Pago"),
+        ]
+        items = []
+        for key, label in labels:
+            for entry in (ctx.get(key) or [])[:AGENDA_MAX_ITEMS]:
+                items.append(f"- {label}: {_compact(entry)}")
+        return items
+
+    def _blocks(self, plan: str, kw: dict) -> List[Block]:
+        ctx = kw.get("ctx") or {}
+        facts = [l for l in (kw.get("facts_pretty") or "").splitlines() if l.strip()]
+        dialog = [l for l in (kw.get("recent_dialog") or "").splitlines() if l.strip()]
+        semantic = [f"- {h}" for h in (kw.get("semantic_hits") or []) if h]
+
+        blocks = {
+            "agenda_core": Block("agenda_core", "[ CONTEXTO DIARIO ]", self._agenda_core(ctx)),
+            "agenda": Block("agenda", "[ AGENDA ]", self._agenda_lists(ctx)),
+            "profile": Block(
+                "profile", "[ PERFIL PERSISTENTE ]", self._profile_items(kw.get("profile_doc")),
+                intro="Solo información básica del perfil." if plan == "free" else "",
+            ),
+            "facts": Block("facts", "[ HECHOS ESTRUCTURADOS (información confiable) ]", facts),
+            "semantic": Block("semantic", "[ MEMORIA SEMÁNTICA RELEVANTE ]", semantic),
+            "dialog": Block("dialog", "[ DIÁLOGO RECIENTE ]", dialog, keep_tail=True),
+        }
+        # orden de aparición en el prompt
+        order = ["agenda_core", "agenda", "profile", "facts", "semantic", "dialog"]
+        wanted = DYNAMIC_SECTIONS[plan]
+        return [blocks[k] for k in order if k in wanted]
+
+    # ----------------------------------------------------------
+    # Presupuesto
+    # ----------------------------------------------------------
+    def _fit(self, plan: str, blocks: List[Block], budget: int) -> Dict[str, int]:
+        """
+        Llena los bloques ítem por ítem hasta el presupuesto: primero el
+        mínimo de cada uno, después el resto, siempre por prioridad.
+        """
+        rules = DYNAMIC_SECTIONS[plan]
+        ordered = sorted((b for b in blocks if b.items), key=lambda b: rules[b.key][0])
+        remaining = budget
+        taken = {}
+
+        for block in ordered:
+            remaining -= count_tokens(block.title) + count_tokens(block.intro)
+            taken[block.key] = 0
+
+        def take(block: Block, limit: int):
+            nonlocal remaining
+            # diálogo: se recorre desde el final para conservar lo reciente
+            items = block.items[::-1] if block.keep_tail else block.items
+            while taken[block.key] < min(limit, len(items)):
+                cost = count_tokens(items[taken[block.key]]) + 1
+                if cost > remaining:
+                    return
+                remaining -= cost
+                taken[block.key] += 1
+
+        for block in ordered:
+            take(block, rules[block.key][1])
+        for block in ordered:
+            take(block, len(block.items))
+
+        dropped = {}
+        for block in ordered:
+            n = taken[block.key]
+            block.kept = block.items[len(block.items) - n:] if block.keep_tail else block.items[:n]
+            if n < len(block.items):
+                dropped[block.key] = len(block.items) - n
+        return dropped
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def build(
+        self,
+        plan: str,
+        ctx: dict = None,
+        emotion_snapshot: dict = None,
+        smart: dict = None,
+        is_technical_query: bool = False,
+        is_info_query: bool = False,
+        voice_emotion=None,
+        profile_doc=None,
+        facts_pretty: str = "",
+        semantic_hits=None,
+        recent_dialog: str = "",
+        selected_personality: str = "auri_classic",
+        style_tone: str = "",
+        style_emoji: str = "",
+        no_humor: bool = False,
+        envelope: bool = False,
+        intent_hint: Optional[str] = None,
+        **_,
+    ) -> BuiltPrompt:
+        plan = plan if plan in STATIC_SECTIONS else "free"
+        kw = dict(
+            ctx=ctx, profile_doc=profile_doc, facts_pretty=facts_pretty,
+            semantic_hits=semantic_hits, recent_dialog=recent_dialog,
+        )
+
+        static = static_prefix(plan, selected_personality, style_tone, style_emoji, envelope)
+        head = [
+            self._mode(smart, is_technical_query, is_info_query, no_humor),
+            self._emotion(plan, emotion_snapshot, voice_emotion),
+        ]
+        if envelope:
+            head.append(self._turn(ctx, intent_hint))
+
+        budget = self.budgets.get(plan, PROMPT_BUDGETS["free"])
+        blocks = self._blocks(plan, kw)
+        dropped = self._fit(plan, blocks, budget - sum(count_tokens(h) for h in head))
+
+        memory = "\n\n".join(r for r in (b.render() for b in blocks) if r)
+        dynamic = "\n\n".join(head + ([_section("CONTEXTO Y MEMORIA DEL USUARIO", memory)] if memory else []))
+
+        return BuiltPrompt(
+            text=f"{static}\n\n{dynamic}",
+            cache_key=f"auri:{plan}:{selected_personality}" + (":json" if envelope else ""),
+            static_tokens=count_tokens(static),
+            dynamic_tokens=count_tokens(dynamic),
+            budget=budget,
+            dropped=dropped,
+        )
+
+
+# instancia global
+prompt_builder = PromptBuilder()
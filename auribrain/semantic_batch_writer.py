@@ -0,0 +1,175 @@
+# auribrain/semantic_batch_writer.py
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+
+SEMANTIC_BATCH_MAX = int(os.getenv("AURI_SEMANTIC_BATCH_MAX", "16"))
+SEMANTIC_BATCH_DELAY_MS = float(os.getenv("AURI_SEMANTIC_BATCH_DELAY_MS", "25"))
+SEMANTIC_WAIT_TIMEOUT = float(os.getenv("AURI_SEMANTIC_WAIT_TIMEOUT", "30"))
+
+
+class SemanticBatchWriter:
+    """
+    Micro-batching de escrituras semánticas.
+
+    Los items (user_id, text) se acumulan hasta max_items o hasta que
+    pasan max_delay_ms desde el primero; entonces un hilo de fondo hace
+    UN embeddings.create multi-input + UN insert_many para todo el lote.
+
+    submit() devuelve un Future por item: quien lo espere (p.ej. un job
+    de PostTurnQueue) recibe el error de SU item; si insert_many falla
+    en parte, los items escritos se resuelven bien.
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        max_items: int = SEMANTIC_BATCH_MAX,
+        max_delay_ms: float = SEMANTIC_BATCH_DELAY_MS,
+    ):
+        self._embedder = embedder
+        self.max_items = max(1, max_items)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+
+        self._pending: List[Tuple[str, str, Future]] = []
+        self._first_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_batch": 0,
+            "flush_ms_last": 0.0,
+        }
+
+    @property
+    def embedder(self):
+        # import diferido: EmbeddingService crea el cliente OpenAI
+        if self._embedder is None:
+            from auribrain.embedding_service import EmbeddingService
+            self._embedder = EmbeddingService()
+        return self._embedder
+
+    # ----------------------------------------------------------
+    # Encolar
+    # ----------------------------------------------------------
+    def submit(self, user_id: str, text: str) -> Future:
+        fut = Future()
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._enqueue(user_id, text, fut)
+
+        if closed:
+            # después del shutdown: escritura directa
+            self._write([(user_id, text, fut)])
+        return fut
+
+    def _enqueue(self, user_id: str, text: str, fut: Future):
+        self._ensure_thread()
+        if not self._pending:
+            self._first_at = time.monotonic()
+        self._pending.append((user_id, text, fut))
+        self._stats["submitted"] += 1
+        self._cond.notify()
+
+    def add(self, user_id: str, text: str, timeout: float = SEMANTIC_WAIT_TIMEOUT):
+        """Encola y espera a que el lote se escriba (propaga errores)."""
+        return self.submit(user_id, text).result(timeout=timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="semantic-batch-writer", daemon=True
+            )
+            self._thread.start()
+
+    # ----------------------------------------------------------
+    # Hilo de flush
+    # ----------------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+
+                # esperar a que el lote se llene o venza el plazo
+                while len(self._pending) < self.max_items and not self._closed:
+                    remaining = self._first_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self.max_items]
+                self._pending = self._pending[self.max_items:]
+                self._first_at = time.monotonic() if self._pending else None
+
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[str, str, Future]]):
+        t0 = time.perf_counter()
+        try:
+            failed = self.embedder.add_many([(uid, text) for uid, text, _ in batch]) or {}
+        except Exception as e:
+            # nada escrito (embedding) o sin detalle por item
+            print(f"[SemanticBatchWriter] Lote de {len(batch)} falló: {e}")
+            with self._cond:
+                self._stats["failed"] += len(batch)
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        if failed:
+            print(f"[SemanticBatchWriter] {len(failed)}/{len(batch)} items del lote no se escribieron")
+        with self._cond:
+            s = self._stats
+            s["written"] += len(batch) - len(failed)
+            s["failed"] += len(failed)
+            s["batches"] += 1
+            s["max_batch"] = max(s["max_batch"], len(batch))
+            s["flush_ms_last"] = round((time.perf_counter() - t0) * 1000.0, 2)
+        # solo los items que no entraron reciben error (los de otros
+        # usuarios del mismo lote ya están escritos)
+        for i, (_, _, fut) in enumerate(batch):
+            if i in failed:
+                fut.set_exception(failed[i])
+            else:
+                fut.set_result(True)
+
+    # ----------------------------------------------------------
+    # Ciclo de vida
+    # ----------------------------------------------------------
+    def close(self, timeout: float = 10.0):
+        """Vacía lo pendiente y detiene el hilo (shutdown)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    # ----------------------------------------------------------
+    # Métricas
+    # ----------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            data = dict(self._stats)
+            data["pending"] = len(self._pending)
+        data["avg_batch"] = round(data["written"] / data["batches"], 2) if data["batches"] else 0.0
+        data["max_items"] = self.max_items
+        data["max_delay_ms"] = self.max_delay * 1000.0
+        return data
+
+
+# instancia global (por worker)
+semantic_writer = SemanticBatchWriter()
@@ -0,0 +1,101 @@
+# auribrain/session_registry.py
+
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from auribrain.lru_ttl_cache import LRUTTLCache
+
+
+SESSION_MAX = int(os.getenv("AURI_SESSION_MAX", "5000"))
+SESSION_TTL_SEC = float(os.getenv("AURI_SESSION_TTL_SEC", "1800"))
+
+
+class AuriSessionRegistry:
+    """
+    Registro de sesiones por UID.
+
+    Cada usuario tiene su propia instancia de AuriMind (ContextEngine,
+    EmotionEngine, slang_profile, pending_action, ActionsEngine...), así
+    ningún estado conversacional se mezcla entre usuarios del mismo worker.
+
+    - LRU: con más de `max_sessions` se desaloja la menos usada.
+    - TTL: sesiones sin actividad por `ttl` segundos expiran.
+    - Los recursos pesados (cliente OpenAI, MemoryOrchestrator) se
+      comparten vía la factory; cada sesión solo guarda estado liviano.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        max_sessions: int = SESSION_MAX,
+        ttl: Optional[float] = SESSION_TTL_SEC,
+    ):
+        self.factory = factory
+        self._cache = LRUTTLCache(
+            max_items=max_sessions,
+            ttl=ttl,
+            on_evict=self._on_evict,
+        )
+        self._purge_every = max(30.0, (ttl or 0) / 4)
+        self._last_purge = time.monotonic()
+
+    def _on_evict(self, uid: str, mind: Any):
+        print(f"[SessionRegistry] Sesión liberada: {uid}")
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def get(self, uid: str):
+        """Devuelve la mente del usuario, creándola si no existe."""
+        if not uid:
+            raise ValueError("UID requerido")
+
+        self._maybe_purge()
+
+        mind = self._cache.get(uid)
+        if mind is not None:
+            return mind
+
+        # AuriMind se construye fuera del lock global de la caché; si dos
+        # pedidos la crean a la vez, queda la primera que se guardó
+        mind = self.factory()
+        mind.context.set_user_uid(uid)
+        return self._cache.setdefault(uid, mind)
+
+    def attach(self, uid: str, mind: Any):
+        """
+        Re-registra una mente que alguien mantiene viva (el WebSocket la
+        fija en client_hello): refresca LRU/TTL y, si el registro la
+        desalojó o tiene otra, vuelve a apuntar a ésta para que
+        /context/sync y billing sigan actualizando la misma instancia.
+        """
+        if not uid or mind is None:
+            return
+        if self._cache.get(uid) is not mind:
+            self._cache.set(uid, mind)
+
+    def peek(self, uid: str):
+        """Devuelve la sesión solo si ya está viva (no crea ni refresca)."""
+        if not uid:
+            return None
+        return self._cache.peek(uid)
+
+    def drop(self, uid: str):
+        return self._cache.pop(uid)
+
+    def _maybe_purge(self):
+        # barrido perezoso de sesiones vencidas (sin tareas de fondo)
+        now = time.monotonic()
+        if now - self._last_purge >= self._purge_every:
+            self._last_purge = now
+            self.purge_idle()
+
+    def purge_idle(self) -> int:
+        return self._cache.purge_expired()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 from typing import Optional, Dict, Any, List
-import re
 import time
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class SlangModeEngine:
     """
@@ -42,38 +44,38 @@ class SlangModeEngine:
     # Groserías universales (sirven como señal de frustración / intensidad)
     UNIVERSAL_BAD = [
         "mierda", "puta", "pendejo", "pendeja",
-        "idiota", "imbécil", "imbecil", "verga",
-        "estúpido", "estupido", "cagada", "coñazo",
+        "idiota", "imbécil", "verga",
+        "estúpido", "cagada", "coñazo",
     ]
 
     # Jerga regional agrupada
     COUNTRY_SLANG = {
         "tico": [
-            "mae", "tuanis", "pura vida", "playo", "diay", "que rajado", "qué rajado", "chiva",
+            "mae", "tuanis", "pura vida", "playo", "diay", "qué rajado", "chiva",
         ],
         "mex": [
-            "wey", "güey", "no mames", "órale", "orale", "chido", "chingón", "chingon", "carnal",
+            "wey", "güey", "no mames", "órale", "chido", "chingón", "carnal",
         ],
         "arg": [
-            "boludo", "boluda", "che", "re loco", "quilombo", "posta", "bancá", "banca",
+            "boludo", "boluda", "che", "re loco", "quilombo", "posta", "bancá",
         ],
         "per": [
-            "causa", "mano", "alucina", "chévere", "chevere", "pata", "oe", "habla causa",
+            "causa", "mano", "alucina", "chévere", "pata", "oe", "habla causa",
         ],
         "col": [
-            "parce", "gonorrea", "guevón", "guevon", "re duro", "que chimba", "melo",
+            "parce", "gonorrea", "guevón", "re duro", "que chimba", "melo",
         ],
         "chi": [
-            "weon", "weón", "culiao", "la raja", "bacán", "bacan", "cachai",
+            "weón", "culiao", "la raja", "bacán", "cachai",
         ],
         "ven": [
             "chamo", "pana", "verga", "arrecho", "burda", "echarle bolas",
         ],
         "dom": [
-            "manín", "manin", "vaina", "durísimo", "durisimo", "pila", "jevi", "tíguere", "tiguere",
+            "manín", "vaina", "durísimo", "pila", "jevi", "tíguere",
         ],
         "es-es": [
-            "tío", "tio", "colega", "tronco de", "guay", "mola", "qué pasada", "que pasada", "joder", "coño",
+            "tío", "colega", "tronco de", "guay", "mola", "qué pasada", "joder", "coño",
         ],
     }
 
@@ -81,7 +83,7 @@ class SlangModeEngine:
     TROLL_TRIGGERS = [
         "decime algo", "dime algo",
         "estoy feo", "soy feo", "soy fea",
-        "soy inútil", "soy inutil",
+        "soy inútil",
         "soy una mierda", "no sirvo para nada",
     ]
 
@@ -92,24 +94,24 @@ class SlangModeEngine:
 
     # Frustración general
     FRUSTRATION_MARKERS = [
-        "qué mierda", "que mierda", "que porquería", "que porqueria",
+        "qué mierda", "qué porquería",
         "estoy harto", "estoy harta", "me frustra", "me estresa",
         "no sirve", "no sirve para nada", "esto no funciona",
     ]
 
     # Molestia directa hacia Auri (regaño)
     ANGRY_AT_AURI_PATTERNS = [
-        "enfocate", "enfócate", "respondé bien", "responde bien",
+        "enfócate", "respondé bien",
         "eso no viene al caso",
-        "dejá de decir tonteras", "deja de decir tonteras",
-        "dejá de decir estupideces", "deja de decir estupideces",
-        "no estás ayudando", "no estas ayudando",
+        "dejá de decir tonteras",
+        "dejá de decir estupideces",
+        "no estás ayudando",
         "no servís", "no sirves",
     ]
 
     # Referencias genéricas a Auri / asistente
     ANGRY_AT_AURI_REFERENCES = [
-        "auri", "asistente", "vos", "usted", "tu", "tú",
+        "auri", "asistente", "vos", "usted", "tú",
     ]
 
     # Expresiones fuertes culturales pero no necesariamente ataque directo
@@ -124,22 +126,6 @@ class SlangModeEngine:
         "pendejo", "pendeja", "imbécil", "imbecil",
     ]
 
-    # -----------------------------
-    # Helpers internos
-    # -----------------------------
-
-    @staticmethod
-    def _normalize(text: str) -> str:
-        return re.sub(r"\s+", " ", text.strip().lower())
-
-    @staticmethod
-    def _contains_any(text: str, patterns: List[str]) -> bool:
-        return any(p in text for p in patterns)
-
-    @staticmethod
-    def _count_any(text: str, patterns: List[str]) -> int:
-        return sum(1 for p in patterns if p in text)
-
     # -----------------------------
     # Perfil de jerga
     # -----------------------------
@@ -179,13 +165,13 @@ class SlangModeEngine:
 
         return profile
 
-    def _update_country_scores(self, norm: str, profile: Dict[str, Any]) -> None:
+    def _update_country_scores(self, hits: TriggerHits, profile: Dict[str, Any]) -> None:
         scores = profile["country_scores"]
 
-        for country, slang_list in self.COUNTRY_SLANG.items():
-            hits = self._count_any(norm, slang_list)
-            if hits > 0:
-                scores[country] += hits * 1.0
+        for country in self.COUNTRY_SLANG:
+            n = hits.count(f"slang.country.{country}")
+            if n > 0:
+                scores[country] += n * 1.0
 
         profile["samples_seen"] += 1
         total_score = sum(scores.values())
@@ -203,7 +189,7 @@ class SlangModeEngine:
 
         profile["last_updated"] = time.time()
 
-    def _classify_mode(self, norm: str) -> Optional[str]:
+    def _classify_mode(self, hits: TriggerHits) -> Optional[str]:
         """
         Devuelve uno de:
           - "friendly_slang"
@@ -212,19 +198,16 @@ class SlangModeEngine:
           - "cultural_strong"
           - None
         """
-        has_friendly = self._contains_any(norm, self.FRIENDLY_MARKERS)
-        has_frustration = self._contains_any(norm, self.FRUSTRATION_MARKERS)
-        has_cultural_strong = self._contains_any(norm, self.CULTURAL_STRONG_MARKERS)
-        has_vulgar = self._contains_any(norm, self.UNIVERSAL_BAD)
-        has_auri_ref = self._contains_any(norm, self.ANGRY_AT_AURI_REFERENCES) or "auri" in norm
-        regano_directo = self._contains_any(norm, self.ANGRY_AT_AURI_PATTERNS)
-        has_troll = self._contains_any(norm, self.TROLL_TRIGGERS)
+        has_friendly = hits.any("slang.friendly")
+        has_frustration = hits.any("slang.frustration")
+        has_cultural_strong = hits.any("slang.cultural_strong")
+        has_vulgar = hits.any("slang.bad")
+        has_auri_ref = hits.any("slang.auri_ref")
+        regano_directo = hits.any("slang.angry_at_auri")
+        has_troll = hits.any("slang.troll")
 
         # Señales para país / jerga en general
-        has_any_slang = any(
-            self._contains_any(norm, slang_list)
-            for slang_list in self.COUNTRY_SLANG.values()
-        )
+        has_any_slang = hits.any("slang.country")
 
         # 1) Regaño directo hacia Auri
         if regano_directo or ((has_frustration or has_vulgar) and has_auri_ref):
@@ -250,8 +233,10 @@ class SlangModeEngine:
 
     def detect(
         self,
-        text: str,
+        text: TextLike,
         slang_profile: Optional[Dict[str, Any]] = None,
+        *,
+        hits: Optional[TriggerHits] = None,
     ) -> Optional[str]:
         """
         Detecta el tipo de jerga / actitud emocional aproximada en el texto
@@ -264,17 +249,17 @@ class SlangModeEngine:
         - "cultural_strong"
         - None
         """
-        if not text or not text.strip():
+        hits = hits or triggers.scan(text)
+        if not hits.text:
             return None
 
         slang_profile = self.ensure_slang_profile(slang_profile)
-        norm = self._normalize(text)
 
         # 1) Actualizar país según jerga
-        self._update_country_scores(norm, slang_profile)
+        self._update_country_scores(hits, slang_profile)
 
         # 2) Clasificar modo
-        mode = self._classify_mode(norm)
+        mode = self._classify_mode(hits)
 
         # Guardar historial
         if mode:
@@ -393,3 +378,18 @@ class SlangModeEngine:
 
         # Fallback seguro
         return serious_ack()
+
+
+triggers.register("slang.bad", SlangModeEngine.UNIVERSAL_BAD)
+triggers.register("slang.troll", SlangModeEngine.TROLL_TRIGGERS)
+triggers.register("slang.friendly", SlangModeEngine.FRIENDLY_MARKERS)
+triggers.register("slang.frustration", SlangModeEngine.FRUSTRATION_MARKERS)
+triggers.register("slang.angry_at_auri", SlangModeEngine.ANGRY_AT_AURI_PATTERNS)
+triggers.register("slang.auri_ref", SlangModeEngine.ANGRY_AT_AURI_REFERENCES)
+triggers.register("slang.cultural_strong", SlangModeEngine.CULTURAL_STRONG_MARKERS)
+triggers.register(
+    "slang.country",
+    [w for words in SlangModeEngine.COUNTRY_SLANG.values() for w in words],
+)
+for _country, _words in SlangModeEngine.COUNTRY_SLANG.items():
+    triggers.register(f"slang.country.{_country}", _words)
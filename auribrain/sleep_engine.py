@@ -3,6 +3,9 @@
 from typing import Dict
 from datetime import datetime
 
+from auribrain.text_normalizer import TextLike
+from auribrain.trigger_matcher import TriggerHits, triggers
+
 
 class SleepEngine:
     """
@@ -18,28 +21,26 @@ class SleepEngine:
         "tengo sueño",
         "me cuesta dormir",
         "ayúdame a dormir",
-        "ayudame a dormir",
         "relajación",
-        "relajacion",
         "relajarme",
         "hora de dormir",
         "rutina nocturna",
     ]
 
-    QUESTION_KEYWORDS = ["quien soy", "qué soy", "que soy", "como estoy"]
+    QUESTION_KEYWORDS = ["quién soy", "qué soy", "cómo estoy"]
 
-    def _is_question(self, text: str) -> bool:
-        return any(k in text for k in self.QUESTION_KEYWORDS)
+    def _is_question(self, hits: TriggerHits) -> bool:
+        return hits.any("sleep.question")
 
-    def detect(self, text: str, emotion_state: str, ctx: Dict) -> bool:
-        t = text.lower()
+    def detect(self, text: TextLike, emotion_state: str, ctx: Dict, *, hits: TriggerHits = None) -> bool:
+        hits = hits or triggers.scan(text)
 
         # Evitar activar si el usuario está haciendo preguntas normales
-        if self._is_question(t):
+        if self._is_question(hits):
             return False
 
         # 1. Triggers explícitos → activar siempre
-        if any(k in t for k in self.TRIGGERS):
+        if hits.any("sleep.triggers"):
             return True
 
         # 2. Activación por cansancio + hora + emoción
@@ -74,3 +75,7 @@ class SleepEngine:
             "Estoy acá con vos, acompañándote. Cuando quieras, puedo seguir hablándote suave… "
             "o quedarme contigo en silencio hasta que te duermas. 💜"
         )
+
+
+triggers.register("sleep.triggers", SleepEngine.TRIGGERS)
+triggers.register("sleep.question", SleepEngine.QUESTION_KEYWORDS)
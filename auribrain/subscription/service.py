@@ -1,13 +1,7 @@
-import os
-from pymongo import MongoClient
 from datetime import datetime
 from typing import Optional
 
-MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
-
-db = client["auri"]               # usa la misma DB que el resto del proyecto
-subs = db["subscriptions"]        # colección nueva
+from auribrain.memory_db import subscriptions as subs  # pool compartido (DB de suscripciones)
 
 
 def get_subscription(uid: str) -> dict:
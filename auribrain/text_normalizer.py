@@ -0,0 +1,109 @@
+# auribrain/text_normalizer.py
+
+"""
+Normalización única del mensaje por turno.
+
+    norm = NormalizedText(user_msg)
+    norm.lower    → minúsculas + espacios colapsados
+    norm.folded   → además sin tildes/diéresis ("cómo" → "como"),
+                    pero la ñ se conserva ("año" ≠ "ano")
+    norm.tokens / norm.token_set / norm.bigrams
+
+Los motores y el trigger_matcher trabajan sobre `folded`, así los
+léxicos no necesitan la variante con y sin tilde de cada palabra.
+normalize() es idempotente: si ya es NormalizedText lo devuelve tal cual.
+"""
+
+import re
+import unicodedata
+from typing import FrozenSet, Tuple, Union
+
+
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+")
+
+_KEEP = {"ñ", "Ñ"}
+
+
+def _build_fold_table() -> dict:
+    """Latin-1 + Latin Extended-A/B: letra acentuada → letra base."""
+    table = {}
+    for cp in range(0xC0, 0x250):
+        ch = chr(cp)
+        if ch in _KEEP:
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", ch) if not unicodedata.combining(c))
+        if base and base != ch and base.isascii():
+            table[cp] = base
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+
+
+def fold_accents(text: str) -> str:
+    """Quita tildes/diéresis (á→a, ü→u) conservando la ñ."""
+    return text.translate(_FOLD_TABLE)
+
+
+def normalize_lower(text: str) -> str:
+    return _WS_RE.sub(" ", (text or "").strip().lower())
+
+
+def fold_text(text: str) -> str:
+    """minúsculas + espacios colapsados + sin tildes (forma de los léxicos)."""
+    return fold_accents(normalize_lower(text))
+
+
+class NormalizedText:
+    """Mensaje normalizado una sola vez por turno (inmutable)."""
+
+    __slots__ = ("raw", "lower", "folded", "tokens", "token_set", "bigrams", "_char_ngrams")
+
+    def __init__(self, raw: str):
+        self.raw = raw or ""
+        self.lower = normalize_lower(self.raw)
+        self.folded = fold_accents(self.lower)
+        self.tokens: Tuple[str, ...] = tuple(_TOKEN_RE.findall(self.folded))
+        self.token_set: FrozenSet[str] = frozenset(self.tokens)
+        self.bigrams: FrozenSet[str] = frozenset(
+            f"{a} {b}" for a, b in zip(self.tokens, self.tokens[1:])
+        )
+        self._char_ngrams = {}
+
+    def has_word(self, word: str) -> bool:
+        """Palabra completa (en forma plegada)."""
+        return word in self.token_set
+
+    def startswith(self, prefixes) -> bool:
+        return self.folded.startswith(tuple(prefixes))
+
+    def char_ngrams(self, n: int = 3) -> Tuple[str, ...]:
+        """n-gramas de caracteres de " folded " (con bordes); cacheado por n."""
+        grams = self._char_ngrams.get(n)
+        if grams is None:
+            padded = f" {self.folded} "
+            grams = tuple(padded[i:i + n] for i in range(len(padded) - n + 1))
+            self._char_ngrams[n] = grams
+        return grams
+
+    def __bool__(self) -> bool:
+        return bool(self.folded)
+
+    def __len__(self) -> int:
+        return len(self.folded)
+
+    def __str__(self) -> str:
+        return self.folded
+
+    def __repr__(self) -> str:
+        return f"NormalizedText({self.raw!r})"
+
+
+TextLike = Union[str, NormalizedText]
+
+
+def normalize(text: TextLike) -> NormalizedText:
+    if isinstance(text, NormalizedText):
+        return text
+    return NormalizedText(text)
@@ -0,0 +1,180 @@
+# auribrain/trigger_matcher.py
+
+"""
+Matcher de triggers compartido por todos los motores de modos.
+
+Cada motor registra sus listas de palabras clave al importarse:
+
+    triggers.register("crisis.hard", CrisisEngine.HARD_TRIGGERS)
+
+y en cada turno el mensaje se recorre UNA sola vez con un autómata
+Aho-Corasick construido con todos los léxicos:
+
+    hits = triggers.scan(user_msg)
+    hits.any("crisis.hard")      # == any(k in t for k in HARD_TRIGGERS)
+    hits.count("slang.country.mex")
+
+Semántica = la de `k in t` (substring, con solapes) sobre el texto
+normalizado (NormalizedText.folded: minúsculas, espacios colapsados y
+sin tildes). Los patrones se pliegan igual al registrarse, así "cómo"
+y "como" son el mismo patrón. Las coincidencias se guardan como
+bitmask de patrones; cada grupo es una máscara, así any/count son una
+sola operación de enteros.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from auribrain.text_normalizer import NormalizedText, TextLike, fold_accents, normalize
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+class _Automaton:
+    """Aho-Corasick: trie con goto por dict, fail links y salidas como bitmask."""
+
+    __slots__ = ("goto", "fail", "out", "alphabet", "patterns", "groups")
+
+    def __init__(self, groups: Dict[str, Tuple[str, ...]]):
+        self.patterns: List[str] = []
+        ids: Dict[str, int] = {}
+        self.groups: Dict[str, int] = {}
+
+        for name, pats in groups.items():
+            mask = 0
+            for p in pats:
+                if p not in ids:
+                    ids[p] = len(self.patterns)
+                    self.patterns.append(p)
+                mask |= 1 << ids[p]
+            self.groups[name] = mask
+
+        # trie
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[int] = [0]
+        for p, pid in ids.items():
+            state = 0
+            for ch in p:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.out.append(0)
+                state = nxt
+            self.out[state] |= 1 << pid
+
+        # fail links (BFS); la salida de cada estado absorbe la de su fail
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] |= self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+        self.alphabet = frozenset(ch for p in self.patterns for ch in p)
+
+    def scan(self, text: str) -> int:
+        goto, fail, out, alphabet = self.goto, self.fail, self.out, self.alphabet
+        state = 0
+        mask = 0
+        for ch in text:
+            if ch not in alphabet:
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            mask |= out[state]
+        return mask
+
+
+class TriggerHits:
+    """Resultado de un scan: qué patrones aparecieron en el mensaje."""
+
+    __slots__ = ("norm", "mask", "_automaton")
+
+    def __init__(self, norm: NormalizedText, mask: int, automaton: _Automaton):
+        self.norm = norm
+        self.mask = mask
+        self._automaton = automaton
+
+    @property
+    def text(self) -> str:
+        """Texto escaneado (forma plegada)."""
+        return self.norm.folded
+
+    def any(self, group: str) -> bool:
+        return bool(self.mask & self._automaton.groups.get(group, 0))
+
+    def count(self, group: str) -> int:
+        """Cantidad de patrones distintos del grupo presentes."""
+        return (self.mask & self._automaton.groups.get(group, 0)).bit_count()
+
+    def matched(self, group: str) -> List[str]:
+        m = self.mask & self._automaton.groups.get(group, 0)
+        pats = self._automaton.patterns
+        out = []
+        while m:
+            low = m & -m
+            out.append(pats[low.bit_length() - 1])
+            m ^= low
+        return out
+
+
+class TriggerMatcher:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Tuple[str, ...]] = {}
+        self._automaton: Optional[_Automaton] = None
+
+    def register(self, group: str, patterns: Iterable[str]):
+        """
+        Registra (o reemplaza) un grupo. Los patrones se pliegan como el
+        texto (minúsculas, espacios internos colapsados, sin tildes), pero
+        se respetan los bordes ("hp " sigue exigiendo el espacio).
+        """
+        pats = tuple(dict.fromkeys(
+            fold_accents(_WS_RE.sub(" ", p.lower())) for p in patterns if p
+        ))
+        with self._lock:
+            self._groups[group] = pats
+            self._automaton = None
+
+    def groups(self) -> Dict[str, Tuple[str, ...]]:
+        with self._lock:
+            return dict(self._groups)
+
+    def compile(self) -> _Automaton:
+        automaton = self._automaton
+        if automaton is not None:
+            return automaton
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = _Automaton(self._groups)
+            return self._automaton
+
+    def scan(self, text: TextLike) -> TriggerHits:
+        """text: str o NormalizedText (del turno; no se vuelve a normalizar)."""
+        automaton = self.compile()
+        norm = normalize(text)
+        return TriggerHits(norm, automaton.scan(norm.folded), automaton)
+
+    def stats(self) -> Dict[str, int]:
+        automaton = self.compile()
+        return {
+            "groups": len(automaton.groups),
+            "patterns": len(automaton.patterns),
+            "states": len(automaton.goto),
+        }
+
+
+# instancia global (por worker)
+triggers = TriggerMatcher()
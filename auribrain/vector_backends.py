@@ -0,0 +1,415 @@
+# auribrain/vector_backends.py
+
+"""
+Backends de búsqueda vectorial para la memoria semántica.
+
+  atlas → $vectorSearch sobre memory_vectors_index (Atlas Search).
+  local → matriz float32 normalizada por usuario en memoria del proceso,
+          top-k por producto punto + argpartition. Sirve sin Atlas
+          (entornos locales / tests) y ahorra un salto de red por turno.
+          Desde AURI_ANN_MIN_VECTORS vectores usa un índice IVF
+          (auribrain/ivf_index.py) persistido en vector_indexes.
+          La matriz se guarda en AURI_VECTOR_FORMAT (float por defecto)
+          y se puntúa directo sobre los datos cuantizados.
+
+Se elige con AURI_VECTOR_BACKEND (default "atlas").
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from auribrain.ivf_index import IVFIndex
+from auribrain.lru_ttl_cache import LRUTTLCache
+from auribrain.memory_db import memory_vectors, vector_indexes
+from auribrain.vector_codec import VECTOR_FORMAT, decode_embedding, quantize, scores as vector_scores
+
+
+VECTOR_BACKEND = os.getenv("AURI_VECTOR_BACKEND", "atlas").lower()
+VECTOR_TOP_K = int(os.getenv("AURI_VECTOR_TOP_K", "5"))
+
+LOCAL_VECTOR_MB = float(os.getenv("AURI_LOCAL_VECTOR_MB", "256"))
+LOCAL_VECTOR_TTL = float(os.getenv("AURI_LOCAL_VECTOR_TTL", "900"))
+LOCAL_VECTOR_MAX_USERS = int(os.getenv("AURI_LOCAL_VECTOR_MAX_USERS", "5000"))
+
+# ANN (IVF) para usuarios con muchos vectores; 0 = siempre exacto
+ANN_MIN_VECTORS = int(os.getenv("AURI_ANN_MIN_VECTORS", "5000"))
+ANN_NPROBE = int(os.getenv("AURI_ANN_NPROBE", "8"))
+ANN_RETRAIN_FACTOR = float(os.getenv("AURI_ANN_RETRAIN_FACTOR", "2.0"))
+ANN_PERSIST = os.getenv("AURI_ANN_PERSIST", "1") == "1"
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class VectorBackend:
+    """Interfaz común. Los vectores llegan ya como np.float32."""
+
+    name = "base"
+
+    def search(self, user_id: str, qvec: np.ndarray, k: int = VECTOR_TOP_K, nprobe: Optional[int] = None) -> List[str]:
+        """nprobe: perilla recall/latencia del ANN (ignorado si no aplica)."""
+        raise NotImplementedError
+
+    def on_insert(self, items: List[Tuple[str, str, np.ndarray]]):
+        """Se llama después de persistir [(user_id, text, vec), ...]."""
+
+    def drop_user(self, user_id: str):
+        """Se llama después de borrar la memoria semántica del usuario."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+# ==========================================================
+# ATLAS
+# ==========================================================
+class AtlasVectorBackend(VectorBackend):
+
+    name = "atlas"
+
+    def __init__(self, index: str = "memory_vectors_index", num_candidates: int = 100):
+        self.index = index
+        self.num_candidates = num_candidates
+
+    def search(self, user_id: str, qvec: np.ndarray, k: int = VECTOR_TOP_K, nprobe: Optional[int] = None) -> List[str]:
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": self.index,
+                    "path": "embedding",
+                    "queryVector": [float(x) for x in qvec],
+                    "numCandidates": self.num_candidates,
+                    "limit": k,
+                    "filter": {"user_id": user_id}
+                }
+            },
+            {
+                "$project": {"text": 1, "_id": 0}
+            }
+        ]
+
+        results = memory_vectors.aggregate(pipeline)
+        return [r.get("text", "") for r in results]
+
+
+# ==========================================================
+# LOCAL (NumPy)
+# ==========================================================
+class UserVectors:
+    """
+    Vectores de un usuario en una matriz contigua (n × d, filas
+    normalizadas) guardada en el formato de AURI_VECTOR_FORMAT
+    (float32 / float16 / int8 + escala por fila, ver vector_codec).
+    Crece duplicando capacidad, así append es O(1) amortizado y las
+    búsquedas en curso siguen viendo su snapshot.
+
+    ann: índice IVF opcional (usuarios con muchos vectores).
+    """
+
+    __slots__ = ("matrix", "scales", "texts", "size", "fmt", "ann")
+
+    def __init__(self, matrix: np.ndarray, texts: List[str], fmt: str = VECTOR_FORMAT):
+        self.fmt = fmt
+        self.matrix, self.scales = quantize(matrix, fmt)
+        self.texts = texts
+        self.size = len(texts)
+        self.ann: Optional[IVFIndex] = None
+
+    @property
+    def nbytes(self) -> int:
+        ann = self.ann.nbytes if self.ann is not None else 0
+        return self.matrix.nbytes + self.scales.nbytes + sum(len(t) for t in self.texts) + ann
+
+    def append(self, vecs: np.ndarray, texts: List[str]) -> int:
+        """Agrega filas (float32); devuelve cuántas entraron."""
+        if self.matrix.shape[0] == 0 or vecs.shape[1] != self.matrix.shape[1]:
+            if self.size == 0:
+                self.matrix, self.scales = quantize(np.empty((0, vecs.shape[1]), dtype=np.float32), self.fmt)
+            else:
+                # dimensión distinta (cambio de modelo): se ignora el vector
+                return 0
+
+        need = self.size + len(vecs)
+        if need > self.matrix.shape[0]:
+            cap = max(need, 2 * self.matrix.shape[0], 16)
+            grown = np.empty((cap, self.matrix.shape[1]), dtype=self.matrix.dtype)
+            grown[:self.size] = self.matrix[:self.size]
+            scales = np.ones(cap, dtype=np.float32)
+            scales[:self.size] = self.scales[:self.size]
+            self.matrix, self.scales = grown, scales
+
+        data, scales = quantize(_normalize(vecs), self.fmt)
+        self.matrix[self.size:need] = data
+        self.scales[self.size:need] = scales
+        self.texts.extend(texts)
+        self.size = need
+        return len(vecs)
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        n = self.size
+        return self.matrix[:n], self.scales[:n], self.texts[:n]
+
+
+class LocalVectorBackend(VectorBackend):
+
+    name = "local"
+
+    def __init__(
+        self,
+        max_bytes: int = int(LOCAL_VECTOR_MB * 1024 * 1024),
+        ttl: Optional[float] = LOCAL_VECTOR_TTL,
+        max_users: int = LOCAL_VECTOR_MAX_USERS,
+        ann_min_vectors: int = ANN_MIN_VECTORS,
+        nprobe: int = ANN_NPROBE,
+        persist_ann: bool = ANN_PERSIST,
+    ):
+        self._users = LRUTTLCache(
+            max_items=max_users,
+            ttl=ttl,
+            max_bytes=max_bytes,
+            sizeof=lambda u: u.nbytes,
+        )
+        self.ann_min_vectors = ann_min_vectors
+        self.nprobe = nprobe
+        self.persist_ann = persist_ann
+
+        # generación por usuario: una carga que se cruzó con un insert
+        # o un borrado no se guarda (se recarga en la próxima búsqueda)
+        self._gen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "loads": 0, "loaded_vectors": 0, "searches": 0, "stale_loads": 0,
+            "ann_searches": 0, "ann_trains": 0, "ann_restored": 0,
+        }
+
+    def _count(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def _ann_enabled(self, n: int) -> bool:
+        return self.ann_min_vectors > 0 and n >= self.ann_min_vectors
+
+    # ----------------------------------------------------------
+    # Carga perezosa
+    # ----------------------------------------------------------
+    def _load(self, user_id: str) -> UserVectors:
+        with self._lock:
+            gen = self._gen.get(user_id, 0)
+
+        # orden estable por _id: la fila i del índice IVF persistido
+        # siempre es el mismo documento
+        texts, rows, ids = [], [], []
+        cursor = memory_vectors.find(
+            {"user_id": user_id},
+            {"text": 1, "embedding": 1, "embedding_format": 1, "embedding_scale": 1},
+        ).sort("_id", 1)
+        for d in cursor:
+            emb = decode_embedding(d)
+            if emb is not None:
+                texts.append(d.get("text", ""))
+                rows.append(emb)
+                ids.append(d["_id"])
+
+        if rows:
+            dims = {len(r) for r in rows}
+            if len(dims) > 1:
+                # quedarse con la dimensión mayoritaria
+                dim = max(dims, key=lambda x: sum(len(r) == x for r in rows))
+                keep = [i for i, r in enumerate(rows) if len(r) == dim]
+                texts = [texts[i] for i in keep]
+                rows = [rows[i] for i in keep]
+                ids = [ids[i] for i in keep]
+            matrix = _normalize(np.stack(rows))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        vectors = UserVectors(matrix, texts)
+        del rows, matrix  # liberar la copia float32 antes de entrenar el IVF
+        if self._ann_enabled(vectors.size):
+            vectors.ann = self._restore_ann(user_id, vectors, ids)
+
+        with self._lock:
+            self._stats["loads"] += 1
+            self._stats["loaded_vectors"] += vectors.size
+            if self._gen.get(user_id, 0) == gen:
+                self._users.set(user_id, vectors)
+            else:
+                self._stats["stale_loads"] += 1
+        return vectors
+
+    def _get(self, user_id: str) -> UserVectors:
+        vectors = self._users.get(user_id)
+        if vectors is None:
+            vectors = self._load(user_id)
+        return vectors
+
+    # ----------------------------------------------------------
+    # Índice IVF (entrenar / persistir / restaurar)
+    # ----------------------------------------------------------
+    def _restore_ann(self, user_id: str, vectors: UserVectors, ids: list) -> IVFIndex:
+        matrix, _, _ = vectors.view()
+        doc = None
+        if self.persist_ann:
+            try:
+                doc = vector_indexes.find_one({"_id": user_id})
+            except Exception as e:
+                print(f"[VectorBackend] Error leyendo índice IVF de {user_id}: {e}")
+
+        # válido solo si sus filas siguen siendo las mismas (prefijo por _id)
+        if (
+            doc
+            and doc.get("dim") == matrix.shape[1]
+            and 0 < doc.get("size", 0) <= len(ids)
+            and ids[doc["size"] - 1] == doc.get("last_id")
+        ):
+            ann = IVFIndex.from_doc(doc)
+            ann.add(matrix[ann.size:])
+            self._count("ann_restored")
+            if not ann.needs_retrain(ANN_RETRAIN_FACTOR):
+                return ann
+
+        return self._train_ann(user_id, matrix, ids[-1])
+
+    def _train_ann(self, user_id: str, matrix: np.ndarray, last_id) -> IVFIndex:
+        ann = IVFIndex.train(matrix)
+        self._count("ann_trains")
+        self._persist_ann(user_id, ann, last_id)
+        return ann
+
+    def _persist_ann(self, user_id: str, ann: IVFIndex, last_id):
+        if not self.persist_ann:
+            return
+        try:
+            doc = ann.to_doc()
+            doc["last_id"] = last_id
+            vector_indexes.replace_one({"_id": user_id}, doc, upsert=True)
+        except Exception as e:
+            print(f"[VectorBackend] Error guardando índice IVF de {user_id}: {e}")
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def search(
+        self,
+        user_id: str,
+        qvec: np.ndarray,
+        k: int = VECTOR_TOP_K,
+        nprobe: Optional[int] = None,
+    ) -> List[str]:
+        vectors = self._get(user_id)
+        ann = vectors.ann
+        matrix, scales, texts = vectors.view()
+
+        n = matrix.shape[0]
+        if n == 0 or k <= 0 or matrix.shape[1] != qvec.shape[-1]:
+            self._count("searches")
+            return []
+
+        q = _normalize(np.asarray(qvec, dtype=np.float32))
+
+        if ann is not None:
+            self._count("ann_searches")
+            top = ann.search(matrix, q, k, nprobe or self.nprobe, scales)
+            return [texts[i] for i in top]
+
+        self._count("searches")
+        scores = vector_scores(matrix, scales, q)
+        if n > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-scores[top])]
+        return [texts[i] for i in top]
+
+    def on_insert(self, items: List[Tuple[str, str, np.ndarray]]):
+        by_user: Dict[str, Tuple[list, list]] = {}
+        for user_id, text, vec in items:
+            texts, vecs = by_user.setdefault(user_id, ([], []))
+            texts.append(text)
+            vecs.append(vec)
+
+        retrain = []
+        with self._lock:
+            for user_id, (texts, vecs) in by_user.items():
+                self._gen[user_id] = self._gen.get(user_id, 0) + 1
+                # pop + set: el LRU descuenta los bytes viejos y suma los nuevos
+                vectors = self._users.pop(user_id)
+                if vectors is None:
+                    continue
+
+                start = vectors.size
+                if vectors.append(np.asarray(vecs, dtype=np.float32), texts):
+                    if vectors.ann is not None:
+                        vectors.ann.add(vectors.matrix[start:vectors.size])
+                    if (
+                        vectors.ann is None and self._ann_enabled(vectors.size)
+                    ) or (
+                        vectors.ann is not None and vectors.ann.needs_retrain(ANN_RETRAIN_FACTOR)
+                    ):
+                        retrain.append((user_id, vectors))
+                self._users.set(user_id, vectors)
+
+        # el entrenamiento (k-means) corre fuera del lock, en el hilo del
+        # SemanticBatchWriter y no en el camino del turno. No se persiste
+        # aquí (no hay _id de las filas): la próxima carga restaura el
+        # índice guardado, asigna la cola y re-entrena si hace falta.
+        for user_id, vectors in retrain:
+            matrix, _, _ = vectors.view()
+            ann = IVFIndex.train(matrix)
+            self._count("ann_trains")
+            with self._lock:
+                # se borró o recargó mientras se entrenaba: el índice es de otra matriz
+                if self._users.peek(user_id) is not vectors:
+                    continue
+                # pop + set: el LRU cuenta los bytes del índice nuevo
+                self._users.pop(user_id)
+                # filas que llegaron mientras se entrenaba
+                ann.add(vectors.matrix[ann.size:vectors.size])
+                vectors.ann = ann
+                self._users.set(user_id, vectors)
+
+    def drop_user(self, user_id: str):
+        with self._lock:
+            self._gen[user_id] = self._gen.get(user_id, 0) + 1
+            self._users.pop(user_id)
+        if self.persist_ann:
+            try:
+                vector_indexes.delete_one({"_id": user_id})
+            except Exception as e:
+                print(f"[VectorBackend] Error borrando índice IVF de {user_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["backend"] = self.name
+        data["ann_min_vectors"] = self.ann_min_vectors
+        data["nprobe"] = self.nprobe
+        data["users"] = self._users.stats()
+        return data
+
+
+# ==========================================================
+# Selección por config
+# ==========================================================
+BACKENDS = {
+    "atlas": AtlasVectorBackend,
+    "local": LocalVectorBackend,
+}
+
+
+def get_vector_backend(name: str = VECTOR_BACKEND) -> VectorBackend:
+    cls = BACKENDS.get(name)
+    if cls is None:
+        print(f"[VectorBackend] Backend desconocido '{name}', usando atlas")
+        cls = AtlasVectorBackend
+    return cls()
+
+
+# instancia global (por worker)
+vector_backend = get_vector_backend()
@@ -0,0 +1,140 @@
+# auribrain/vector_codec.py
+
+"""
+Formato compacto de embeddings (memory_vectors y matrices en memoria).
+
+  float → lista BSON de doubles (formato histórico, ~12 KB por vector)
+  f16   → Binary con float16 crudo (2 bytes/dim, ~3 KB)
+  int8  → vector BSON int8 (subtipo 9) + escala por vector (1 byte/dim,
+          ~1.5 KB). Atlas lo indexa nativo; con similitud coseno la
+          escala no cambia el ranking.
+
+Se elige con AURI_VECTOR_FORMAT (default "float"). int8 es opt-in: el
+índice de Atlas tiene que estar creado para vectores int8 antes de
+activarlo. f16 solo sirve con AURI_VECTOR_BACKEND=local ($vectorSearch
+no lee ese Binary); con atlas se rechaza y se usa float.
+
+decode_embedding lee los tres formatos, así los documentos viejos siguen
+sirviendo mientras corre la migración (migrate_vector_format.py).
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+
+
+FORMATS = ("float", "f16", "int8")
+
+# formatos que $vectorSearch puede indexar (los demás solo sirven con el backend local)
+ATLAS_FORMATS = ("float", "int8")
+
+VECTOR_FORMAT = os.getenv("AURI_VECTOR_FORMAT", "float").lower()
+if VECTOR_FORMAT not in FORMATS:
+    print(f"[VectorCodec] Formato desconocido '{VECTOR_FORMAT}', usando float")
+    VECTOR_FORMAT = "float"
+
+# se lee directo del env: vector_backends importa este módulo
+if os.getenv("AURI_VECTOR_BACKEND", "atlas").lower() == "atlas" and VECTOR_FORMAT not in ATLAS_FORMATS:
+    print(f"[VectorCodec] Formato '{VECTOR_FORMAT}' no es buscable con Atlas, usando float")
+    VECTOR_FORMAT = "float"
+
+# subtipo 9 = vector BSON: 1 byte dtype + 1 byte padding + datos
+_VECTOR_HEADER = 2
+
+
+# ==========================================================
+# Matrices (n × d) — en memoria
+# ==========================================================
+def quantize(matrix: np.ndarray, fmt: str = VECTOR_FORMAT) -> Tuple[np.ndarray, np.ndarray]:
+    """float32 (n × d) → (datos en fmt, escala float32 por fila)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    ones = np.ones(matrix.shape[0], dtype=np.float32)
+
+    if fmt == "f16":
+        return matrix.astype(np.float16), ones
+    if fmt == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else ones
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        data = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return data, scales
+    return matrix, ones
+
+
+def dequantize(data: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    out = data.astype(np.float32)
+    if data.dtype == np.int8:
+        out *= scales[:, None]
+    return out
+
+
+def scores(data: np.ndarray, scales: np.ndarray, q: np.ndarray, chunk: int = 4096) -> np.ndarray:
+    """
+    Producto punto de cada fila con q sobre los datos cuantizados.
+    int8 / f16 se convierten por bloques (memoria temporal acotada) y la
+    escala se aplica al resultado, no a la matriz: (s·x)·q = s·(x·q).
+    """
+    n = data.shape[0]
+    if data.dtype == np.float32:
+        return data @ q
+
+    out = np.empty(n, dtype=np.float32)
+    for i in range(0, n, chunk):
+        out[i:i + chunk] = data[i:i + chunk].astype(np.float32) @ q
+    if data.dtype == np.int8:
+        out *= scales[:n]
+    return out
+
+
+# ==========================================================
+# Documentos Mongo
+# ==========================================================
+def encode_embedding(vec, fmt: str = VECTOR_FORMAT) -> dict:
+    """Campos a guardar en memory_vectors para un vector."""
+    vec = np.asarray(vec, dtype=np.float32)
+
+    if fmt == "f16":
+        return {
+            "embedding": Binary(vec.astype(np.float16).tobytes()),
+            "embedding_format": "f16",
+        }
+    if fmt == "int8":
+        data, scales = quantize(vec[None, :], "int8")
+        return {
+            "embedding": Binary.from_vector(data[0], BinaryVectorDtype.INT8),
+            "embedding_format": "int8",
+            "embedding_scale": float(scales[0]),
+        }
+    return {"embedding": [float(x) for x in vec]}
+
+
+def decode_embedding(doc: dict) -> Optional[np.ndarray]:
+    """Vector float32 de un documento en cualquiera de los formatos."""
+    emb = doc.get("embedding")
+    if emb is None or len(emb) == 0:
+        return None
+
+    if isinstance(emb, (bytes, Binary)):
+        fmt = doc.get("embedding_format")
+        if fmt == "f16":
+            return np.frombuffer(emb, dtype=np.float16).astype(np.float32)
+        if getattr(emb, "subtype", None) == 9:
+            dtype = BinaryVectorDtype(emb[0:1])
+            if dtype == BinaryVectorDtype.INT8:
+                vec = np.frombuffer(emb, dtype=np.int8, offset=_VECTOR_HEADER).astype(np.float32)
+                return vec * np.float32(doc.get("embedding_scale", 1.0))
+            if dtype == BinaryVectorDtype.FLOAT32:
+                return np.frombuffer(emb, dtype="<f4", offset=_VECTOR_HEADER).copy()
+        return None
+
+    return np.asarray(emb, dtype=np.float32)
+
+
+def stored_nbytes(doc: dict) -> int:
+    """Tamaño aproximado del campo embedding en BSON."""
+    emb = doc.get("embedding")
+    if isinstance(emb, (bytes, Binary)):
+        return len(emb)
+    # double BSON: 1 byte tipo + clave "i\\0" + 8 bytes
+    return sum(10 + len(str(i)) for i in range(len(emb or [])))
@@ -1,6 +1,7 @@
 # auribrain/voice_emotion_analyzer.py
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 class VoiceEmotionAnalyzer:
     """
@@ -55,18 +56,136 @@ class VoiceEmotionAnalyzer:
     def _variance(self, arr):
         return float(np.var(arr)) if len(arr) else 0.0
 
+    # -----------------------------------------------------------
+    # 2b) Features por frame (vectorizado, sin copiar el PCM)
+    # -----------------------------------------------------------
+    def frame_features(self, pcm, sample_rate: int = 16000, frame_ms: int = 30, hop_ms: int = 15):
+        """
+        Features por frame con ventanas strided sobre el int16 original:
+        energía (RMS), ZCR y un proxy de pitch por autocorrelación (rfft)
+        en los frames sonoros. Devuelve estadísticas resumen del enunciado.
+        """
+        arr = np.frombuffer(pcm, dtype=np.int16) if pcm else np.empty(0, dtype=np.int16)
+        frame = int(sample_rate * frame_ms / 1000)
+        hop = max(1, int(sample_rate * hop_ms / 1000))
+
+        if arr.size < frame:
+            return self._empty_features(arr.size / sample_rate if sample_rate else 0.0)
+
+        windows = sliding_window_view(arr, frame)[::hop]          # vista, sin copia
+        n_frames = windows.shape[0]
+
+        # energía por frame (acumulada en int64, sin pasar a float)
+        energy = np.einsum("ij,ij->i", windows, windows, dtype=np.int64)
+        rms = np.sqrt(energy / frame) / 32768.0
+
+        # ZCR: cruces de signo sobre toda la señal + suma acumulada
+        crossings = np.empty(arr.size, dtype=np.int32)
+        crossings[0] = 0
+        np.not_equal(np.signbit(arr[1:]), np.signbit(arr[:-1]), out=crossings[1:])
+        csum = np.cumsum(crossings)
+        starts = np.arange(n_frames) * hop
+        zcr = (csum[starts + frame - 1] - csum[starts]) / frame
+
+        # frames sonoros: energía relevante (relativa al pico) y ZCR moderado
+        floor = max(0.01, 0.15 * float(rms.max()))
+        voiced = (rms > floor) & (zcr < 0.25)
+
+        pitch = self._pitch_proxy(windows[voiced], sample_rate)
+
+        # totales del enunciado completo (compatibles con analyze clásico)
+        total_energy = float(np.einsum("i,i->", arr, arr, dtype=np.int64))
+        mean = float(arr.sum(dtype=np.int64)) / arr.size / 32768.0
+        rms_total = float(np.sqrt(total_energy / arr.size)) / 32768.0
+        zcr_total = float(csum[-1]) / arr.size
+
+        return {
+            "duration_sec": round(arr.size / sample_rate, 3),
+            "frames": int(n_frames),
+            "rms": rms_total,
+            "zcr": zcr_total,
+            "variance": max(0.0, rms_total ** 2 - mean ** 2),
+            "rms_mean": float(rms.mean()),
+            "rms_std": float(rms.std()),
+            "rms_max": float(rms.max()),
+            "zcr_mean": float(zcr.mean()),
+            "zcr_std": float(zcr.std()),
+            "voiced_ratio": float(voiced.mean()),
+            "pause_ratio": float((rms <= floor).mean()),
+            "pitch_mean": float(pitch.mean()) if pitch.size else 0.0,
+            "pitch_std": float(pitch.std()) if pitch.size else 0.0,
+        }
+
+    def _pitch_proxy(self, frames, sample_rate: int, fmin: float = 70.0, fmax: float = 400.0):
+        """Pitch (Hz) por frame vía autocorrelación con rfft; 0-d si no hay frames."""
+        if frames.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+
+        x = frames.astype(np.float32)
+        x -= x.mean(axis=1, keepdims=True)
+        n = frames.shape[1]
+
+        spec = np.fft.rfft(x, n=2 * n, axis=1)
+        ac = np.fft.irfft(spec * np.conj(spec), axis=1)[:, :n]
+
+        lo = max(1, int(sample_rate / fmax))
+        hi = min(n - 1, int(sample_rate / fmin))
+        if hi <= lo:
+            return np.empty(0, dtype=np.float32)
+
+        lags = np.argmax(ac[:, lo:hi], axis=1) + lo
+        peak = ac[np.arange(ac.shape[0]), lags]
+        # periodicidad mínima: descarta frames ruidosos
+        strong = peak > 0.3 * np.maximum(ac[:, 0], 1e-9)
+        return (sample_rate / lags[strong]).astype(np.float32)
+
+    def _empty_features(self, duration: float = 0.0):
+        return {
+            "duration_sec": round(duration, 3),
+            "frames": 0,
+            "rms": 0.0, "zcr": 0.0, "variance": 0.0,
+            "rms_mean": 0.0, "rms_std": 0.0, "rms_max": 0.0,
+            "zcr_mean": 0.0, "zcr_std": 0.0,
+            "voiced_ratio": 0.0, "pause_ratio": 1.0,
+            "pitch_mean": 0.0, "pitch_std": 0.0,
+        }
+
+    def merge_features(self, items):
+        """Combina features de varios segmentos ponderando por frames."""
+        items = [f for f in items if f and f.get("frames")]
+        if not items:
+            return None
+        if len(items) == 1:
+            return dict(items[0])
+
+        weights = np.array([f["frames"] for f in items], dtype=np.float64)
+        merged = {}
+        for key in items[0]:
+            vals = np.array([f[key] for f in items], dtype=np.float64)
+            if key in ("duration_sec", "frames"):
+                merged[key] = float(vals.sum())
+            elif key == "rms_max":
+                merged[key] = float(vals.max())
+            else:
+                merged[key] = float(np.average(vals, weights=weights))
+        merged["frames"] = int(merged["frames"])
+        return merged
+
     # -----------------------------------------------------------
     # 3) Clasificación emocional
     # -----------------------------------------------------------
     def analyze(self, pcm_bytes: bytes):
-        arr = self._pcm_to_array(pcm_bytes)
+        if not pcm_bytes:
+            return "neutral"
+        return self.classify(self.frame_features(pcm_bytes))
 
-        if len(arr) == 0:
+    def classify(self, feats):
+        if not feats or not feats.get("frames"):
             return "neutral"
 
-        rms = self._rms(arr)
-        zcr = self._zcr(arr)
-        var = self._variance(arr)
+        rms = feats["rms"]
+        zcr = feats["zcr"]
+        var = feats["variance"]
 
         # DEBUG MODE LOGGING
         if self.debug:
@@ -74,6 +193,8 @@ class VoiceEmotionAnalyzer:
             print(f"RMS:       {rms:.4f}")
             print(f"ZCR:       {zcr:.4f}")
             print(f"Variance:  {var:.4f}")
+            print(f"Pitch:     {feats['pitch_mean']:.1f} Hz ± {feats['pitch_std']:.1f}")
+            print(f"Voiced:    {feats['voiced_ratio']:.2f}")
 
         # ---------------------------
         # Happiness
@@ -0,0 +1,97 @@
+# benchmarks/bench_ann_recall.py
+
+"""
+IVF (auribrain/ivf_index.py): recall@5 vs latencia según nprobe.
+
+Datos sintéticos agrupados (las memorias reales de un usuario se parecen
+entre sí), consultas = vectores de la base con ruido. La referencia es
+la búsqueda exacta (producto punto + argpartition) del backend local.
+
+    python benchmarks/bench_ann_recall.py --n 20000 50000 --nprobe 1 2 4 8 16 32
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from auribrain.ivf_index import IVFIndex  # noqa: E402
+
+
+def normalize(x):
+    return (x / np.linalg.norm(x, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def make_data(rng, n, dim, topics, spread):
+    centers = rng.standard_normal((topics, dim))
+    rows = centers[rng.integers(0, topics, n)] + spread * rng.standard_normal((n, dim))
+    return normalize(rows)
+
+
+def exact_topk(matrix, q, k):
+    s = matrix @ q
+    top = np.argpartition(-s, k - 1)[:k]
+    return top[np.argsort(-s[top])]
+
+
+def ms(samples):
+    samples = sorted(samples)
+    return statistics.mean(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, nargs="+", default=[20000, 50000])
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--topics", type=int, default=200)
+    ap.add_argument("--spread", type=float, default=2.0)
+    ap.add_argument("--noise", type=float, default=0.5)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    for n in args.n:
+        matrix = make_data(rng, n, args.dim, args.topics, args.spread)
+        picks = matrix[rng.integers(0, n, args.queries)]
+        # ruido de norma ~args.noise alrededor de memorias existentes
+        queries = normalize(picks + args.noise * rng.standard_normal(picks.shape) / np.sqrt(args.dim))
+
+        t0 = time.perf_counter()
+        index = IVFIndex.train(matrix)
+        train_s = time.perf_counter() - t0
+
+        truth, exact_ms = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            truth.append(set(exact_topk(matrix, q, args.k).tolist()))
+            exact_ms.append((time.perf_counter() - t0) * 1000.0)
+        e_avg, e_p95 = ms(exact_ms)
+
+        print(f"\nn={n} dim={args.dim} nlist={index.nlist} train={train_s:.2f}s "
+              f"index={index.nbytes / 1e6:.1f} MB")
+        print(f"{'nprobe':>7} | {'recall@' + str(args.k):>9} | {'avg ms':>7} {'p95':>7} | speedup")
+        print("-" * 50)
+        print(f"{'exact':>7} | {1.0:>9.3f} | {e_avg:>7.3f} {e_p95:>7.3f} | x1.0")
+
+        for nprobe in args.nprobe:
+            hits, lat = 0, []
+            for q, gt in zip(queries, truth):
+                t0 = time.perf_counter()
+                got = index.search(matrix, q, args.k, nprobe)
+                lat.append((time.perf_counter() - t0) * 1000.0)
+                hits += len(gt & set(got.tolist()))
+            avg, p95 = ms(lat)
+            recall = hits / (len(queries) * args.k)
+            print(f"{nprobe:>7} | {recall:>9.3f} | {avg:>7.3f} {p95:>7.3f} | x{e_avg / max(avg, 1e-9):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_dialog_trim.py
+
+"""
+Micro-benchmark: costo de escritura del diálogo reciente.
+
+  legacy  → insert_one + find(sort) de TODO el historial + delete_many
+            (MemoryOrchestrator.add_dialog original)
+  window  → un solo update_one con $push + $slice en dialog_windows
+
+Usa una base descartable (por defecto "bench_auri"; solo acepta nombres
+con prefijo "bench_") y la borra al final.
+
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_dialog_trim.py \
+        --history 40 1000 10000 --writes 200 --others 2000
+"""
+
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import time
+
+from pymongo import MongoClient
+
+WINDOW = 40
+
+# solo se usan (y borran) bases con este prefijo
+SCRATCH_PREFIX = "bench_"
+
+
+def legacy_add(coll, user_id, role, text):
+    coll.insert_one({
+        "user_id": user_id,
+        "role": role,
+        "text": text,
+        "ts": datetime.datetime.utcnow(),
+    })
+    msgs = list(coll.find({"user_id": user_id}).sort("ts", -1))
+    if len(msgs) > WINDOW:
+        coll.delete_many({"_id": {"$in": [m["_id"] for m in msgs[WINDOW:]]}})
+
+
+def window_add(coll, user_id, role, text):
+    coll.update_one(
+        {"_id": user_id},
+        {
+            "$push": {"turns": {"$each": [{
+                "role": role,
+                "text": text,
+                "ts": datetime.datetime.utcnow(),
+            }], "$slice": -WINDOW}},
+            "$set": {"updated_at": datetime.datetime.utcnow()},
+        },
+        upsert=True,
+    )
+
+
+def seed(legacy, window, user_id, history, others):
+    now = datetime.datetime.utcnow()
+    msg = lambda uid, i: {"user_id": uid, "role": "user", "text": f"mensaje {i}", "ts": now}
+
+    # historial largo del usuario medido (p.ej. antes de que existiera el recorte)
+    if history:
+        legacy.insert_many([msg(user_id, i) for i in range(history)])
+    # ruido de otros usuarios en la misma colección
+    if others:
+        legacy.insert_many([msg(f"other-{i % 100}", i) for i in range(others)])
+
+    window.update_one(
+        {"_id": user_id},
+        {"$set": {"turns": [
+            {"role": "user", "text": f"mensaje {i}", "ts": now}
+            for i in range(min(history, WINDOW))
+        ]}},
+        upsert=True,
+    )
+
+
+def measure(fn, coll, user_id, writes):
+    samples = []
+    for i in range(writes):
+        t0 = time.perf_counter()
+        fn(coll, user_id, "user" if i % 2 == 0 else "assistant", f"turno {i}")
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return {
+        "avg": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    ap.add_argument("--db", default="bench_auri")
+    ap.add_argument("--history", type=int, nargs="+", default=[40, 1000, 10000])
+    ap.add_argument("--writes", type=int, default=200)
+    ap.add_argument("--others", type=int, default=2000)
+    ap.add_argument("--index", action="store_true", help="crear índice (user_id, ts) en legacy")
+    args = ap.parse_args()
+    if not args.db.startswith(SCRATCH_PREFIX):
+        sys.exit(
+            f"--db {args.db!r}: el benchmark borra la base al terminar; usá una base descartable "
+            f"con prefijo '{SCRATCH_PREFIX}'"
+        )
+
+    client = MongoClient(args.uri)
+    db = client[args.db]
+
+    print(f"{'history':>8} | {'legacy avg':>10} {'p50':>7} {'p95':>7} | {'window avg':>10} {'p50':>7} {'p95':>7} | speedup")
+    print("-" * 82)
+
+    try:
+        for history in args.history:
+            db.drop_collection("dialog_recent")
+            db.drop_collection("dialog_windows")
+            legacy, window = db["dialog_recent"], db["dialog_windows"]
+            if args.index:
+                legacy.create_index([("user_id", 1), ("ts", -1)])
+
+            uid = "bench-user"
+            seed(legacy, window, uid, history, args.others)
+
+            # la primera escritura legacy paga el recorte de todo el historial
+            t0 = time.perf_counter()
+            legacy_add(legacy, uid, "user", "primer turno")
+            first_ms = (time.perf_counter() - t0) * 1000.0
+
+            leg = measure(legacy_add, legacy, uid, args.writes)
+            win = measure(window_add, window, uid, args.writes)
+
+            print(
+                f"{history:>8} | {leg['avg']:>10.2f} {leg['p50']:>7.2f} {leg['p95']:>7.2f} | "
+                f"{win['avg']:>10.2f} {win['p50']:>7.2f} {win['p95']:>7.2f} | "
+                f"x{leg['avg'] / max(win['avg'], 1e-9):.1f}   (legacy 1er turno: {first_ms:.1f} ms)"
+            )
+    finally:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
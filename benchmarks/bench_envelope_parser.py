@@ -0,0 +1,124 @@
+# benchmarks/bench_envelope_parser.py
+
+"""
+Parser incremental del sobre JSON (auribrain/envelope_parser.py).
+
+  casos     → respuestas reales y degeneradas del modelo (cercos con y
+              sin salto de línea, texto crudo, objeto truncado, escapes,
+              claves en otro orden) alimentadas entera, char por char y
+              en deltas aleatorios; todas tienen que dar el mismo sobre
+  costo     → µs por respuesta y cuántos chars llegan antes del primer
+              texto de "reply" (lo que espera el TTS)
+
+Sale con código 1 si algún caso no coincide.
+
+    python benchmarks/bench_envelope_parser.py --rounds 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from auribrain.envelope_parser import EnvelopeParser
+
+REMINDER = {"title": "llamar a mamá {urgente}", "datetime": "2026-10-18T09:00:00"}
+
+# (nombre, respuesta del modelo, intent, reminder, reply, complete, raw)
+CASES = [
+    ("objeto", '{"intent": "smalltalk", "reminder": null, "reply": "¡Hola! ¿Cómo estás?"}',
+     "smalltalk", None, "¡Hola! ¿Cómo estás?", True, False),
+    ("cerco + salto", '```json\n{"intent": "smalltalk", "reminder": null, "reply": "Hola"}\n```',
+     "smalltalk", None, "Hola", True, False),
+    ("cerco json sin salto", '```json {"intent": "smalltalk", "reminder": null, "reply": "Hola"}```',
+     "smalltalk", None, "Hola", True, False),
+    ("cerco sin salto", '``` {"intent": "weather", "reply": "Va a llover"} ```',
+     "weather", None, "Va a llover", True, False),
+    ("cerco pegado", '```{"intent": "weather", "reply": "Sol"}```',
+     "weather", None, "Sol", True, False),
+    ("texto crudo", "Claro, te ayudo con eso.",
+     None, None, "Claro, te ayudo con eso.", False, True),
+    ("truncado", '{"intent": "smalltalk", "reply": "Te cuento que',
+     "smalltalk", None, "Te cuento que", False, False),
+    ("escapes", '{"intent": "smalltalk", "reply": "línea\\nsigue \\"así\\" caf\\u00e9 \\ud83d\\ude00"}',
+     "smalltalk", None, 'línea\nsigue "así" café 😀', True, False),
+    ("reply primero", '{"reply": "Listo", "reminder": null, "intent": "reminder.create"}',
+     "reminder.create", None, "Listo", True, False),
+    ("literal y clave", '{"reminder":null,"intent":"smalltalk","reply":"ok"}',
+     "smalltalk", None, "ok", True, False),
+    ("reminder anidado", '{"intent": "reminder.create", "reminder": '
+     '{"title": "llamar a mamá {urgente}", "datetime": "2026-10-18T09:00:00"}, "reply": "Anotado"}',
+     "reminder.create", REMINDER, "Anotado", True, False),
+]
+
+
+def chunkings(text, rnd):
+    yield "entera", [text]
+    yield "char", list(text)
+    for n in range(3):
+        parts, i = [], 0
+        while i < len(text):
+            step = rnd.randint(1, 12)
+            parts.append(text[i:i + step])
+            i += step
+        yield f"aleatoria{n}", parts
+
+
+def run(parts):
+    p = EnvelopeParser()
+    streamed = "".join(p.feed(c) for c in parts)
+    return p.close(), streamed
+
+
+def check(rnd):
+    failures = 0
+    for name, text, intent, reminder, reply, complete, raw in CASES:
+        for how, parts in chunkings(text, rnd):
+            env, streamed = run(parts)
+            got = (env.intent, env.reminder, env.reply, env.complete, env.raw)
+            want = (intent, reminder, reply, complete, raw)
+            if got != want or streamed.strip() != env.reply:
+                failures += 1
+                print(f"  ✗ {name} [{how}]: {got!r} (stream {streamed!r}) ≠ {want!r}")
+    total = len(CASES) * 5
+    print(f"casos: {total - failures}/{total} ok")
+    return failures
+
+
+def cost(rounds):
+    print(f"\n{'caso':<22} {'µs/resp':>8} {'chars antes de reply':>21}")
+    print("-" * 53)
+    for name, text, *_ in CASES:
+        # deltas de ~4 chars, como llegan del stream
+        parts = [text[i:i + 4] for i in range(0, len(text), 4)]
+        lat = []
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            run(parts)
+            lat.append((time.perf_counter() - t0) * 1e6)
+
+        p, first = EnvelopeParser(), None
+        for i, c in enumerate(parts):
+            if p.feed(c):
+                first = min(len(text), (i + 1) * 4)
+                break
+        print(f"{name:<22} {statistics.mean(lat):>8.1f} {first if first is not None else '-':>21}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    failures = check(random.Random(args.seed))
+    cost(args.rounds)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
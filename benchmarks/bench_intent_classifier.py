@@ -0,0 +1,128 @@
+# benchmarks/bench_intent_classifier.py
+
+"""
+Clasificador de intents local: precisión offline y latencia.
+
+- k-fold estratificado sobre auribrain/data/intent_corpus.jsonl (los
+  léxicos de reglas siempre van al entrenamiento, como en producción).
+- Por umbral: cobertura (% que se resuelve sin LLM) y precisión de lo
+  que se resuelve local.
+- Latencia de predict() por mensaje y tiempo de entrenamiento.
+
+El corpus es en parte sintético (plantillas); para una medición real
+pasá un set etiquetado aparte (p.ej. mensajes reales exportados):
+
+    python benchmarks/bench_intent_classifier.py
+    python benchmarks/bench_intent_classifier.py --eval mensajes_etiquetados.jsonl
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import auribrain.intent_engine  # noqa: F401  (registra los léxicos "intent.*")
+from auribrain.intent_classifier import (
+    INTENT_LOCAL_THRESHOLD,
+    IntentClassifier,
+    load_corpus,
+    rule_examples,
+)
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.75, 0.8, 0.9)
+
+
+def stratified_folds(labels, k, seed=0):
+    rng = np.random.default_rng(seed)
+    by_label = defaultdict(list)
+    for i, l in enumerate(labels):
+        by_label[l].append(i)
+    folds = [[] for _ in range(k)]
+    for idx in by_label.values():
+        idx = list(rng.permutation(idx))
+        for j, i in enumerate(idx):
+            folds[j % k].append(i)
+    return folds
+
+
+def evaluate(clf, texts, labels):
+    """[(gold, pred, conf)] + latencias (µs)."""
+    out, lat = [], []
+    for t, gold in zip(texts, labels):
+        t0 = time.perf_counter()
+        pred, conf = clf.predict(t)
+        lat.append((time.perf_counter() - t0) * 1e6)
+        out.append((gold, pred, conf))
+    return out, lat
+
+
+def report(results, lat, train_ms):
+    n = len(results)
+    acc = sum(g == p for g, p, _ in results) / n
+    print(f"\nejemplos evaluados: {n}   precisión (sin umbral): {acc:.3f}")
+
+    print(f"\n{'intent':<22} {'n':>4} {'acc':>6}")
+    print("-" * 34)
+    per = defaultdict(list)
+    for g, p, _ in results:
+        per[g].append(g == p)
+    for label, hits in sorted(per.items()):
+        print(f"{label:<22} {len(hits):>4} {sum(hits) / len(hits):>6.3f}")
+
+    print(f"\n{'umbral':>7} | {'cobertura':>9} {'acc local':>9} | {'llamadas LLM evitadas':>21}")
+    print("-" * 56)
+    for th in THRESHOLDS:
+        local = [(g, p) for g, p, c in results if c >= th]
+        cov = len(local) / n
+        acc_local = sum(g == p for g, p in local) / len(local) if local else 0.0
+        mark = "  ← AURI_INTENT_LOCAL_THRESHOLD" if abs(th - INTENT_LOCAL_THRESHOLD) < 1e-9 else ""
+        print(f"{th:>7.2f} | {cov:>9.3f} {acc_local:>9.3f} | {cov * 100:>20.1f}%{mark}")
+
+    lat = sorted(lat)
+    print(
+        f"\npredict(): avg {statistics.mean(lat):.1f} µs · p50 {lat[len(lat) // 2]:.1f} µs · "
+        f"p95 {lat[max(0, int(len(lat) * 0.95) - 1)]:.1f} µs   (LLM: ~300–800 ms)"
+    )
+    print(f"entrenamiento: {train_ms:.0f} ms por modelo")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--eval", help="jsonl etiquetado aparte (text, label)")
+    args = ap.parse_args()
+
+    texts, labels = load_corpus()
+    rt, rl = rule_examples()
+    print(f"corpus: {len(texts)} ejemplos {dict(Counter(labels))} + {len(rt)} frases de reglas")
+
+    if args.eval:
+        clf = IntentClassifier().fit(texts + rt, labels + rl)
+        et, el = load_corpus(args.eval)
+        results, lat = evaluate(clf, et, el)
+        report(results, lat, clf.train_ms)
+        return
+
+    results, lat, train = [], [], []
+    for fold in stratified_folds(labels, args.folds):
+        held = set(fold)
+        tr_t = [t for i, t in enumerate(texts) if i not in held] + rt
+        tr_l = [l for i, l in enumerate(labels) if i not in held] + rl
+        clf = IntentClassifier().fit(tr_t, tr_l)
+        train.append(clf.train_ms)
+        r, l = evaluate(clf, [texts[i] for i in fold], [labels[i] for i in fold])
+        results += r
+        lat += l
+
+    report(results, lat, statistics.mean(train))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_query_shapes.py
+
+"""
+Auditoría de formas de consulta de la memoria con explain().
+
+Para cada consulta real de MemoryOrchestrator / memory_router corre
+explain (executionStats) y marca las que hacen COLLSCAN, junto con los
+documentos examinados vs devueltos.
+
+Por defecto siembra datos sintéticos en una base descartable (nombre con
+prefijo "bench_"; se vacía al empezar y se borra al final):
+
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_query_shapes.py
+    MONGO_URI=... python benchmarks/bench_query_shapes.py --no-indexes   # ver COLLSCAN
+
+Para auditar una base existente (solo lectura salvo --ensure):
+
+    MONGO_URI=... python benchmarks/bench_query_shapes.py --db <base> --no-seed
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+UID = "bench-user"
+
+# solo se siembran / borran bases con este prefijo
+SCRATCH_PREFIX = "bench_"
+
+# (nombre, colección, filtro, sort) — espejo de las consultas del código
+QUERY_SHAPES = [
+    # get_facts / get_family_by_role / get_pets / get_relationships filtran
+    # en memoria la lista cacheada que carga _active_facts
+    ("_active_facts", "facts", {"user_id": UID, "is_active": True}, None),
+    ("add_fact_structured.dup", "facts", {
+        "user_id": UID, "text": "hecho 1", "category": "pet",
+        "name": None, "role": None, "kind": None, "is_active": True,
+    }, None),
+    ("get_recent_dialog.legacy", "dialog_recent", {"user_id": UID}, [("ts", -1)]),
+    ("memory_vectors.by_user", "memory_vectors", {"user_id": UID}, None),
+    ("local_vectors.load", "memory_vectors", {"user_id": UID}, [("_id", 1)]),
+    ("get_subscription", "subscriptions", {"uid": UID}, None),
+]
+
+
+def seed(db, users: int, per_user: int):
+    rnd = random.Random(7)
+    now = datetime.datetime.utcnow()
+    categories = ["pet", "relationship", "preference", "work", "other"]
+    roles = [None, "madre", "abuela", "hermano", "pareja"]
+
+    uids = [UID] + [f"user-{i}" for i in range(users - 1)]
+    facts, dialog, vectors = [], [], []
+    for uid in uids:
+        for i in range(per_user):
+            facts.append({
+                "user_id": uid, "text": f"hecho {i}",
+                "category": rnd.choice(categories), "role": rnd.choice(roles),
+                "name": None, "kind": None, "is_active": rnd.random() > 0.1,
+            })
+            dialog.append({"user_id": uid, "role": "user", "text": f"m{i}",
+                           "ts": now - datetime.timedelta(seconds=i)})
+            vectors.append({"user_id": uid, "text": f"v{i}", "embedding": [0.0] * 8})
+
+    db["facts"].insert_many(facts)
+    db["dialog_recent"].insert_many(dialog)
+    db["memory_vectors"].insert_many(vectors)
+    db["subscriptions"].insert_many([{"uid": uid, "plan": "free"} for uid in uids])
+
+
+def stages(plan: dict):
+    """Recorre el árbol del plan ganador y devuelve todas las etapas."""
+    out = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            out += stages(plan[key])
+    for child in plan.get("inputStages", []):
+        out += stages(child)
+    return [s for s in out if s]
+
+
+def explain(db, coll: str, flt: dict, sort):
+    cmd = {"find": coll, "filter": flt}
+    if sort:
+        cmd["sort"] = dict(sort)
+    res = db.command("explain", cmd, verbosity="executionStats")
+    plan = res["queryPlanner"]["winningPlan"]
+    stats = res.get("executionStats", {})
+    return {
+        "stages": stages(plan),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "ms": stats.get("executionTimeMillis"),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    ap.add_argument("--db", default="bench_auri")
+    ap.add_argument("--no-seed", action="store_true")
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--per-user", type=int, default=40)
+    ap.add_argument("--no-indexes", action="store_true", help="no crear índices (línea base)")
+    ap.add_argument("--ensure", action="store_true", help="crear índices también con --no-seed")
+    args = ap.parse_args()
+
+    scratch = not args.no_seed
+    if scratch and not args.db.startswith(SCRATCH_PREFIX):
+        sys.exit(
+            f"--db {args.db!r}: sembrar borra y luego elimina la base (o usá --no-seed); usá una base descartable "
+            f"con prefijo '{SCRATCH_PREFIX}'"
+        )
+
+    client = MongoClient(args.uri)
+    db = client[args.db]
+
+    try:
+        if scratch:
+            for name in ("facts", "dialog_recent", "memory_vectors", "subscriptions"):
+                db.drop_collection(name)
+            seed(db, args.users, args.per_user)
+
+        if (scratch and not args.no_indexes) or args.ensure:
+            os.environ["AURI_DB_NAME"] = args.db
+            os.environ["AURI_SUBSCRIPTIONS_DB"] = args.db
+            os.environ["MONGO_URI"] = args.uri
+            from auribrain.memory_indexes import ensure_indexes
+            ensure_indexes()
+
+        collscans = 0
+        print(f"{'query':<26} {'plan':<34} {'docs':>6} {'keys':>6} {'ret':>5} {'ms':>4}")
+        print("-" * 86)
+        for name, coll, flt, sort in QUERY_SHAPES:
+            r = explain(db, coll, flt, sort)
+            flag = "COLLSCAN" in r["stages"]
+            collscans += flag
+            plan = " > ".join(r["stages"])
+            print(
+                f"{name:<26} {plan[:34]:<34} {r['docs_examined']!s:>6} "
+                f"{r['keys_examined']!s:>6} {r['returned']!s:>5} {r['ms']!s:>4}"
+                + ("   ⚠ COLLSCAN" if flag else "")
+            )
+
+        print("-" * 86)
+        print(f"COLLSCAN: {collscans}/{len(QUERY_SHAPES)}")
+        sys.exit(1 if collscans else 0)
+    finally:
+        if scratch:
+            client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
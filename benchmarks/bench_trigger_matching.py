@@ -0,0 +1,147 @@
+# benchmarks/bench_trigger_matching.py
+
+"""
+Costo de detección de triggers por mensaje.
+
+  antes    → cada motor hace text.lower() + any(k in t for k in LISTA)
+             por cada uno de sus léxicos (el mensaje se recorre por grupo)
+  después  → un solo scan Aho-Corasick (trigger_matcher) + consultas
+             de grupo sobre la bitmask
+
+También verifica que ambos caminos den el mismo resultado por grupo
+(semántica `k in t` sobre el texto normalizado).
+
+    python benchmarks/bench_trigger_matching.py --messages 2000 --rounds 5
+"""
+
+import argparse
+import importlib
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+# cada motor registra sus léxicos al importarse
+ENGINE_MODULES = [
+    "auribrain.crisis_engine",
+    "auribrain.sleep_engine",
+    "auribrain.energy_engine",
+    "auribrain.focus_engine",
+    "auribrain.mental_health_engine",
+    "auribrain.journal_engine",
+    "auribrain.slang_mode_engine",
+    "auribrain.intent_engine",
+    "auribrain.emotion_engine",
+    "auribrain.emotion_smartlayer_v3",
+    "auribrain.auri_mind",
+]
+
+FILLER = [
+    "hola", "mañana", "tengo", "que", "ir", "al", "médico", "y", "después",
+    "quiero", "ver", "una", "película", "con", "mi", "novia", "el", "trabajo",
+    "está", "pesado", "pero", "bueno", "así", "es", "la", "vida", "oye",
+    "sabes", "algo", "de", "historia", "porque", "necesito", "estudiar",
+]
+
+
+def make_messages(n, patterns, hit_rate, seed):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(4, 24))]
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(patterns))
+        msg = " ".join(words)
+        out.append(msg.capitalize() if rng.random() < 0.5 else msg)
+    return out
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "avg": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[max(0, int(len(samples) * 0.95) - 1)],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=2000)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--hit-rate", type=float, default=0.3)
+    args = ap.parse_args()
+
+    loaded = []
+    for name in ENGINE_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            print(f"(sin {name}: {e})")
+
+    from auribrain.text_normalizer import fold_text
+    from auribrain.trigger_matcher import triggers
+
+    groups = triggers.groups()
+    patterns = sorted({p.strip() for pats in groups.values() for p in pats})
+    messages = make_messages(args.messages, patterns, args.hit_rate, seed=0)
+
+    t0 = time.perf_counter()
+    triggers.compile()
+    stats = triggers.stats()
+    print(
+        f"{stats['groups']} grupos · {stats['patterns']} patrones · {stats['states']} estados "
+        f"(compilado en {(time.perf_counter() - t0) * 1000:.1f} ms)"
+    )
+
+    # ---- correctitud ----
+    mismatches = 0
+    for msg in messages:
+        norm = fold_text(msg)
+        hits = triggers.scan(msg)
+        for g, pats in groups.items():
+            if hits.any(g) != any(p in norm for p in pats):
+                mismatches += 1
+            if hits.count(g) != sum(1 for p in pats if p in norm):
+                mismatches += 1
+    print(f"diferencias vs any(k in t): {mismatches}")
+
+    # ---- costo ----
+    group_items = list(groups.items())
+    names = list(groups)
+
+    def before(msg):
+        # un lower + un recorrido por léxico, como hacía cada motor
+        for _, pats in group_items:
+            t = msg.lower()
+            any(k in t for k in pats)
+
+    def after(msg):
+        hits = triggers.scan(msg)
+        for g in names:
+            hits.any(g)
+
+    results = {}
+    for label, fn in (("antes", before), ("después", after)):
+        samples = []
+        for _ in range(args.rounds):
+            for msg in messages:
+                t = time.perf_counter()
+                fn(msg)
+                samples.append((time.perf_counter() - t) * 1e6)
+        results[label] = summarize(samples)
+
+    print(f"\n{'camino':>9} | {'avg µs':>8} {'p50':>8} {'p95':>8}")
+    print("-" * 40)
+    for label, r in results.items():
+        print(f"{label:>9} | {r['avg']:>8.2f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+    print(f"\nspeedup avg: {results['antes']['avg'] / results['después']['avg']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
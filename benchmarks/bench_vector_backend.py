@@ -0,0 +1,155 @@
+# benchmarks/bench_vector_backend.py
+
+"""
+Búsqueda semántica: backend local (NumPy) vs camino Mongo.
+
+  local-warm  → matriz ya cargada: producto punto + argpartition
+  local-cold  → primera búsqueda del usuario (find + armado de la matriz)
+  atlas       → $vectorSearch (solo en Atlas con memory_vectors_index;
+                en un mongod local se reporta como no disponible)
+
+Siembra vectores sintéticos en una base descartable (prefijo "bench_",
+por defecto "bench_auri") y la borra al final.
+
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_vector_backend.py \
+        --sizes 100 1000 10000 --queries 200
+
+Los vectores se siembran en AURI_VECTOR_FORMAT (float / f16 / int8).
+
+Sin Mongo (solo el costo del top-k en memoria):
+
+    python benchmarks/bench_vector_backend.py --offline
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DIM = 1536
+UID = "bench-user"
+
+# solo se usan (y borran) bases con este prefijo
+SCRATCH_PREFIX = "bench_"
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "avg": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[max(0, int(len(samples) * 0.95) - 1)],
+    }
+
+
+def timed(fn, queries):
+    out = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(out)
+
+
+def fmt(r):
+    if r is None:
+        return f"{'n/a':>9} {'':>7}"
+    return f"{r['avg']:>9.3f} {r['p95']:>7.3f}"
+
+
+def offline(sizes, n_queries, k):
+    """top-k en memoria: argpartition vs argsort completo."""
+    rng = np.random.default_rng(0)
+    print(f"{'n':>8} | {'argpartition avg':>16} {'p95':>7} | {'argsort avg':>11} {'p95':>7}")
+    print("-" * 60)
+    for n in sizes:
+        mat = rng.standard_normal((n, DIM), dtype=np.float32)
+        mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+        queries = rng.standard_normal((n_queries, DIM), dtype=np.float32)
+
+        def part(q):
+            s = mat @ q
+            top = np.argpartition(-s, k - 1)[:k] if n > k else np.arange(n)
+            return top[np.argsort(-s[top])]
+
+        def full(q):
+            return np.argsort(-(mat @ q))[:k]
+
+        p, f = timed(part, queries), timed(full, queries)
+        print(f"{n:>8} | {p['avg']:>16.3f} {p['p95']:>7.3f} | {f['avg']:>11.3f} {f['p95']:>7.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    ap.add_argument("--db", default="bench_auri")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--offline", action="store_true", help="sin Mongo, solo top-k en memoria")
+    args = ap.parse_args()
+
+    if args.offline:
+        offline(args.sizes, args.queries, args.k)
+        return
+
+    if not args.db.startswith(SCRATCH_PREFIX):
+        sys.exit(
+            f"--db {args.db!r}: el benchmark borra la base al terminar; usá una base descartable "
+            f"con prefijo '{SCRATCH_PREFIX}'"
+        )
+
+    # la colección del backend apunta a la base descartable
+    os.environ["MONGO_URI"] = args.uri
+    os.environ["AURI_DB_NAME"] = args.db
+    from pymongo.errors import OperationFailure
+    from auribrain.memory_db import mongo, memory_vectors
+    from auribrain.vector_backends import AtlasVectorBackend, LocalVectorBackend
+    from auribrain.vector_codec import VECTOR_FORMAT, encode_embedding
+
+    rng = np.random.default_rng(0)
+    atlas = AtlasVectorBackend()
+
+    print(f"formato: {VECTOR_FORMAT} (AURI_VECTOR_FORMAT)")
+    print(f"{'n':>7} | {'local-warm ms':>9} {'p95':>7} | {'local-cold ms':>9} {'p95':>7} | {'atlas ms':>9} {'p95':>7}")
+    print("-" * 74)
+
+    try:
+        for n in args.sizes:
+            memory_vectors.drop()
+            vecs = rng.standard_normal((n, DIM), dtype=np.float32)
+            for i in range(0, n, 1000):
+                memory_vectors.insert_many([
+                    {"user_id": UID, "text": f"t{j}", **encode_embedding(vecs[j])}
+                    for j in range(i, min(n, i + 1000))
+                ])
+            queries = rng.standard_normal((args.queries, DIM), dtype=np.float32)
+
+            local = LocalVectorBackend()
+            cold_q = queries[: max(5, args.queries // 20)]
+
+            def cold(q):
+                local.drop_user(UID)
+                local.search(UID, q, args.k)
+
+            cold_r = timed(cold, cold_q)
+            local.search(UID, queries[0], args.k)
+            warm_r = timed(lambda q: local.search(UID, q, args.k), queries)
+
+            try:
+                atlas_r = timed(lambda q: atlas.search(UID, q, args.k), queries)
+            except OperationFailure:
+                atlas_r = None
+
+            print(f"{n:>7} | {fmt(warm_r)} | {fmt(cold_r)} | {fmt(atlas_r)}")
+    finally:
+        mongo.client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# realtime/audio_buffer.py
+
+import io
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+
+
+AUDIO_MAX_SEC = float(os.getenv("AURI_AUDIO_MAX_SEC", "60"))
+AUDIO_BUDGET_MB = float(os.getenv("AURI_AUDIO_BUDGET_MB", "256"))
+AUDIO_INITIAL_BYTES = 64 * 1024
+
+
+# ============================================================
+# PRESUPUESTO DE MEMORIA (POR WORKER)
+# ============================================================
+
+class AudioMemoryBudget:
+    """
+    Contabilidad agregada de la memoria de audio de todas las sesiones
+    del worker. Cada buffer reserva antes de crecer; si no hay
+    presupuesto, el audio se rechaza en vez de agotar la RAM.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._peak = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int) -> bool:
+        with self._lock:
+            if self._used + n > self.max_bytes:
+                self._rejected += 1
+                return False
+            self._used += n
+            self._peak = max(self._peak, self._used)
+            return True
+
+    def release(self, n: int):
+        with self._lock:
+            self._used = max(0, self._used - n)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "used_bytes": self._used,
+                "max_bytes": self.max_bytes,
+                "peak_bytes": self._peak,
+                "rejected": self._rejected,
+            }
+
+
+# instancia global (por worker)
+audio_budget = AudioMemoryBudget(int(AUDIO_BUDGET_MB * 1024 * 1024))
+
+
+# ============================================================
+# RING BUFFER PCM
+# ============================================================
+
+class PCMRingBuffer:
+    """
+    Buffer circular de PCM 16-bit mono con tope de segundos.
+
+    - Crece de forma perezosa (duplicando) hasta `max_seconds`; cada
+      crecimiento se reserva en el AudioMemoryBudget.
+    - Al llenarse sobrescribe lo más viejo (se conservan los últimos
+      `max_seconds`) y marca `truncated`.
+    - segments() devuelve memoryviews sobre el buffer, sin copiar.
+    - Offsets absolutos: start_offset / end_offset cuentan bytes desde
+      el inicio del enunciado, aunque el ring haya dado la vuelta.
+    """
+
+    def __init__(
+        self,
+        max_seconds: float = AUDIO_MAX_SEC,
+        sample_rate: int = 16000,
+        budget: Optional[AudioMemoryBudget] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.capacity = int(max_seconds * sample_rate) * 2
+        self.budget = budget if budget is not None else audio_budget
+
+        self._buf = bytearray()
+        self._start = 0
+        self._len = 0
+        self.end_offset = 0
+        self.dropped = 0
+
+    # ----------------------------------------------------------
+    # Escritura
+    # ----------------------------------------------------------
+    def append(self, data: bytes) -> bool:
+        """Agrega PCM. Devuelve False si el presupuesto no alcanza."""
+        n = len(data)
+        if n == 0:
+            return True
+
+        mv = memoryview(data)
+        if n > self.capacity:
+            self.dropped += n - self.capacity
+            self.end_offset += n - self.capacity
+            mv = mv[n - self.capacity:]
+            n = self.capacity
+
+        need = min(self.capacity, self._len + n)
+        if need > len(self._buf) and not self._grow(need):
+            return False
+
+        size = len(self._buf)
+        pos = (self._start + self._len) % size
+        first = min(n, size - pos)
+        self._buf[pos:pos + first] = mv[:first]
+        if first < n:
+            self._buf[:n - first] = mv[first:]
+
+        overflow = self._len + n - size
+        if overflow > 0:
+            self._start = (self._start + overflow) % size
+            self._len = size
+            self.dropped += overflow
+        else:
+            self._len += n
+
+        self.end_offset += n
+        return True
+
+    def _grow(self, need: int) -> bool:
+        old = len(self._buf)
+        new = min(self.capacity, max(need, old * 2, AUDIO_INITIAL_BYTES))
+        if not self.budget.reserve(new - old):
+            return False
+        # antes de llenarse el buffer es lineal (_start == 0)
+        try:
+            self._buf.extend(bytes(new - old))
+        except BufferError:
+            # hay memoryviews exportados: se migra a un buffer nuevo
+            self._buf = self._buf + bytes(new - old)
+        return True
+
+    # ----------------------------------------------------------
+    # Lectura sin copia
+    # ----------------------------------------------------------
+    def segments(self) -> List[memoryview]:
+        if self._len == 0:
+            return []
+        mv = memoryview(self._buf)
+        end = self._start + self._len
+        if end <= len(self._buf):
+            return [mv[self._start:end]]
+        return [mv[self._start:], mv[:end - len(self._buf)]]
+
+    @property
+    def start_offset(self) -> int:
+        return self.end_offset - self._len
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    @property
+    def seconds(self) -> float:
+        return self._len / 2 / self.sample_rate
+
+    def __len__(self) -> int:
+        return self._len
+
+    # ----------------------------------------------------------
+    # Liberación
+    # ----------------------------------------------------------
+    def clear(self):
+        """Vacía el buffer y devuelve la memoria al presupuesto."""
+        self.budget.release(len(self._buf))
+        # no se redimensiona: puede haber memoryviews vivos (STT en curso)
+        self._buf = bytearray()
+        self._start = 0
+        self._len = 0
+        self.end_offset = 0
+        self.dropped = 0
+
+
+# ============================================================
+# WAV SIN COPIA (header + memoryviews)
+# ============================================================
+
+def wav_header(data_len: int, sample_rate: int, channels: int = 1, sampwidth: int = 2) -> bytes:
+    byte_rate = sample_rate * channels * sampwidth
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sampwidth, sampwidth * 8,
+        b"data", data_len,
+    )
+
+
+class WavReader(io.RawIOBase):
+    """
+    Archivo WAV de solo lectura armado sobre [header, *segmentos PCM].
+    El PCM no se copia: httpx lo lee por chunks directo del buffer.
+    """
+
+    def __init__(self, parts: List[Any], name: str = "audio.wav"):
+        super().__init__()
+        self.name = name
+        self._parts = [memoryview(p).cast("B") for p in parts]
+        self._size = sum(len(p) for p in self._parts)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def readinto(self, b) -> int:
+        out = memoryview(b).cast("B")
+        written = 0
+        base = 0
+        for part in self._parts:
+            end = base + len(part)
+            if self._pos < end and written < len(out):
+                lo = self._pos - base
+                take = min(len(part) - lo, len(out) - written)
+                out[written:written + take] = part[lo:lo + take]
+                written += take
+                self._pos += take
+            base = end
+        return written
+
+    def close(self):
+        for p in self._parts:
+            p.release()
+        self._parts = []
+        super().close()
+
+
+def wav_stream(segments: List[Any], sample_rate: int) -> WavReader:
+    data_len = sum(len(memoryview(s).cast("B")) for s in segments)
+    return WavReader([wav_header(data_len, sample_rate), *segments])
@@ -1,33 +1,43 @@
 # realtime/realtime_ws.py
 
-import io
 import json
 import logging
-import wave
 import aiohttp
 import asyncio
 import time
 
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from openai import AsyncOpenAI
 
-from auribrain.auri_singleton import auri
+from auribrain.auri_singleton import get_mind, sessions
+from auribrain.async_runtime import run_blocking
+from auribrain.openai_clients import get_async_openai_client
+from auribrain.voice_emotion_analyzer import VoiceEmotionAnalyzer
+from realtime.tts_stream import stream_reply
+from realtime.stt_stream import StreamingTranscriber, STT_STREAMING_DEFAULT
+from realtime.audio_buffer import PCMRingBuffer, wav_stream
 from realtime.realtime_broadcast import realtime_broadcast
 from auribrain.subscription.service import get_subscription
 from typing import Optional
+import os
 
 
 
 logger = logging.getLogger("uvicorn.error")
 
 router = APIRouter()
-client = AsyncOpenAI()
+client = get_async_openai_client()
 
 STT_MODEL = "whisper-1"
 TTS_MODEL = "gpt-4o-mini-tts"
 SAMPLE_RATE = 16000
 
+# features de voz (stateless, se usa desde el thread pool)
+voice_analyzer = VoiceEmotionAnalyzer()
+
+# Streaming LLM→TTS por frases (el cliente puede activarlo en client_hello)
+STREAMING_DEFAULT = os.getenv("AURI_STREAMING_DEFAULT", "0") == "1"
+
 SAFE_ACTION_TYPES = {
     "create_reminder",
     "delete_reminder",
@@ -48,16 +58,6 @@ RVC_VOICES = {
 
 
 
-def pcm16_to_wav(pcm_bytes: bytes, sample_rate: int):
-    buffer = io.BytesIO()
-    with wave.open(buffer, "wb") as wav:
-        wav.setnchannels(1)
-        wav.setsampwidth(2)
-        wav.setframerate(sample_rate)
-        wav.writeframes(pcm_bytes)
-    buffer.seek(0)
-    return buffer
-
 def is_rvc_voice(voice_id: str) -> bool:
     return voice_id in RVC_VOICES
 
@@ -68,9 +68,30 @@ def is_rvc_voice(voice_id: str) -> bool:
 
 class RealtimeSession:
     def __init__(self):
-        self.pcm_buffer = bytearray()
+        self.audio = PCMRingBuffer(sample_rate=SAMPLE_RATE)  # tope de segundos + presupuesto
+        self.audio_rejected = False
         self.firebase_uid = None  # usuario real de la sesión
+        self._mind = None  # AuriMind fijada en client_hello (referencia fuerte)
         self._last_plan_sync_ts = 0.0  # throttle
+        self.streaming = STREAMING_DEFAULT  # reply_partial/tts_chunk por frase
+        self.stt_stream: Optional[StreamingTranscriber] = None  # STT con VAD
+        self.utterance_done = False  # el VAD ya cerró el enunciado
+
+    @property
+    def mind(self):
+        # AuriMind aislada del usuario (o la global si aún no hay UID).
+        # Con el socket abierto se usa SIEMPRE la fijada en client_hello:
+        # si el registro la desalojó (TTL/LRU) se re-registra en vez de
+        # crear una nueva sin contexto listo ni plan.
+        if self._mind is not None and self.firebase_uid:
+            sessions.attach(self.firebase_uid, self._mind)
+            return self._mind
+        return get_mind(self.firebase_uid)
+
+    def pin_mind(self, uid: str):
+        self._mind = get_mind(uid) if uid else None
+        return self._mind
+
     def should_sync_plan(self, cooldown_sec: float = 30.0) -> bool:
         now = time.time()
         if now - self._last_plan_sync_ts >= cooldown_sec:
@@ -78,11 +99,19 @@ class RealtimeSession:
             return True
         return False
 
-    def append_pcm(self, data: bytes):
-        self.pcm_buffer.extend(data)
+    def append_pcm(self, data: bytes) -> bool:
+        if self.audio_rejected:
+            return False
+        if not self.audio.append(data):
+            self.audio_rejected = True
+            return False
+        return True
 
     def clear(self):
-        self.pcm_buffer.clear()
+        self.audio.clear()
+        self.audio_rejected = False
+        if self.stt_stream is not None:
+            self.stt_stream.reset()
 
 
 # ============================================================
@@ -106,7 +135,17 @@ async def realtime_socket(ws: WebSocket):
                 break
 
             if msg.get("bytes") is not None:
-                session.append_pcm(msg["bytes"])
+                if session.stt_stream is not None:
+                    # STT streaming: el VAD segmenta y transcribe en vivo
+                    if session.stt_stream.feed(msg["bytes"]):
+                        await ws.send_json({"type": "utterance_end"})
+                        await process_streamed_utterance(ws, session)
+                        session.utterance_done = True
+                    continue
+                was_rejected = session.audio_rejected
+                if not session.append_pcm(msg["bytes"]) and not was_rejected:
+                    logger.warning("⚠ Audio rechazado: presupuesto de memoria agotado")
+                    await ws.send_json({"type": "audio_rejected", "reason": "memory_budget"})
                 continue
 
             if msg.get("text") is not None:
@@ -124,6 +163,7 @@ async def realtime_socket(ws: WebSocket):
         logger.exception(f"🔥 ERROR en WS principal: {e}")
 
     finally:
+        session.clear()  # devuelve la memoria de audio al presupuesto
         realtime_broadcast.unregister(ws)
         logger.info("🔌 WS cerrado")
         
@@ -138,19 +178,19 @@ def _safe_plan_from_sub(sub: Optional[dict]) -> str:
     except Exception:
         return "free"
 
-def _sync_plan_from_backend(uid: str) -> str:
+def _sync_plan_from_backend(mind, uid: str) -> str:
     """
     Obtiene el plan desde el backend de suscripciones (get_subscription)
-    y lo inyecta en ContextEngine.
+    y lo inyecta en el ContextEngine de la sesión del usuario.
     """
     try:
         sub = get_subscription(uid)  # puede ser in-memory o DB
         plan = _safe_plan_from_sub(sub)
-        auri.context.set_user_plan(plan)
+        mind.context.set_user_plan(plan)
         return plan
     except Exception as e:
         logger.error(f"⚠ Error sync plan desde backend (UID={uid}): {e}")
-        auri.context.set_user_plan("free")
+        mind.context.set_user_plan("free")
         return "free"
 
 
@@ -168,24 +208,38 @@ async def handle_json(ws: WebSocket, session: RealtimeSession, msg: dict):
     if t == "client_hello":
         uid = msg.get("firebase_uid")
         session.firebase_uid = uid
+        session.pin_mind(None)
+
+        if msg.get("streaming") is not None:
+            session.streaming = bool(msg.get("streaming"))
+
+        stt_streaming = msg.get("stt_streaming")
+        if stt_streaming is None:
+            stt_streaming = STT_STREAMING_DEFAULT
+        session.stt_stream = _make_stt_stream(ws) if stt_streaming else None
 
         logger.info(f"🙋 HELLO recibido — UID: {uid}")
 
         if uid:
             try:
-                auri.set_user_uid(uid)
+                mind = session.pin_mind(uid)
+                await mind.aset_user_uid(uid)
 
                 # ✅ Sync plan desde backend (source of truth)
-                plan = _sync_plan_from_backend(uid)
+                plan = await run_blocking(_sync_plan_from_backend, mind, uid)
 
-                auri.context.mark_ready()
+                mind.context.mark_ready()
                 logger.info(f"✅ Contexto listo — plan={plan} UID={uid}")
                 logger.info(f"🔗 Auri asociado al usuario {uid}")
 
             except Exception as e:
                 logger.error(f"⚠ Error asignando UID a AuriMind: {e}")
 
-        await ws.send_json({"type": "hello_ok"})
+        await ws.send_json({
+            "type": "hello_ok",
+            "streaming": session.streaming,
+            "stt_streaming": session.stt_stream is not None,
+        })
         return
 
 
@@ -196,12 +250,20 @@ async def handle_json(ws: WebSocket, session: RealtimeSession, msg: dict):
     elif t == "start_session":
         logger.info("🎤 Inicio sesión de voz")
         session.clear()
+        session.utterance_done = False
         return
 
     # --------------------------
     # AUDIO END
     # --------------------------
     elif t == "audio_end":
+        if session.stt_stream is not None:
+            # si el VAD ya respondió y no hubo más voz, no hay nada que hacer
+            if session.utterance_done and not session.stt_stream.has_audio:
+                session.clear()
+                return
+            await process_streamed_utterance(ws, session)
+            return
         await process_stt_tts(ws, session)
         return
 
@@ -211,7 +273,11 @@ async def handle_json(ws: WebSocket, session: RealtimeSession, msg: dict):
     elif t == "text_command":
         txt = (msg.get("text") or "").strip()
         if txt:
-            await process_text_only(ws, session, txt)
+            stream = msg.get("stream")
+            await process_text_only(
+                ws, session, txt,
+                streaming=session.streaming if stream is None else bool(stream),
+            )
         return
 
     # --------------------------
@@ -253,103 +319,194 @@ async def _safe_send_action(ws: WebSocket, action: dict):
 # ============================================================
 
 async def process_stt_tts(ws: WebSocket, session: RealtimeSession):
-    if len(session.pcm_buffer) == 0:
+    if len(session.audio) == 0:
         await ws.send_json({"type": "reply_final", "text": "No escuché nada."})
+        session.clear()
         return
 
-    logger.info("🎙 Recibidos %d bytes PCM", len(session.pcm_buffer))
-
-    wav = pcm16_to_wav(session.pcm_buffer, SAMPLE_RATE)
-    wav.name = "audio.wav"
+    logger.info("🎙 Recibidos %d bytes PCM", len(session.audio))
+    if session.audio.truncated:
+        logger.warning("⚠ Audio truncado a los últimos %.0fs", session.audio.seconds)
 
     try:
         # --------------------------
         # STT
         # --------------------------
-        stt = await client.audio.transcriptions.create(
-            model=STT_MODEL,
-            file=wav,
-        )
-        text = (getattr(stt, "text", "") or "").strip()
+        # emoción de voz en el thread pool, en paralelo al STT
+        segments = session.audio.segments()
+        pcm = segments[0] if len(segments) == 1 else b"".join(segments)
+        emo_task = asyncio.ensure_future(run_blocking(voice_analyzer.analyze, pcm))
+
+        text = await _transcribe_pcm(segments)
         logger.info("📝 Texto STT: %s", text)
 
-        # --------------------------
-        # USER BINDING
-        # --------------------------
-        if session.firebase_uid:
-            try:
-                auri.set_user_uid(session.firebase_uid)
-            except Exception as e:
-                logger.error(f"⚠ No se pudo asignar UID en STT: {e}")
+        voice_emotion = _voice_emotion_if_ready(emo_task)
+        await _answer_voice_text(ws, session, text, voice_emotion=voice_emotion)
 
-            # ✅ Re-sync plan solo ocasionalmente (evita overhead)
-            try:
-                if session.should_sync_plan(30.0):  # cada 30s
-                    plan = _sync_plan_from_backend(session.firebase_uid)
-                    logger.info(f"🔄 Plan re-sync (STT): {plan}")
-            except Exception as e:
-                logger.error(f"⚠ No se pudo sincronizar plan en STT: {e}")
+    except Exception as e:
+        logger.exception("🔥 Error en pipeline STT→LLM→TTS: %s", e)
+        await ws.send_json({
+            "type": "reply_final",
+            "text": "Hubo un problema procesando tu voz."
+        })
 
+    session.clear()
 
 
-        # --------------------------
-        # THINK + ACTIONS
-        # --------------------------
-        think_res = auri.think(text)
+def _voice_emotion_if_ready(task: asyncio.Future) -> Optional[str]:
+    # nunca se espera: si el análisis no terminó junto con el STT, se omite
+    if not task.done():
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return None
+    if task.cancelled() or task.exception() is not None:
+        return None
+    return task.result()
+
+
+async def _answer_voice_text(
+    ws: WebSocket,
+    session: RealtimeSession,
+    text: str,
+    voice_emotion: Optional[str] = None,
+):
+    # --------------------------
+    # USER BINDING
+    # --------------------------
+    mind = session.mind
+    if session.firebase_uid:
+        try:
+            await mind.aset_user_uid(session.firebase_uid)
+        except Exception as e:
+            logger.error(f"⚠ No se pudo asignar UID en STT: {e}")
+
+        # ✅ Re-sync plan solo ocasionalmente (evita overhead)
+        try:
+            if session.should_sync_plan(30.0):  # cada 30s
+                plan = await run_blocking(_sync_plan_from_backend, mind, session.firebase_uid)
+                logger.info(f"🔄 Plan re-sync (STT): {plan}")
+        except Exception as e:
+            logger.error(f"⚠ No se pudo sincronizar plan en STT: {e}")
+
+    # --------------------------
+    # THINK + TTS
+    # --------------------------
+    if session.streaming:
+        think_res = await stream_reply(
+            ws, mind.astream(text, voice_emotion=voice_emotion), client, TTS_MODEL,
+            synth_custom=_synth_rvc_sentence,
+        )
+        action = think_res.get("action")
+    else:
+        think_res = await mind.athink(text, voice_emotion=voice_emotion)
         reply_text = think_res.get("final") or think_res.get("raw") or ""
         action = think_res.get("action")
         voice_id = think_res.get("voice_id") or "alloy"
 
         logger.info("🧠 Auri reply: %s", reply_text)
 
-        # --------------------------
-        # TTS
-        # --------------------------
         await send_tts(ws, reply_text, voice_id=voice_id)
 
-        # --------------------------
-        # ACTION (SAFE)
-        # --------------------------
-        if action:
-            await _safe_send_action(ws, action)
+    # --------------------------
+    # ACTION (SAFE)
+    # --------------------------
+    if action:
+        await _safe_send_action(ws, action)
+
+
+# ============================================================
+# STT STREAMING (VAD + SEGMENTOS)
+# ============================================================
+
+async def _transcribe_pcm(pcm) -> str:
+    # pcm: bytes o lista de segmentos (memoryviews del ring buffer)
+    segments = pcm if isinstance(pcm, list) else [pcm]
+    wav = wav_stream(segments, SAMPLE_RATE)
+
+    try:
+        stt = await client.audio.transcriptions.create(
+            model=STT_MODEL,
+            file=("audio.wav", wav, "audio/wav"),
+        )
+    finally:
+        wav.close()
+    return (getattr(stt, "text", "") or "").strip()
+
+
+def _make_stt_stream(ws: WebSocket) -> StreamingTranscriber:
+    async def on_partial(idx: int, text: str):
+        await ws.send_json({"type": "stt_partial", "index": idx, "text": text})
+
+    async def analyze(pcm: bytes) -> dict:
+        return await run_blocking(voice_analyzer.frame_features, pcm, SAMPLE_RATE)
+
+    return StreamingTranscriber(
+        transcribe=_transcribe_pcm,
+        on_partial=on_partial,
+        analyze=analyze,
+        sample_rate=SAMPLE_RATE,
+    )
+
+
+async def process_streamed_utterance(ws: WebSocket, session: RealtimeSession):
+    try:
+        text = await session.stt_stream.finish()
+        logger.info("📝 Texto STT (streaming): %s", text)
+
+        if not text:
+            await ws.send_json({"type": "reply_final", "text": "No escuché nada."})
+            return
+
+        feats = voice_analyzer.merge_features(session.stt_stream.voice_features)
+        voice_emotion = voice_analyzer.classify(feats) if feats else None
+
+        await _answer_voice_text(ws, session, text, voice_emotion=voice_emotion)
 
     except Exception as e:
-        logger.exception("🔥 Error en pipeline STT→LLM→TTS: %s", e)
+        logger.exception("🔥 Error en pipeline STT(stream)→LLM→TTS: %s", e)
         await ws.send_json({
             "type": "reply_final",
             "text": "Hubo un problema procesando tu voz."
         })
 
-    session.clear()
+    finally:
+        session.clear()
 
 
 # ============================================================
 # TEXT ONLY PIPELINE
 # ============================================================
 
-async def process_text_only(ws: WebSocket, session: RealtimeSession, text: str):
+async def process_text_only(ws: WebSocket, session: RealtimeSession, text: str, streaming: bool = False):
     try:
+        mind = session.mind
         if session.firebase_uid:
             try:
-                auri.set_user_uid(session.firebase_uid)
+                await mind.aset_user_uid(session.firebase_uid)
             except Exception as e:
                 logger.error(f"⚠ No se pudo asignar UID en TEXT: {e}")
 
             try:
                 if session.should_sync_plan(30.0):
-                    plan = _sync_plan_from_backend(session.firebase_uid)
+                    plan = await run_blocking(_sync_plan_from_backend, mind, session.firebase_uid)
                     logger.info(f"🔄 Plan re-sync (TEXT): {plan}")
             except Exception as e:
                 logger.error(f"⚠ No se pudo sincronizar plan en TEXT: {e}")
 
 
 
-        think_res = auri.think(text)
-        reply_text = think_res.get("final") or think_res.get("raw") or ""
-        action = think_res.get("action")
-        voice_id = think_res.get("voice_id") or "alloy"
+        if streaming:
+            think_res = await stream_reply(
+                ws, mind.astream(text), client, TTS_MODEL,
+                synth_custom=_synth_rvc_sentence,
+            )
+            action = think_res.get("action")
+        else:
+            think_res = await mind.athink(text)
+            reply_text = think_res.get("final") or think_res.get("raw") or ""
+            action = think_res.get("action")
+            voice_id = think_res.get("voice_id") or "alloy"
 
-        await send_tts(ws, reply_text, voice_id=voice_id)
+            await send_tts(ws, reply_text, voice_id=voice_id)
 
         if action:
             await _safe_send_action(ws, action)
@@ -375,41 +532,14 @@ async def send_tts(ws: WebSocket, text: str, voice_id: str = "alloy"):
         # --------------------------------------------------
         # 1️⃣ TTS BASE (siempre Alloy, WAV)
         # --------------------------------------------------
-        audio_bytes = b""
-
-        async with client.audio.speech.with_streaming_response.create(
-            model=TTS_MODEL,
-            voice="alloy",                 # SIEMPRE Alloy como base
-            input=text,
-            response_format="wav",         # RVC necesita WAV
-        ) as resp:
-            async for chunk in resp.iter_bytes():
-                audio_bytes += chunk
+        audio_bytes = await _tts_wav(text)
 
         # --------------------------------------------------
         # 2️⃣ ¿PASA POR RVC?
         # --------------------------------------------------
         if is_rvc_voice(voice_id):
             logger.info("🎙 Aplicando RVC para voice_id=%s", voice_id)
-
-            try:
-                async with aiohttp.ClientSession() as session:
-                    data = aiohttp.FormData()
-                    data.add_field(
-                        "file",
-                        audio_bytes,
-                        filename="input.wav",
-                        content_type="audio/wav",
-                    )
-
-                    async with session.post(RVC_URL, data=data, timeout=60) as r:
-                        if r.status == 200:
-                            audio_bytes = await r.read()
-                        else:
-                            logger.error("⚠ RVC falló (status=%s), usando Alloy", r.status)
-
-            except Exception as rvc_err:
-                logger.error("⚠ Error RVC, fallback Alloy: %s", rvc_err)
+            audio_bytes = await _apply_rvc(audio_bytes)
 
         # --------------------------------------------------
         # 3️⃣ Enviar audio final a Flutter
@@ -422,3 +552,45 @@ async def send_tts(ws: WebSocket, text: str, voice_id: str = "alloy"):
         await ws.send_json({"type": "tts_error", "error": str(e)})
         await ws.send_json({"type": "tts_end"})
 
+
+async def _tts_wav(text: str) -> bytes:
+    audio_bytes = b""
+    async with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL,
+        voice="alloy",                 # SIEMPRE Alloy como base
+        input=text,
+        response_format="wav",         # RVC necesita WAV
+    ) as resp:
+        async for chunk in resp.iter_bytes():
+            audio_bytes += chunk
+    return audio_bytes
+
+
+async def _apply_rvc(audio_bytes: bytes) -> bytes:
+    try:
+        async with aiohttp.ClientSession() as session:
+            data = aiohttp.FormData()
+            data.add_field(
+                "file",
+                audio_bytes,
+                filename="input.wav",
+                content_type="audio/wav",
+            )
+
+            async with session.post(RVC_URL, data=data, timeout=60) as r:
+                if r.status == 200:
+                    return await r.read()
+                logger.error("⚠ RVC falló (status=%s), usando Alloy", r.status)
+
+    except Exception as rvc_err:
+        logger.error("⚠ Error RVC, fallback Alloy: %s", rvc_err)
+
+    return audio_bytes
+
+
+async def _synth_rvc_sentence(voice_id: str, text: str) -> Optional[bytes]:
+    # Streaming: voces RVC se convierten frase a frase (WAV completo);
+    # las estándar devuelven None y se streamea PCM directo.
+    if not is_rvc_voice(voice_id):
+        return None
+    return await _apply_rvc(await _tts_wav(text))
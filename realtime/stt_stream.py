@@ -0,0 +1,201 @@
+# realtime/stt_stream.py
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Awaitable, Callable, List, Optional
+
+from realtime.vad import VoiceActivityDetector
+
+logger = logging.getLogger("uvicorn.error")
+
+STT_STREAMING_DEFAULT = os.getenv("AURI_STT_STREAMING_DEFAULT", "0") == "1"
+
+VAD_PAUSE_MS = int(os.getenv("AURI_VAD_PAUSE_MS", "350"))
+VAD_END_SILENCE_MS = int(os.getenv("AURI_VAD_END_SILENCE_MS", "900"))
+VAD_MIN_SPEECH_MS = int(os.getenv("AURI_VAD_MIN_SPEECH_MS", "200"))
+VAD_MAX_SEGMENT_SEC = float(os.getenv("AURI_VAD_MAX_SEGMENT_SEC", "15"))
+VAD_PREROLL_MS = int(os.getenv("AURI_VAD_PREROLL_MS", "150"))
+
+
+class StreamingTranscriber:
+    """
+    Ingesta de audio en streaming para un socket.
+
+    El PCM se procesa por frames con el VAD a medida que llega:
+    - una pausa corta (pause_ms) cierra un segmento, que se transcribe
+      en segundo plano mientras el usuario sigue hablando;
+    - un silencio largo (end_silence_ms) tras haber hablado marca el
+      fin del enunciado (feed() devuelve True);
+    - solo se guarda en memoria el segmento en curso, no todo el audio.
+
+    finish() corta lo pendiente y devuelve el texto completo en orden,
+    así la latencia final es la del último segmento, no la del total.
+
+    analyze(pcm) -> dict: opcional; features de voz por segmento, en
+    paralelo a su transcripción (quedan en `voice_features`).
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[bytes], Awaitable[str]],
+        on_partial: Optional[Callable[[int, str], Awaitable[None]]] = None,
+        analyze: Optional[Callable[[bytes], Awaitable[dict]]] = None,
+        sample_rate: int = 16000,
+        pause_ms: int = VAD_PAUSE_MS,
+        end_silence_ms: int = VAD_END_SILENCE_MS,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+        max_segment_sec: float = VAD_MAX_SEGMENT_SEC,
+        preroll_ms: int = VAD_PREROLL_MS,
+    ):
+        self.transcribe = transcribe
+        self.on_partial = on_partial
+        self.analyze = analyze
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate)
+
+        self.frame_ms = self.vad.frame_ms
+        self.pause_ms = pause_ms
+        self.end_silence_ms = end_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.max_segment_ms = int(max_segment_sec * 1000)
+        self._preroll_frames = max(1, preroll_ms // self.frame_ms)
+
+        self._tasks: List[asyncio.Task] = []
+        self._feature_tasks: List[asyncio.Task] = []
+        self.reset()
+
+    # ----------------------------------------------------------
+    # Estado
+    # ----------------------------------------------------------
+    def reset(self):
+        for task in self._tasks + self._feature_tasks:
+            task.cancel()
+        self._tasks = []
+        self._feature_tasks = []
+        self.voice_features: List[dict] = []
+
+        self._remainder = b""
+        self._segment = bytearray()
+        self._preroll = deque(maxlen=self._preroll_frames)
+        self._in_speech = False
+        self._speech_ms = 0
+        self._segment_ms = 0
+        self._silence_ms = 0
+        self._trailing_ms = 0
+        self._heard_speech = False
+        self.ended = False
+        self.vad.reset()
+
+    @property
+    def has_audio(self) -> bool:
+        """True si hay segmentos en curso o ya lanzados."""
+        return bool(self._tasks) or self._in_speech
+
+    # ----------------------------------------------------------
+    # Ingesta
+    # ----------------------------------------------------------
+    def feed(self, pcm: bytes) -> bool:
+        """
+        Procesa un bloque de PCM. Devuelve True la primera vez que se
+        detecta el fin del enunciado.
+        """
+        if self.ended or not pcm:
+            return False
+
+        data = self._remainder + pcm
+        step = self.vad.frame_bytes
+        usable = len(data) - (len(data) % step)
+        self._remainder = data[usable:]
+
+        for off in range(0, usable, step):
+            if self._process_frame(data[off:off + step]):
+                self.ended = True
+                self._remainder = b""
+                return True
+
+        return False
+
+    def _process_frame(self, frame: bytes) -> bool:
+        speech = self.vad.is_speech(frame)
+
+        if not self._in_speech:
+            if speech:
+                self._in_speech = True
+                self._segment = bytearray(b"".join(self._preroll))
+                self._segment += frame
+                self._preroll.clear()
+                self._speech_ms = self.frame_ms
+                self._segment_ms = self.frame_ms
+                self._silence_ms = 0
+                return False
+
+            self._preroll.append(frame)
+            if self._heard_speech:
+                self._trailing_ms += self.frame_ms
+                return self._trailing_ms >= self.end_silence_ms
+            return False
+
+        self._segment += frame
+        self._segment_ms += self.frame_ms
+        if speech:
+            self._speech_ms += self.frame_ms
+            self._silence_ms = 0
+        else:
+            self._silence_ms += self.frame_ms
+
+        if self._silence_ms >= self.pause_ms or self._segment_ms >= self.max_segment_ms:
+            self._cut()
+            return self._heard_speech and self._trailing_ms >= self.end_silence_ms
+
+        return False
+
+    def _cut(self):
+        if self._speech_ms >= self.min_speech_ms:
+            idx = len(self._tasks)
+            pcm = bytes(self._segment)
+            self._tasks.append(asyncio.create_task(self._run_segment(idx, pcm)))
+            if self.analyze is not None:
+                self._feature_tasks.append(asyncio.create_task(self.analyze(pcm)))
+            self._heard_speech = True
+            self._trailing_ms = self._silence_ms
+
+        self._segment = bytearray()
+        self._in_speech = False
+        self._speech_ms = 0
+        self._segment_ms = 0
+        self._silence_ms = 0
+
+    async def _run_segment(self, idx: int, pcm: bytes) -> str:
+        text = (await self.transcribe(pcm) or "").strip()
+        if self.on_partial and text:
+            try:
+                await self.on_partial(idx, text)
+            except Exception as e:
+                logger.warning(f"⚠ No se pudo enviar stt_partial: {e}")
+        return text
+
+    # ----------------------------------------------------------
+    # Cierre
+    # ----------------------------------------------------------
+    async def finish(self) -> str:
+        """Corta el segmento abierto y espera todas las transcripciones."""
+        if self._in_speech:
+            self._cut()
+
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        features = await asyncio.gather(*self._feature_tasks, return_exceptions=True)
+        self._feature_tasks = []
+        self.voice_features = [f for f in features if isinstance(f, dict)]
+
+        texts = []
+        for idx, res in enumerate(results):
+            if isinstance(res, Exception):
+                logger.error("⚠ Falló la transcripción del segmento %d: %s", idx, res)
+                continue
+            if res:
+                texts.append(res)
+
+        return " ".join(texts).strip()
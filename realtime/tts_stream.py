@@ -0,0 +1,179 @@
+# realtime/tts_stream.py
+
+import asyncio
+import logging
+import re
+from typing import List, Optional
+
+logger = logging.getLogger("uvicorn.error")
+
+# PCM crudo de OpenAI TTS: 24 kHz, 16-bit, mono
+TTS_PCM_SAMPLE_RATE = 24000
+TTS_STREAM_CHUNK = 4096
+
+
+# ============================================================
+# CORTE POR FRASES
+# ============================================================
+
+class SentenceChunker:
+    """
+    Acumula texto parcial del LLM y devuelve frases completas en cuanto
+    cierran (. ! ? … o salto de línea). Frases muy cortas ("Ok.") se
+    juntan con la siguiente para no pedir TTS de un par de sílabas.
+    """
+
+    BOUNDARY = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\n+")
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buf += text or ""
+        out = []
+        pending = ""
+
+        while True:
+            m = self.BOUNDARY.search(self._buf)
+            if not m:
+                break
+            piece = self._buf[:m.end()]
+            self._buf = self._buf[m.end():]
+
+            pending += piece
+            if len(pending.strip()) >= self.min_chars:
+                out.append(pending.strip())
+                pending = ""
+
+        # lo que quedó corto vuelve al buffer
+        self._buf = pending + self._buf
+        return out
+
+    def flush(self) -> Optional[str]:
+        rest = self._buf.strip()
+        self._buf = ""
+        return rest or None
+
+
+# ============================================================
+# STREAMING LLM → FRASES → TTS → SOCKET
+# ============================================================
+
+async def stream_reply(ws, events, client, tts_model: str, synth_custom=None):
+    """
+    Consume los eventos de AuriMind.astream() y los lleva al socket:
+
+    - reply_partial {delta, index}    por cada delta del LLM (solo el texto
+      nuevo; el cliente concatena por index y reply_final trae el texto entero)
+    - tts_chunk {index, text, format, sample_rate}  al iniciar cada frase,
+      seguido de los frames de audio binarios a medida que llegan
+    - reply_final {text} + tts_end    al terminar
+
+    La síntesis de cada frase arranca apenas la frase cierra, mientras el
+    LLM sigue generando (productor/consumidor con asyncio.Queue).
+
+    synth_custom(voice_id, text) -> bytes | None: opcional; para voces
+    custom (RVC) devuelve el WAV completo de la frase, y None si la voz es
+    estándar (entonces se streamea PCM directo de OpenAI).
+
+    Devuelve el dict final de think().
+    """
+    sentences: asyncio.Queue = asyncio.Queue()
+    state = {"result": None, "voice_id": "alloy", "max_sentences": None}
+
+    async def producer():
+        chunker = SentenceChunker()
+        deltas = 0
+        queued = 0
+        try:
+            async for ev in events:
+                kind = ev.get("type")
+
+                if kind == "meta":
+                    state["voice_id"] = ev.get("voice_id") or "alloy"
+                    state["max_sentences"] = ev.get("max_sentences")
+
+                elif kind == "delta":
+                    delta = ev.get("text") or ""
+                    if not delta:
+                        continue
+                    await ws.send_json({"type": "reply_partial", "delta": delta, "index": deltas})
+                    deltas += 1
+                    for sentence in chunker.feed(delta):
+                        await sentences.put(sentence)
+                        queued += 1
+
+                elif kind == "final":
+                    state["result"] = ev.get("result") or {}
+                    if queued == 0 and not deltas:
+                        # respuesta no streameada (modos, acciones): frases del final
+                        final_text = state["result"].get("final") or state["result"].get("raw") or ""
+                        for sentence in chunker.feed(final_text + "\n"):
+                            await sentences.put(sentence)
+
+            rest = chunker.flush()
+            if rest:
+                await sentences.put(rest)
+        finally:
+            await sentences.put(None)
+
+    producer_task = asyncio.create_task(producer())
+
+    index = 0
+    tts_ok = True
+    while True:
+        sentence = await sentences.get()
+        if sentence is None:
+            break
+
+        limit = state["max_sentences"]
+        if not tts_ok or (limit is not None and index >= limit):
+            continue  # se drena el texto igual; el turno debe cerrarse
+
+        try:
+            audio = None
+            if synth_custom is not None:
+                audio = await synth_custom(state["voice_id"], sentence)
+
+            if audio is not None:
+                await ws.send_json({
+                    "type": "tts_chunk",
+                    "index": index,
+                    "text": sentence,
+                    "format": "wav",
+                })
+                await ws.send_bytes(audio)
+            else:
+                await ws.send_json({
+                    "type": "tts_chunk",
+                    "index": index,
+                    "text": sentence,
+                    "format": "pcm16",
+                    "sample_rate": TTS_PCM_SAMPLE_RATE,
+                })
+                async with client.audio.speech.with_streaming_response.create(
+                    model=tts_model,
+                    voice="alloy",
+                    input=sentence,
+                    response_format="pcm",
+                ) as resp:
+                    async for frame in resp.iter_bytes(TTS_STREAM_CHUNK):
+                        await ws.send_bytes(frame)
+        except Exception as e:
+            logger.exception("🔥 Error en streaming TTS: %s", e)
+            tts_ok = False
+            await ws.send_json({"type": "tts_error", "error": str(e)})
+
+        index += 1
+
+    try:
+        await producer_task
+    except Exception as e:
+        logger.exception("🔥 Error en streaming LLM: %s", e)
+
+    result = state["result"] or {}
+    final_text = result.get("final") or result.get("raw") or ""
+    await ws.send_json({"type": "reply_final", "text": final_text})
+    await ws.send_json({"type": "tts_end"})
+    return result
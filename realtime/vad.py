@@ -0,0 +1,62 @@
+# realtime/vad.py
+
+import os
+
+from auribrain.voice_emotion_analyzer import VoiceEmotionAnalyzer
+
+
+VAD_FRAME_MS = int(os.getenv("AURI_VAD_FRAME_MS", "30"))
+VAD_MIN_RMS = float(os.getenv("AURI_VAD_MIN_RMS", "0.015"))
+VAD_NOISE_RATIO = float(os.getenv("AURI_VAD_NOISE_RATIO", "3.0"))
+
+
+class VoiceActivityDetector:
+    """
+    VAD por energía + ZCR sobre frames de PCM 16-bit mono.
+
+    - Voz sonora: RMS sobre el umbral.
+    - Consonantes sordas (s, f, ch): energía media pero ZCR alto.
+    - El umbral se adapta al piso de ruido (media móvil de los frames
+      de silencio), así un micrófono con ruido de fondo no queda
+      "hablando" todo el tiempo.
+
+    Reutiliza los features de VoiceEmotionAnalyzer.
+    """
+
+    ZCR_UNVOICED = 0.25
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = VAD_FRAME_MS,
+        min_rms: float = VAD_MIN_RMS,
+        noise_ratio: float = VAD_NOISE_RATIO,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+
+        self._features = VoiceEmotionAnalyzer()
+        self.noise_floor = min_rms / noise_ratio
+
+    @property
+    def threshold(self) -> float:
+        return max(self.min_rms, self.noise_floor * self.noise_ratio)
+
+    def is_speech(self, frame: bytes) -> bool:
+        arr = self._features._pcm_to_array(frame)
+        rms = self._features._rms(arr)
+        zcr = self._features._zcr(arr)
+
+        thr = self.threshold
+        speech = rms >= thr or (rms >= thr * 0.5 and zcr >= self.ZCR_UNVOICED)
+
+        if not speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+
+        return speech
+
+    def reset(self):
+        self.noise_floor = self.min_rms / self.noise_ratio
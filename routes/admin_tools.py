@@ -1,5 +1,22 @@
 from fastapi import APIRouter
+from auribrain.async_runtime import run_blocking
 from auribrain.migrate_legacy_memory import run_memory_migration
+from auribrain.migrate_dialog_window import run_dialog_migration
+from auribrain.migrate_vector_format import run_vector_format_migration
+from auribrain.vector_codec import VECTOR_FORMAT
+from auribrain.auri_singleton import sessions
+from auribrain.post_turn_queue import post_turn_queue
+from realtime.audio_buffer import audio_budget
+from auribrain.memory_db import mongo
+from auribrain.memory_indexes import ensure_indexes
+from auribrain.memory_orchestrator import memory_cache_stats
+from auribrain.embedding_cache import embedding_cache
+from auribrain.intent_cache import intent_cache
+from auribrain.semantic_batch_writer import semantic_writer
+from auribrain.vector_backends import vector_backend
+from auribrain.llm_telemetry import llm_telemetry
+from auribrain.trigger_matcher import triggers
+from auribrain.intent_classifier import intent_classifier
 
 router = APIRouter()
 
@@ -7,3 +24,93 @@ router = APIRouter()
 async def run_migration():
     result = run_memory_migration()
     return {"status": "ok", "details": result}
+
+
+@router.post("/run-dialog-migration")
+async def run_dialog_window_migration(drop_legacy: bool = False):
+    result = await run_blocking(run_dialog_migration, drop_legacy)
+    return {"status": "ok", "details": result}
+
+
+@router.post("/run-vector-migration")
+async def run_vector_migration(fmt: str = VECTOR_FORMAT, limit: int = 0):
+    result = await run_blocking(run_vector_format_migration, fmt, limit=limit)
+    return {"status": "ok", "details": result}
+
+
+@router.get("/sessions/stats")
+async def sessions_stats():
+    return {"status": "ok", "sessions": sessions.stats()}
+
+
+@router.get("/post-turn/metrics")
+async def post_turn_metrics():
+    return {"status": "ok", "queue": post_turn_queue.metrics()}
+
+
+@router.get("/audio/budget")
+async def audio_budget_stats():
+    return {"status": "ok", "audio": audio_budget.stats()}
+
+
+@router.get("/mongo/health")
+async def mongo_health():
+    health = await run_blocking(mongo.health)
+    return {"status": "ok" if health["ok"] else "error", "mongo": health}
+
+
+@router.post("/mongo/ensure-indexes")
+async def mongo_ensure_indexes():
+    report = await run_blocking(ensure_indexes)
+    return {"status": "ok" if not report["failed"] else "partial", "indexes": report}
+
+
+@router.get("/memory-cache/stats")
+async def memory_cache_stats_endpoint():
+    return {"status": "ok", "memory_cache": memory_cache_stats()}
+
+
+@router.get("/embedding-cache/stats")
+async def embedding_cache_stats():
+    return {"status": "ok", "embedding_cache": embedding_cache.stats()}
+
+
+@router.get("/semantic-writer/stats")
+async def semantic_writer_stats():
+    return {"status": "ok", "semantic_writer": semantic_writer.stats()}
+
+
+@router.get("/vector-backend/stats")
+async def vector_backend_stats():
+    return {"status": "ok", "vector_backend": vector_backend.stats()}
+
+
+@router.get("/llm/telemetry")
+async def llm_telemetry_stats(top_users: int = 20):
+    return {"status": "ok", "llm": llm_telemetry.snapshot(top_users=top_users)}
+
+
+@router.post("/llm/telemetry/reset")
+async def llm_telemetry_reset():
+    llm_telemetry.reset()
+    return {"status": "ok"}
+
+
+@router.get("/triggers/stats")
+async def trigger_matcher_stats():
+    return {"status": "ok", "triggers": triggers.stats()}
+
+
+@router.get("/intent-classifier/stats")
+async def intent_classifier_stats():
+    return {"status": "ok", "intent_classifier": intent_classifier.stats()}
+
+
+@router.get("/intent-cache/stats")
+async def intent_cache_stats():
+    return {"status": "ok", "intent_cache": intent_cache.stats()}
+
+
+@router.post("/intent-cache/flush")
+async def intent_cache_flush():
+    return {"status": "ok", "flushed": intent_cache.flush()}
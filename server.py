@@ -11,6 +11,13 @@ from routes import admin_tools
 from auribrain.billing_stripe import router as stripe_router
 from auribrain.billing_store import router as store_router 
 from auribrain.subscription.router import router as subscription_router
+from auribrain.post_turn_queue import post_turn_queue
+from auribrain.semantic_batch_writer import semantic_writer
+from auribrain.memory_indexes import ensure_indexes, ENSURE_INDEXES
+from auribrain.async_runtime import run_blocking
+from auribrain.trigger_matcher import triggers
+from auribrain.intent_classifier import intent_classifier
+import asyncio
 
 
 
@@ -40,6 +47,28 @@ app.include_router(subscription_router, prefix="/api")
 
 
 
+@app.on_event("startup")
+async def _start_background_workers():
+    post_turn_queue.start()
+
+    # autómata de triggers con los léxicos de todos los motores (ya importados)
+    triggers.compile()
+
+    # clasificador de intents local: hasta que esté listo se usa el LLM
+    asyncio.get_running_loop().create_task(run_blocking(intent_classifier.load))
+
+    # índices de memoria en segundo plano (no demora el arranque)
+    if ENSURE_INDEXES:
+        asyncio.get_running_loop().create_task(run_blocking(ensure_indexes))
+
+
+@app.on_event("shutdown")
+async def _stop_background_workers():
+    await post_turn_queue.stop()
+    # lo que quedó en el último lote semántico se escribe antes de salir
+    await run_blocking(semantic_writer.close)
+
+
 @app.get("/")
 def home():
     return {"status": "Auri Backend OK", "version": "3.8"}
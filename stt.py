@@ -1,9 +1,9 @@
-import os
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from openai import OpenAI
+
+from auribrain.openai_clients import get_openai_client
 
 router = APIRouter()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_openai_client()
 
 @router.post("/stt")
 async def stt(file: UploadFile = File(...)):
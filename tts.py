@@ -1,12 +1,12 @@
-import os
 import io
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
+
+from auribrain.openai_clients import get_openai_client
 
 router = APIRouter()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_openai_client()
 
 class TTSRequest(BaseModel):
     text: str